@@ -1,22 +1,30 @@
 from dotenv import load_dotenv
 import os
+import sys
+import json
+import time
 import asyncio
+import hashlib
+import argparse
 from pathlib import Path
 
-from langgraph.prebuilt import create_react_agent
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import StdioServerParameters
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 
+from mcp_pool import MCP_POOL_SIZE, MCP_SESSION_CONCURRENCY, PooledSession, SessionPool
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Make sure to set your APIFY_TOKEN in the environment or .env file
 APIFY_TOKEN = os.getenv("APIFY_TOKEN")
-if APIFY_TOKEN is None:
-    raise ValueError("APIFY_TOKEN environment variable must be set.")
+
+DEFAULT_PROMPT = "Give me a list with the top 10 cafes in Boston."
+
+# Seconds one prompt may take in batch mode before it is recorded as timed out
+PROMPT_TIMEOUT = float(os.getenv("PROMPT_TIMEOUT", "300"))
 
 # Initialize the model
 # Note: You can use any model from langchain_openai
@@ -27,42 +35,204 @@ model = ChatOpenAI(model="gpt-4o")
 server_params = StdioServerParameters(
     command="npx",
     args=["-y", "@apify/actors-mcp-server"],
-    env={"APIFY_TOKEN": APIFY_TOKEN},
+    env={"APIFY_TOKEN": APIFY_TOKEN or ""},
 )
 
 
-# Initialize the MCP client, load tools, and create an agent
-async def main():
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            # Initialize the connection
-            await session.initialize()
+def session_agent(slot: PooledSession):
+    """The agent for a pooled session, built once from its cached tool list"""
+    agent = slot.cache.get("agent")
+    if agent is None:
+        tools = [convert_mcp_tool_to_langchain_tool(slot.session, tool) for tool in slot.tools]
+        agent = slot.cache["agent"] = create_react_agent(model, tools)
+    return agent
+
+
+async def ask(pool: SessionPool, prompt: str) -> dict:
+    """Run one prompt through the agent on a warm session"""
+    async def invoke(slot: PooledSession) -> dict:
+        agent_response = await session_agent(slot).ainvoke({"messages": prompt})
+        messages = agent_response["messages"]
+        return {
+            "response": messages[-1].content,
+            "tool_calls": sum(1 for message in messages if getattr(message, "type", None) == "tool"),
+            "session": slot.index,
+        }
+
+    return await pool.run(invoke)
+
+
+async def read_prompts(source):
+    """(id, prompt, error) triples from lines of text or JSON objects with "prompt" (and optional "id").
+
+    Lines are read on a worker thread, so waiting on a slow stdin never
+    blocks the event loop. Prompts without an id get one from a hash of
+    their text, numbered when the same text repeats, so ids stay stable if
+    the file is reordered. A JSON line that does not parse or has no
+    "prompt" is yielded as the prompt with the reason as error, so one bad
+    line does not end the batch.
+    """
+    seen = {}
+    while True:
+        line = await asyncio.to_thread(source.readline)
+        if not line:
+            return
+        line = line.strip()
+        if not line:
+            continue
+        error = None
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                entry, error = {}, f"invalid JSON: {e}"
+            prompt, prompt_id = entry.get("prompt"), entry.get("id")
+            if error is None and not (isinstance(prompt, str) and prompt.strip()):
+                error = 'no "prompt" text'
+            if error is not None:
+                prompt, prompt_id = line, None
+        else:
+            prompt, prompt_id = line, None
+        if prompt_id is None:
+            digest = hashlib.sha1(prompt.encode()).hexdigest()[:16]
+            seen[digest] = seen.get(digest, 0) + 1
+            prompt_id = digest if seen[digest] == 1 else f"{digest}#{seen[digest]}"
+        yield str(prompt_id), prompt, error
+
+
+def require_token():
+    if APIFY_TOKEN is None:
+        raise ValueError("APIFY_TOKEN environment variable must be set.")
+
+
+def finished_ids(output: Path) -> set:
+    """Ids already answered in an earlier run (failed and timed-out ones are retried)"""
+    done = set()
+    if output.exists():
+        with open(output) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+    return done
+
+
+async def run_batch(source, output: Path, sessions, per_session, timeout=PROMPT_TIMEOUT):
+    """Answer every prompt from source, appending one JSON line per result as it completes.
+
+    Prompts are streamed from the input through a bounded queue, so memory
+    stays flat for any batch size; rerunning with the same output skips the
+    prompts already answered.
+    """
+    require_token()
+    done = finished_ids(output)
+    concurrency = sessions * per_session
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "error": 0, "timeout": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "a", encoding="utf-8") as out:
+        if out.tell() and not output.read_bytes().endswith(b"\n"):
+            out.write("\n")  # finish a line cut short by an interrupted run
+
+        def write(record: dict):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            finished = counts["ok"] + counts["error"] + counts["timeout"]
+            if finished % 10 == 0:
+                rate = finished / (time.perf_counter() - started)
+                print(f"{finished} done ({counts['error']} errors, {counts['timeout']} timeouts), {rate:.2f}/s", file=sys.stderr)
+
+        async def worker(pool: SessionPool):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                prompt_id, prompt = item
+                record = {"id": prompt_id, "prompt": prompt, "started_at": time.time()}
+                start = time.perf_counter()
+                try:
+                    record.update(await asyncio.wait_for(ask(pool, prompt), timeout))
+                    record["status"] = "ok"
+                except asyncio.TimeoutError:
+                    record.update(status="timeout", error=f"no answer within {timeout:g}s")
+                except Exception as e:
+                    record.update(status="error", error=repr(e))
+                record["elapsed_s"] = round(time.perf_counter() - start, 3)
+                write(record)
+
+        async with SessionPool(server_params, size=sessions, per_session=per_session) as pool:
+            workers = [asyncio.create_task(worker(pool)) for _ in range(concurrency)]
+            try:
+                async for prompt_id, prompt, error in read_prompts(source):
+                    if prompt_id in done:
+                        counts["skipped"] += 1
+                        continue
+                    done.add(prompt_id)  # duplicate ids in one input run once
+                    if error is not None:
+                        write({"id": prompt_id, "prompt": prompt, "status": "error", "error": error})
+                        continue
+                    await queue.put((prompt_id, prompt))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                # Reading the input failed: don't leave the workers waiting
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    print(f"Batch finished: {counts} in {time.perf_counter() - started:.1f}s, results in {output}", file=sys.stderr)
+    return counts
+
+
+# Start the MCP sessions once and run every prompt over them concurrently
+async def main(prompts, sessions=MCP_POOL_SIZE, per_session=MCP_SESSION_CONCURRENCY):
+    require_token()
+
+    output_dir = Path("results")
+    output_dir.mkdir(exist_ok=True)
 
-            # Get tools
-            tools = await load_mcp_tools(session)
+    async with SessionPool(server_params, size=sessions, per_session=per_session) as pool:
+        responses = await asyncio.gather(*(ask(pool, prompt) for prompt in prompts), return_exceptions=True)
 
-            # Create and run the agent
-            agent = create_react_agent(model, tools)
-            agent_response = await agent.ainvoke(
-                {"messages": "Give me a list with the top 10 cafes in Boston."}
-            )
+    for index, (prompt, result) in enumerate(zip(prompts, responses)):
+        if isinstance(result, BaseException):
+            print(f"Prompt {index + 1} failed: {result!r}", file=sys.stderr)
+            continue
+        response_content = result["response"]
+        print(response_content)
 
-            # Get the response content
-            response_content = agent_response["messages"][-1].content
-            print(agent_response["messages"][-1].content)
+        # Save the response to a markdown file
+        filename = "agent_response.md" if len(prompts) == 1 else f"agent_response_{index + 1}.md"
+        file_path = output_dir / filename
 
-            # Save the response to a markdown file
-            output_dir = Path("results")
-            output_dir.mkdir(exist_ok=True)
-            filename = f"agent_response.md"
-            file_path = output_dir / filename
+        # Write to file
+        with open(file_path, "w") as f:
+            f.write(response_content)
 
-            # Write to file
-            with open(file_path, "w") as f:
-                f.write(response_content)
+        print(f"\nResults saved to {file_path}")
 
-            print(f"\\nResults saved to {file_path}")
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run prompts through an agent using Apify MCP tools")
+    parser.add_argument("prompts", nargs="*", default=[DEFAULT_PROMPT])
+    parser.add_argument("--sessions", type=int, default=MCP_POOL_SIZE, help="MCP server processes kept warm")
+    parser.add_argument("--per-session", type=int, default=MCP_SESSION_CONCURRENCY, help="prompts each session runs at once")
+    parser.add_argument("--input", help="batch mode: file of prompts, one per line or JSON with \"prompt\" (- for stdin)")
+    parser.add_argument("--output", default="results/batch.jsonl", help="batch results, appended to and resumed from")
+    parser.add_argument("--timeout", type=float, default=PROMPT_TIMEOUT, help="seconds per prompt in batch mode")
+    args = parser.parse_args()
 
-# Run the async main function
-asyncio.run(main())
+    # Run the async main function
+    if args.input:
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        with source:
+            counts = asyncio.run(run_batch(source, Path(args.output), args.sessions, args.per_session, args.timeout))
+        sys.exit(1 if counts["error"] or counts["timeout"] else 0)
+    asyncio.run(main(args.prompts, args.sessions, args.per_session))
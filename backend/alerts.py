@@ -0,0 +1,414 @@
+"""
+TravelDeals deal alerts
+Background watcher that polls watched routes and reports price drops
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import TravelDeal, deal_key
+from ratelimit import TokenBucket
+from serialization import dumps
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Background polling calls the real provider APIs, so it only runs by default
+# in the long-lived HTTP server, not in every spawned stdio session.
+# DEAL_WATCH_ENABLED=1 or 0 forces it on or off (off: the resource stays empty)
+DEAL_WATCH_ENABLED = os.getenv("DEAL_WATCH_ENABLED", "")
+
+# JSON list of routes to watch; the popular destinations are watched by default
+DEAL_WATCH_FILE = os.getenv("DEAL_WATCH_FILE")
+DEAL_WATCH_ORIGIN = os.getenv("DEAL_WATCH_ORIGIN", "NYC")
+
+# Each route is re-polled every interval +/- jitter (a fraction of it). The
+# first polls are spread over DEAL_WATCH_STARTUP_SPREAD seconds.
+DEAL_WATCH_INTERVAL = float(os.getenv("DEAL_WATCH_INTERVAL", "900"))
+DEAL_WATCH_JITTER = float(os.getenv("DEAL_WATCH_JITTER", "0.2"))
+DEAL_WATCH_STARTUP_SPREAD = float(os.getenv("DEAL_WATCH_STARTUP_SPREAD", "60"))
+
+# Background polls in flight at once, and polls per minute each provider may
+# receive from the watcher
+DEAL_WATCH_CONCURRENCY = int(os.getenv("DEAL_WATCH_CONCURRENCY", "2"))
+DEAL_WATCH_BUDGET = float(os.getenv("DEAL_WATCH_BUDGET", "30"))
+
+# Share of each provider's rate and concurrency limits kept for tool calls;
+# polls that would eat into it are deferred by DEAL_WATCH_DEFER seconds
+DEAL_WATCH_RESERVE = float(os.getenv("DEAL_WATCH_RESERVE", "0.5"))
+DEAL_WATCH_DEFER = float(os.getenv("DEAL_WATCH_DEFER", "5"))
+
+# Smallest price drop reported, and how long an alert lives (seconds)
+DEAL_ALERT_MIN_DROP = float(os.getenv("DEAL_ALERT_MIN_DROP", "0.1"))
+DEAL_ALERT_TTL = float(os.getenv("DEAL_ALERT_TTL", str(6 * 3600)))
+
+# How often expired alerts are pruned (seconds)
+PRUNE_INTERVAL = 60.0
+
+POPULAR_DESTINATIONS = ("Paris", "Tokyo", "New York", "London", "Barcelona")
+
+Search = Callable[[str, str, dict], Awaitable[Tuple[object, str]]]
+
+
+@dataclass(frozen=True)
+class WatchedRoute:
+    """A search repeated by the watcher.
+
+    Dates are either fixed or relative (days_ahead, nights), so a watch
+    list keeps looking at the same distance into the future.
+    """
+    deal_type: str  # "flight" or "hotel"
+    destination: str
+    origin: str = ""
+    departure_date: Optional[str] = None
+    return_date: Optional[str] = None
+    days_ahead: int = 30
+    nights: Optional[int] = 7
+
+    @property
+    def id(self) -> str:
+        where = f"{self.origin}-{self.destination}" if self.origin else self.destination
+        when = self.departure_date or f"+{self.days_ahead}d"
+        if self.return_date or self.nights:
+            when += f"/{self.return_date or f'{self.nights}n'}"
+        return f"{self.deal_type}:{where}:{when}"
+
+    def search_args(self, today: date) -> Tuple[str, dict]:
+        """(tool, arguments) of the search to run today"""
+        start = date.fromisoformat(self.departure_date) if self.departure_date else today + timedelta(days=self.days_ahead)
+        end = date.fromisoformat(self.return_date) if self.return_date else (
+            start + timedelta(days=self.nights) if self.nights else None
+        )
+        if self.deal_type == "hotel":
+            end = end or start + timedelta(days=1)
+            return "search_hotel_deals", {
+                "destination": self.destination,
+                "checkin_date": start.isoformat(),
+                "checkout_date": end.isoformat(),
+            }
+        args = {"origin": self.origin, "destination": self.destination, "departure_date": start.isoformat()}
+        if end is not None:
+            args["return_date"] = end.isoformat()
+        return "search_flight_deals", args
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WatchedRoute":
+        deal_type = data.get("type", data.get("deal_type", "flight"))
+        if deal_type not in ("flight", "hotel"):
+            raise ValueError(f"Unsupported deal type in watch list: {deal_type}")
+        return cls(
+            deal_type=deal_type,
+            destination=data["destination"],
+            origin=data.get("origin", DEAL_WATCH_ORIGIN if deal_type == "flight" else ""),
+            departure_date=data.get("departure_date") or data.get("checkin_date"),
+            return_date=data.get("return_date") or data.get("checkout_date"),
+            days_ahead=int(data.get("days_ahead", 30)),
+            nights=data.get("nights", 7),
+        )
+
+
+def load_watch_list(path: Optional[str] = DEAL_WATCH_FILE) -> List[WatchedRoute]:
+    """Routes from a JSON watch file, or flights and hotels for the popular destinations"""
+    if path:
+        with open(path) as f:
+            return [WatchedRoute.from_dict(entry) for entry in json.load(f)]
+    routes = []
+    for destination in POPULAR_DESTINATIONS:
+        routes.append(WatchedRoute("flight", destination, origin=DEAL_WATCH_ORIGIN))
+        routes.append(WatchedRoute("hotel", destination))
+    return routes
+
+
+class Alert:
+    """A price drop on one deal of one watched route"""
+
+    __slots__ = ("route", "deal", "previous_price", "detected_at", "expires_at")
+
+    def __init__(self, route: WatchedRoute, deal: TravelDeal, previous_price: float, now: float):
+        self.route = route
+        self.deal = deal
+        self.previous_price = previous_price
+        self.detected_at = now
+        # Gone once the deal's start date arrives, or after DEAL_ALERT_TTL
+        self.expires_at = now + DEAL_ALERT_TTL
+        if deal.start is not None:
+            start = datetime.combine(date.fromordinal(deal.start), datetime.min.time()).timestamp()
+            self.expires_at = min(self.expires_at, start)
+
+    @property
+    def drop(self) -> float:
+        return 1 - self.deal.price / self.previous_price
+
+    def to_dict(self) -> dict:
+        deal = self.deal
+        return {
+            "route": self.route.id,
+            "type": deal.deal_type,
+            "destination": deal.destination,
+            **({"origin": deal.origin} if deal.origin else {}),
+            "title": deal.title,
+            "provider": deal.provider,
+            "price": deal.price,
+            "previous_price": self.previous_price,
+            "savings": f"{self.drop * 100:.0f}%",
+            "dates": deal.dates,
+            "url": deal.url,
+            "detected_at": datetime.fromtimestamp(self.detected_at).isoformat(timespec="seconds"),
+            "expires": datetime.fromtimestamp(self.expires_at).isoformat(timespec="seconds"),
+        }
+
+
+class _RouteState:
+    __slots__ = ("route", "result", "fingerprint", "prices")
+
+    def __init__(self, route: WatchedRoute):
+        self.route = route
+        self.result = None  # last search result object (cache hits return the same one)
+        self.fingerprint: Optional[int] = None
+        self.prices: Dict[tuple, float] = {}
+
+
+class DealAlerts:
+    """Polls watched routes in the background and keeps the current price drops.
+
+    Polls are scheduled from a heap of due times with jitter, so thousands
+    of routes spread out instead of firing together. The watcher is lower
+    priority than tool calls: at most DEAL_WATCH_CONCURRENCY polls run at
+    once, each provider has its own poll budget, and a poll is deferred
+    while any of its providers is short of headroom under its rate limit.
+
+    Only routes whose results changed are diffed against their previous
+    prices. Alerts are keyed on (route, deal), so a deal is reported once
+    and only replaced by a deeper drop. The resource body is re-encoded
+    when the alert set changes, so reads are a lookup. providers returns
+    the server's adapters, which are only built once something needs them.
+    """
+
+    def __init__(
+        self,
+        search: Search,
+        providers: Callable[[], list],
+        routes: Optional[List[WatchedRoute]] = None,
+        interval: float = DEAL_WATCH_INTERVAL,
+        jitter: float = DEAL_WATCH_JITTER,
+        concurrency: int = DEAL_WATCH_CONCURRENCY,
+        budget: float = DEAL_WATCH_BUDGET,
+        min_drop: float = DEAL_ALERT_MIN_DROP,
+        encode: Callable[[Any], str] = dumps,
+    ):
+        self.search = search
+        self.encode = encode
+        self.providers = providers
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.min_drop = min_drop
+        self.budget = budget
+        self.budgets: Dict[str, TokenBucket] = {}
+        self._routes: Dict[str, _RouteState] = {}
+        self._due: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._alerts: Dict[Tuple[str, tuple], Alert] = {}
+        self._inflight: set = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot = ""
+        self._pruned_at = 0.0
+        self.counters = {"polls": 0, "unchanged": 0, "diffed": 0, "deferred": 0, "failed": 0, "alerts_raised": 0}
+        for route in routes if routes is not None else []:
+            self.watch(route)
+        self._publish()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def watch(self, route: WatchedRoute, delay: Optional[float] = None) -> None:
+        """Add a route; its first poll is spread over the startup window"""
+        if route.id in self._routes:
+            return
+        self._routes[route.id] = _RouteState(route)
+        if delay is None:
+            delay = random.uniform(0, min(DEAL_WATCH_STARTUP_SPREAD, self.interval))
+        self._schedule(route.id, delay)
+
+    def unwatch(self, route_id: str) -> None:
+        """Stop polling a route and drop its alerts (its heap entry is skipped lazily)"""
+        if self._routes.pop(route_id, None) is not None:
+            stale = [key for key in self._alerts if key[0] == route_id]
+            for key in stale:
+                del self._alerts[key]
+            if stale:
+                self._publish()
+
+    def _schedule(self, route_id: str, delay: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._due, (time.monotonic() + delay, self._seq, route_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_interval(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    # Reads
+
+    def snapshot(self) -> str:
+        """Encoded resource body, rebuilt only when alerts change"""
+        return self._snapshot
+
+    def stats(self) -> dict:
+        return {**self.counters, "routes": len(self._routes), "alerts": len(self._alerts), "polling": len(self._inflight)}
+
+    def _publish(self) -> None:
+        alerts = sorted(self._alerts.values(), key=lambda alert: alert.drop, reverse=True)
+        self._snapshot = self.encode({
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "watching": len(self._routes),
+            "alerts": [alert.to_dict() for alert in alerts],
+        })
+
+    # Scheduler
+
+    def start(self, default: bool = False) -> None:
+        """Start polling on the running event loop; default applies unless DEAL_WATCH_ENABLED is set"""
+        enabled = DEAL_WATCH_ENABLED != "0" if DEAL_WATCH_ENABLED else default
+        if enabled and self._task is None and self._routes:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, *self._inflight) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._inflight.clear()
+
+    async def _run(self) -> None:
+        while True:
+            self.prune()
+            now = time.monotonic()
+            if len(self._inflight) >= self.concurrency or not self._due or self._due[0][0] > now:
+                # Woken early by a finished poll or a newly watched route
+                timeout = PRUNE_INTERVAL
+                if self._due and len(self._inflight) < self.concurrency:
+                    timeout = min(self._due[0][0] - now, PRUNE_INTERVAL)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0.0))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, route_id = heapq.heappop(self._due)
+            state = self._routes.get(route_id)
+            if state is None:
+                continue  # unwatched
+            if not self._admit(state.route):
+                self.counters["deferred"] += 1
+                self._schedule(route_id, DEAL_WATCH_DEFER * random.uniform(0.5, 1.5))
+                continue
+            task = asyncio.create_task(self._poll(state))
+            self._inflight.add(task)
+            task.add_done_callback(self._poll_done)
+
+    def _poll_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _admit(self, route: WatchedRoute) -> bool:
+        """Take a budget token from every provider the route's search hits,
+        unless one of them lacks budget or headroom for tool calls"""
+        providers = [provider for provider in self.providers() if provider.supports(route.deal_type)]
+        for provider in providers:
+            if provider.name not in self.budgets:
+                self.budgets[provider.name] = TokenBucket(self.budget / 60, max(int(self.budget / 6), 1))
+            if self.budgets[provider.name].delay() > 0 or not provider.limiter.has_headroom(DEAL_WATCH_RESERVE):
+                return False
+        for provider in providers:
+            self.budgets[provider.name].try_acquire()
+        return True
+
+    async def _poll(self, state: _RouteState) -> None:
+        route = state.route
+        tool, args = route.search_args(date.today())
+        try:
+            search, _ = await self.search(tool, route.deal_type, args)
+        except Exception as e:
+            self.counters["failed"] += 1
+            logger.warning(f"Deal watch poll of {route.id} failed: {e}")
+        else:
+            self.counters["polls"] += 1
+            if self.update(state, search.deals, complete=not search.partial, result=search):
+                self._publish()
+        finally:
+            if route.id in self._routes:
+                self._schedule(route.id, self._next_interval())
+
+    # Change detection
+
+    def update(self, state: _RouteState, deals: List[TravelDeal], complete: bool = True, result=None) -> bool:
+        """Fold one poll of a route into its prices; True if alerts changed.
+
+        A partial result (some providers failed) only updates the deals it
+        contains, so a provider outage does not look like deals vanishing.
+        """
+        if result is not None and result is state.result:
+            self.counters["unchanged"] += 1
+            return False
+        state.result = result
+        # A complete result with the same deals as a partial one still has
+        # to be diffed, to drop alerts for deals the partial one missed
+        fingerprint = hash((complete, tuple(sorted((deal_key(deal), deal.price) for deal in deals))))
+        if fingerprint == state.fingerprint:
+            self.counters["unchanged"] += 1
+            return False
+        state.fingerprint = fingerprint
+        self.counters["diffed"] += 1
+
+        route_id = state.route.id
+        now = time.time()
+        changed = False
+        prices = {} if complete else dict(state.prices)
+        for deal in deals:
+            key = deal_key(deal)
+            previous = state.prices.get(key)
+            prices[key] = deal.price
+            alert = self._alerts.get((route_id, key))
+            if previous is not None and deal.price <= previous * (1 - self.min_drop):
+                if alert is None or deal.price < alert.deal.price:
+                    # A deeper drop keeps the price the deal dropped from
+                    reference = alert.previous_price if alert is not None else previous
+                    self._alerts[(route_id, key)] = Alert(state.route, deal, reference, now)
+                    if alert is None:
+                        self.counters["alerts_raised"] += 1
+                    changed = True
+            elif alert is not None and deal.price > alert.deal.price:
+                del self._alerts[(route_id, key)]  # the drop is over
+                changed = True
+
+        if complete:
+            for key in [key for key in self._alerts if key[0] == route_id and key[1] not in prices]:
+                del self._alerts[key]  # the deal is gone
+                changed = True
+        state.prices = prices
+        return changed
+
+    def prune(self) -> None:
+        """Drop expired alerts, at most once per PRUNE_INTERVAL"""
+        now = time.time()
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        expired = [key for key, alert in self._alerts.items() if alert.expires_at <= now]
+        for key in expired:
+            del self._alerts[key]
+        if expired:
+            self._publish()
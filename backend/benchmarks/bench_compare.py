@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+compare_deals micro-benchmark
+List-of-TravelDeal scoring + sort vs. columnar NumPy scoring + argpartition
+
+Usage: python benchmarks/bench_compare.py [--sizes 1000 10000 100000] [--top 3]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import TravelDeal
+from scoring import CRITERIA, VALUE_WEIGHTS, DealColumns, deal_nights, top_n
+
+
+def make_deals(count: int, seed: int = 7) -> list[TravelDeal]:
+    rng = random.Random(seed)
+    deals = []
+    for i in range(count):
+        price = rng.uniform(60, 900)
+        original_price = price * rng.uniform(1.0, 1.8)
+        checkin_day = rng.randint(1, 20)
+        deals.append(TravelDeal(
+            title=f"Hotel {i}",
+            price=round(price, 2),
+            original_price=round(original_price, 2),
+            savings=round(original_price - price, 2),
+            destination=rng.choice(["Paris", "Tokyo", "New York", "London", "Barcelona"]),
+            dates=f"2026-03-{checkin_day:02d} - 2026-03-{checkin_day + rng.randint(1, 7):02d}",
+            provider=rng.choice(["Booking.com", "Hotels.com", "Expedia"]),
+            rating=round(rng.uniform(2.5, 5.0), 1),
+            url=f"https://example.com/hotel/{i}",
+            image_url="",
+            deal_type="hotel",
+        ))
+    return deals
+
+
+def python_top_n(deals: list[TravelDeal], criteria: str, n: int) -> list[TravelDeal]:
+    """Per-object loop equivalent of scoring.top_n"""
+    prices = [deal.price for deal in deals]
+    low, high = min(prices), max(prices)
+
+    def price_score(deal):
+        return 100.0 if high == low else 100.0 - (deal.price - low) / (high - low) * 100.0
+
+    if criteria == "price":
+        key = price_score
+    elif criteria == "rating":
+        key = lambda deal: min(max(deal.rating, 0.0), 5.0) / 5.0 * 100.0
+    elif criteria == "savings":
+        key = lambda deal: deal.savings * deal_nights(deal)
+    else:
+        def key(deal):
+            percent = deal.savings * 100.0 / deal.original_price if deal.original_price > 0 else 0.0
+            return (
+                VALUE_WEIGHTS["savings"] * min(max(percent, 0.0), 100.0)
+                + VALUE_WEIGHTS["rating"] * min(max(deal.rating, 0.0), 5.0) / 5.0 * 100.0
+                + VALUE_WEIGHTS["price"] * price_score(deal)
+            )
+    return sorted(deals, key=key, reverse=True)[:n]
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"  {label:<34} {best * 1000:9.3f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        deals = make_deals(size)
+        columns = DealColumns(deals)
+        print(f"\n{size} deals, top {args.top}")
+        for criteria in CRITERIA:
+            print(f" criteria={criteria}")
+            baseline = bench("list[TravelDeal] + sorted", lambda: python_top_n(deals, criteria, args.top), args.repeat)
+            cold = bench("DealColumns build + top_n", lambda: top_n(DealColumns(deals), criteria, args.top), args.repeat)
+            warm = bench("top_n on cached DealColumns", lambda: top_n(columns, criteria, args.top), args.repeat)
+            print(f"  speedup: {baseline / cold:5.1f}x cold, {baseline / warm:6.1f}x warm")
+
+
+if __name__ == "__main__":
+    main()
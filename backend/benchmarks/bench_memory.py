@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+TravelDeal memory benchmark
+Bytes per deal for the original @dataclass and the slotted TravelDeal
+
+Usage: python benchmarks/bench_memory.py [--count 200000]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import TravelDeal
+
+
+@dataclass
+class DataclassDeal:
+    """The original TravelDeal layout, kept here as the baseline"""
+    title: str
+    price: float
+    original_price: float
+    savings: float
+    destination: str
+    dates: str
+    provider: str
+    rating: float
+    url: str
+    image_url: str
+    deal_type: str
+
+
+DESTINATIONS = ["Paris", "Tokyo", "New York", "London", "Barcelona", "Rome", "Lisbon", "Bali"]
+PROVIDERS = ["Booking.com", "Hotels.com", "Expedia", "Skyscanner", "Amadeus"]
+
+
+def raw_records(count: int, seed: int = 11):
+    """Field values as a JSON decoder would produce them (fresh str objects)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        price = round(rng.uniform(60, 900), 2)
+        original_price = round(price * rng.uniform(1.0, 1.8), 2)
+        day = rng.randint(1, 20)
+        yield dict(
+            title=f"Hotel {i} in {rng.choice(DESTINATIONS)}",
+            price=price,
+            original_price=original_price,
+            savings=round(original_price - price, 2),
+            destination="".join(rng.choice(DESTINATIONS)),
+            dates=f"2026-03-{day:02d} - 2026-03-{day + rng.randint(1, 7):02d}",
+            provider="".join(rng.choice(PROVIDERS)),
+            rating=round(rng.uniform(2.5, 5.0), 1),
+            url=f"https://example.com/hotel/{i}",
+            image_url=f"https://example.com/hotel/{i}.jpg",
+            deal_type="".join(["ho", "tel"]),
+        )
+
+
+def measure(label: str, build, count: int, baseline: float = None) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = list(raw_records(count))
+    container = build(records)
+    del records  # only what the container retains counts
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    per_deal = used / count
+    note = f"  ({per_deal / baseline:.0%} of baseline)" if baseline else ""
+    print(f"  {label:<36} {per_deal:8.1f} bytes/deal{note}")
+    del container
+    return per_deal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{args.count} deals")
+    baseline = measure("list[@dataclass TravelDeal] (before)", lambda rs: [DataclassDeal(**r) for r in rs], args.count)
+    measure("list[slotted TravelDeal]", lambda rs: [TravelDeal(**r) for r in rs], args.count, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark
+Encode cost and payload size of tool responses per output mode
+
+Usage: python benchmarks/bench_serialization.py [--sizes 5 50 500]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def flight_response(deal_count: int) -> dict:
+    """A search_flight_deals result body with deal_count deals"""
+    return {
+        "search_params": {"origin": "NYC", "destination": "Paris", "departure_date": "2026-03-01"},
+        "deals_found": deal_count,
+        "best_savings": "$230",
+        "deals": [
+            {
+                "title": f"NYC to Paris Round-trip #{i}",
+                "price": 450.0 + i,
+                "original_price": 680.0 + i,
+                "savings": 230.0,
+                "savings_percent": "34%",
+                "provider": "Skyscanner",
+                "rating": 4.5,
+                "dates": "2026-03-01 - 2026-03-08",
+                "url": f"https://skyscanner.com/deal{i}",
+            }
+            for i in range(deal_count)
+        ],
+        "search_metadata": {
+            "partial": False,
+            "elapsed_ms": 71.4,
+            "providers": [{"name": "amadeus", "status": "ok", "deals": deal_count, "latency_ms": 71.2}],
+            "cache": "miss",
+        },
+    }
+
+
+def encoders() -> dict:
+    modes = {
+        "json indent=2 (before)": lambda obj: json.dumps(obj, indent=2),
+        "json compact": lambda obj: json.dumps(obj, separators=(",", ":"), ensure_ascii=False),
+    }
+    if orjson is not None:
+        modes["orjson compact"] = lambda obj: orjson.dumps(obj).decode()
+        modes["orjson indent=2"] = lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return modes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"serialization.dumps uses {'orjson' if serialization.USE_ORJSON else 'json'}, "
+          f"OUTPUT_FORMAT={serialization.OUTPUT_FORMAT}")
+    for size in args.sizes:
+        body = flight_response(size)
+        print(f"\n{size} deals")
+        baseline_time = baseline_bytes = None
+        for label, encode in encoders().items():
+            number = max(args.number // size, 20)
+            per_call = min(timeit.repeat(lambda: encode(body), number=number, repeat=3)) / number
+            payload = len(encode(body).encode())
+            if baseline_time is None:
+                baseline_time, baseline_bytes = per_call, payload
+            print(f"  {label:<24} {per_call * 1e6:9.1f} us  {payload:8d} bytes  "
+                  f"({per_call / baseline_time:4.0%} time, {payload / baseline_bytes:4.0%} size)")
+
+
+if __name__ == "__main__":
+    main()
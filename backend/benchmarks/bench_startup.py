@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Time from spawning the stdio server to its initialize and first list_tools responses
+
+Spawns server.py the way a desktop client does, one fresh process per run,
+and speaks raw JSON-RPC over its pipes so no client-side work is counted.
+Reports the median and spread over the runs; --profile also passes
+--profile-startup and prints the server's own import/init breakdown from
+the last run.
+
+Usage: python benchmarks/bench_startup.py [--runs 20] [--profile] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+INITIALIZE = {
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "1.0"},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+
+
+def send(process: subprocess.Popen, message: dict) -> None:
+    process.stdin.write(json.dumps(message).encode() + b"\n")
+    process.stdin.flush()
+
+
+def receive(process: subprocess.Popen, request_id: int) -> dict:
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("server exited before answering")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def spawn_once(profile: bool, env: dict) -> dict:
+    """Milliseconds from spawn to the initialize and tools/list responses"""
+    command = [sys.executable, str(BACKEND / "server.py")] + (["--profile-startup"] if profile else [])
+    with tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=BACKEND, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            send(process, INITIALIZE)
+            receive(process, 1)
+            initialized = time.perf_counter()
+            send(process, INITIALIZED)
+            send(process, LIST_TOOLS)
+            tools = receive(process, 2)["result"]["tools"]
+            listed = time.perf_counter()
+        finally:
+            process.stdin.close()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        stderr.seek(0)
+        log = stderr.read().decode(errors="replace")
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "list_tools_ms": (listed - started) * 1000,
+        "tools": len(tools),
+        "log": log,
+    }
+
+
+def summarize(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        "median": statistics.median(ordered),
+        "min": ordered[0],
+        "p90": ordered[min(int(len(ordered) * 0.9), len(ordered) - 1)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--profile", action="store_true", help="print the server's startup profile from the last run")
+    parser.add_argument("--json", help="save the results to this file")
+    args = parser.parse_args()
+
+    # No upstream keys or background work: measure the server alone
+    env = {**os.environ, "PRICE_HISTORY_PATH": "", "DEAL_WATCH_ENABLED": "0"}
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        env.pop(name, None)
+
+    spawn_once(False, env)  # warm the OS file cache and bytecode
+    runs = [spawn_once(args.profile, env) for _ in range(args.runs)]
+
+    results = {
+        "runs": args.runs,
+        "tools": runs[-1]["tools"],
+        "initialize_ms": summarize([run["initialize_ms"] for run in runs]),
+        "list_tools_ms": summarize([run["list_tools_ms"] for run in runs]),
+    }
+    print(f"spawn -> response over {args.runs} runs ({results['tools']} tools)")
+    for name in ("initialize_ms", "list_tools_ms"):
+        stats = results[name]
+        print(f"  {name[:-3]:<11} median {stats['median']:7.1f} ms   min {stats['min']:7.1f} ms   p90 {stats['p90']:7.1f} ms")
+    if args.profile:
+        print("\nServer startup profile (last run):")
+        print("\n".join(line for line in runs[-1]["log"].splitlines() if "startup" in line))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
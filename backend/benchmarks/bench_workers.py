@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Worker-count benchmark
+Throughput and latency of the HTTP server with 1..N worker processes
+
+Starts server.py --transport http --workers N on a local port for each N,
+drives it with concurrent MCP clients for a fixed duration and prints
+requests/second and latency percentiles. Uses the demo provider, so the
+numbers measure the server's own CPU work (package joins, encoding).
+
+Usage: python benchmarks/bench_workers.py [--workers 1 2 4] [--clients 32] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+SERVER = Path(__file__).resolve().parent.parent / "server.py"
+
+PACKAGE_ARGS = {
+    "origin": "NYC",
+    "destination": "Paris",
+    "departure_date": "2026-03-01",
+    "return_date": "2026-03-08",
+}
+
+
+async def wait_ready(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"http://127.0.0.1:{port}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not become ready")
+
+
+async def client_loop(url: str, stop_at: float, latencies: list, errors: list) -> None:
+    async with streamablehttp_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                result = await session.call_tool("search_package_deals", PACKAGE_ARGS)
+                latencies.append(time.perf_counter() - started)
+                if result.isError:
+                    errors.append(result.content[0].text)
+
+
+async def drive(port: int, clients: int, duration: float) -> tuple:
+    url = f"http://127.0.0.1:{port}/mcp"
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*(client_loop(url, stop_at, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+
+def percentile(values: list, q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def run(workers: int, port: int, clients: int, duration: float) -> None:
+    server = subprocess.Popen(
+        [sys.executable, str(SERVER), "--transport", "http", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_ready(port))
+        latencies, errors = asyncio.run(drive(port, clients, duration))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    print(f"  {workers:>2} workers  {len(latencies) / duration:8.1f} req/s  "
+          f"p50 {percentile(latencies, 50) * 1e3:7.1f} ms  p95 {percentile(latencies, 95) * 1e3:7.1f} ms  "
+          f"p99 {percentile(latencies, 99) * 1e3:7.1f} ms  errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.duration:.0f}s, search_package_deals (cpu count {os.cpu_count()})")
+    for index, workers in enumerate(args.workers):
+        run(workers, args.port + index, args.clients, args.duration)
+
+
+if __name__ == "__main__":
+    main()
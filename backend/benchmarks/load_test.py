@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Load test
+Drives the MCP tools with a weighted mix of calls against local stub providers
+
+Modes:
+  inprocess  calls the server's tools/call handler directly in this process;
+             reports event-loop lag and RSS of the serving process
+  stdio      spawns server.py and speaks MCP over stdio like a desktop client;
+             reports the server process's RSS
+
+Closed loop by default (--concurrency callers back to back); --rate switches
+to open-loop Poisson arrivals, timed from the scheduled start so queueing
+shows up in the latencies. --routes controls how many distinct searches
+exist and so the cache hit ratio. --json saves the results, and --baseline
+compares against a saved run, exiting 1 if p95 latency or throughput
+regressed by more than --tolerance.
+
+Usage: python benchmarks/load_test.py [--mode inprocess|stdio]
+       [--mix flights=4,hotels=3,packages=2,compare=1]
+       [--concurrency 16 | --rate 50] [--duration 20] [--routes 50]
+       [--latency-ms 80] [--tail-ratio 0.02 --tail-ms 1200] [--error-ratio 0]
+       [--json results.json] [--baseline results.json --tolerance 0.15]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+STUB = Path(__file__).resolve().parent / "stub_providers.py"
+
+TOOLS = {
+    "flights": "search_flight_deals",
+    "hotels": "search_hotel_deals",
+    "packages": "search_package_deals",
+    "compare": "compare_deals",
+}
+
+CITIES = ["JFK", "LHR", "CDG", "NRT", "BCN", "SFO", "FCO", "DXB", "SIN", "SYD"]
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in TOOLS:
+            raise SystemExit(f"unknown tool in --mix: {name} (choose from {', '.join(TOOLS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Seeded generator of tool calls over a fixed set of routes"""
+
+    def __init__(self, mix: dict, routes: int, seed: int):
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        start = date(2026, 3, 1)
+        self.routes = []
+        for i in range(routes):
+            origin, destination = self.rng.sample(CITIES, 2)
+            departure = start + timedelta(days=i % 90)
+            self.routes.append((origin, destination, departure, departure + timedelta(days=self.rng.randint(2, 10))))
+
+    def next_call(self) -> tuple:
+        kind = self.rng.choices(self.names, self.weights)[0]
+        origin, destination, departure, back = self.rng.choice(self.routes)
+        if kind == "flights":
+            args = {"origin": origin, "destination": destination, "departure_date": departure.isoformat(), "return_date": back.isoformat()}
+        elif kind == "hotels":
+            args = {"destination": destination, "checkin_date": departure.isoformat(), "checkout_date": back.isoformat()}
+        elif kind == "packages":
+            args = {"origin": origin, "destination": destination, "departure_date": departure.isoformat(), "return_date": back.isoformat()}
+        else:
+            args = {"deal_type": self.rng.choice(["flights", "hotels"]), "criteria": self.rng.choice(["price", "rating", "value", "savings"])}
+        return kind, args
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+def rss_mb(pid: str = "self") -> dict:
+    """Current and peak resident memory of a process (Linux /proc)"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    name, value = line.split(":")
+                    fields[name] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return {"rss_mb": fields.get("VmRSS"), "peak_rss_mb": fields.get("VmHWM")}
+
+
+def child_pid(marker: str):
+    """PID of this process's child whose command line contains marker"""
+    for children in Path("/proc/self/task").glob("*/children"):
+        for pid in children.read_text().split():
+            try:
+                if marker in Path(f"/proc/{pid}/cmdline").read_bytes().decode(errors="replace"):
+                    return pid
+            except OSError:
+                continue
+    return None
+
+
+def start_stub(args) -> tuple:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    stub = subprocess.Popen([
+        sys.executable, str(STUB), "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--tail-ratio", str(args.tail_ratio),
+        "--tail-ms", str(args.tail_ms), "--error-ratio", str(args.error_ratio),
+    ], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return stub, port
+        except OSError:
+            time.sleep(0.05)
+    stub.kill()
+    raise RuntimeError("stub providers did not start")
+
+
+def server_env(port: int, keep_rate_limits: bool) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        "AMADEUS_API_KEY": "bench", "AMADEUS_API_SECRET": "bench", "RAPIDAPI_KEY": "bench", "BOOKING_API_KEY": "bench",
+        "AMADEUS_BASE_URL": base_url, "RAPIDAPI_BASE_URL": base_url, "BOOKING_BASE_URL": base_url,
+    }
+    if not keep_rate_limits:
+        env.update({"AMADEUS_RATE_LIMIT": "0", "RAPIDAPI_RATE_LIMIT": "0", "BOOKING_RATE_LIMIT": "0"})
+    return env
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.loop_lag = []
+        self.dropped = 0  # open-loop arrivals skipped at --max-outstanding
+
+    def add(self, kind: str, seconds: float, error: bool) -> None:
+        self.latencies.setdefault(kind, []).append(seconds)
+        if error:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def monitor_loop_lag(recorder: Recorder, stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Sample how late the event loop wakes a sleeping task"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        recorder.loop_lag.append(max(time.perf_counter() - started - interval, 0.0))
+
+
+async def drive(call, workload: Workload, recorder: Recorder, args) -> float:
+    """Issue calls until the duration is up; returns the measured wall time"""
+
+    async def one(kind: str, tool_args: dict, scheduled: float) -> None:
+        try:
+            error = await call(TOOLS[kind], tool_args)
+        except Exception:
+            error = True
+        recorder.add(kind, time.perf_counter() - scheduled, error)
+
+    started = time.perf_counter()
+    stop_at = started + args.duration
+    if args.rate:
+        # Open loop: arrivals do not wait for earlier calls to finish
+        tasks = set()
+        scheduled = started
+        while True:
+            scheduled += random.expovariate(args.rate)
+            if scheduled >= stop_at:
+                break
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+            if len(tasks) < args.max_outstanding:
+                task = asyncio.create_task(one(*workload.next_call(), scheduled))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            else:
+                recorder.dropped += 1
+        if tasks:
+            await asyncio.wait(tasks)
+    else:
+        async def caller():
+            while time.perf_counter() < stop_at:
+                await one(*workload.next_call(), time.perf_counter())
+        await asyncio.gather(*(caller() for _ in range(args.concurrency)))
+    return time.perf_counter() - started
+
+
+async def run_inprocess(args, env: dict) -> dict:
+    os.environ.update(env)
+    sys.path.insert(0, str(BACKEND))
+    import logging
+    logging.disable(logging.WARNING)
+    from mcp import types
+    from server import TravelDealsServer
+
+    travel = TravelDealsServer()
+    await travel.server.request_handlers[types.ListToolsRequest](types.ListToolsRequest(method="tools/list"))
+    handler = travel.server.request_handlers[types.CallToolRequest]
+
+    async def call(name: str, tool_args: dict) -> bool:
+        result = await handler(types.CallToolRequest(
+            method="tools/call", params=types.CallToolRequestParams(name=name, arguments=tool_args)
+        ))
+        content = result.root.content
+        return bool(result.root.isError) or (bool(content) and content[0].text.startswith("Error"))
+
+    recorder = Recorder()
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(recorder, stop))
+    elapsed = await drive(call, Workload(args.mix, args.routes, args.seed), recorder, args)
+    stop.set()
+    await lag_task
+    memory = rss_mb()
+    await travel.aclose()
+    return summarize(recorder, elapsed, memory)
+
+
+async def run_stdio(args, env: dict) -> dict:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(BACKEND / "server.py")],
+        env={**os.environ, **env},
+        cwd=str(BACKEND),
+    )
+    recorder = Recorder()
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                await session.list_tools()
+
+                async def call(name: str, tool_args: dict) -> bool:
+                    result = await session.call_tool(name, tool_args)
+                    return bool(result.isError) or (bool(result.content) and result.content[0].text.startswith("Error"))
+
+                elapsed = await drive(call, Workload(args.mix, args.routes, args.seed), recorder, args)
+                pid = child_pid("server.py")
+                memory = rss_mb(pid) if pid else {}
+    return summarize(recorder, elapsed, memory)
+
+
+def summarize(recorder: Recorder, elapsed: float, memory: dict) -> dict:
+    tools = {}
+    everything = []
+    for kind, values in sorted(recorder.latencies.items()):
+        values.sort()
+        everything.extend(values)
+        tools[kind] = {
+            "calls": len(values),
+            "errors": recorder.errors.get(kind, 0),
+            "throughput": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    everything.sort()
+    lag = sorted(recorder.loop_lag)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "throughput": round(len(everything) / elapsed, 2),
+        "p50_ms": round(percentile(everything, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(everything, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(everything, 0.99) * 1000, 2),
+        "errors": sum(recorder.errors.values()),
+        "dropped": recorder.dropped,
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 0.50) * 1000, 2),
+            "p99": round(percentile(lag, 0.99) * 1000, 2),
+            "max": round(lag[-1] * 1000, 2),
+        } if lag else None,
+        **memory,
+        "tools": tools,
+    }
+
+
+def report(result: dict) -> None:
+    print(f"\n{'tool':<10} {'calls':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for kind, row in result["tools"].items():
+        print(f"{kind:<10} {row['calls']:>7} {row['errors']:>5} {row['throughput']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    print(f"{'all':<10} {sum(r['calls'] for r in result['tools'].values()):>7} {result['errors']:>5} "
+          f"{result['throughput']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    if result["dropped"]:
+        print(f"dropped {result['dropped']} arrivals at --max-outstanding")
+    if result.get("loop_lag_ms"):
+        lag = result["loop_lag_ms"]
+        print(f"\nevent-loop lag  p50 {lag['p50']:.2f} ms  p99 {lag['p99']:.2f} ms  max {lag['max']:.2f} ms")
+    if result.get("rss_mb") is not None:
+        print(f"server RSS      {result['rss_mb']} MB (peak {result['peak_rss_mb']} MB)")
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list:
+    """p95 and throughput regressions per tool (throughput only between closed-loop runs)"""
+    found = []
+    closed_loop = not result["config"].get("rate") and not baseline.get("config", {}).get("rate")
+    for kind, row in result["tools"].items():
+        base = baseline.get("tools", {}).get(kind)
+        if not base:
+            continue
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(f"{kind}: p95 {row['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if closed_loop and base["throughput"] and row["throughput"] < base["throughput"] * (1 - tolerance):
+            found.append(f"{kind}: {row['throughput']:.1f} req/s vs baseline {base['throughput']:.1f} req/s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "stdio"], default="inprocess")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("flights=4,hotels=3,packages=2,compare=1"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=None, help="open-loop calls per second")
+    parser.add_argument("--max-outstanding", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--routes", type=int, default=50, help="distinct routes (fewer = more cache hits)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--tail-ratio", type=float, default=0.02)
+    parser.add_argument("--tail-ms", type=float, default=1200.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--keep-rate-limits", action="store_true", help="keep the per-provider quotas (off by default)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    stub, port = start_stub(args)
+    try:
+        env = server_env(port, args.keep_rate_limits)
+        load = f"{args.rate:g} calls/s open loop" if args.rate else f"{args.concurrency} concurrent callers"
+        print(f"{args.mode}: {load} for {args.duration:g}s, mix {args.mix}, {args.routes} routes, "
+              f"stub latency {args.latency_ms:g} ms (+{args.tail_ms:g} ms for {args.tail_ratio:.0%})")
+        runner = run_inprocess if args.mode == "inprocess" else run_stdio
+        result = asyncio.run(runner(args, env))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    result["config"] = {name: value for name, value in vars(args).items() if name not in ("json", "baseline")}
+    report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("config", {}).get("mode") != args.mode:
+            print(f"\nwarning: baseline was recorded in {baseline.get('config', {}).get('mode')} mode")
+        found = regressions(result, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Fault-injecting provider stub
+Local stand-in for the Amadeus, RapidAPI and Booking.com endpoints
+
+Answers the three providers' search routes with canned deals, and injects
+latency, slow-tail responses, errors, hangs and 429s on request. It also
+issues Amadeus access tokens (flight offers answer 401 to any other token)
+and resolves the cities of data/locations.tsv to RapidAPI and Booking.com
+destination ids. Point the server at it with e.g.
+
+    AMADEUS_API_KEY=x AMADEUS_API_SECRET=y AMADEUS_BASE_URL=http://127.0.0.1:18001 python server.py
+
+Faults can be changed while it runs by POSTing JSON to /_faults, e.g.
+{"error_ratio": 1.0} to take the provider down and {"error_ratio": 0} to
+bring it back. GET /_faults returns the current settings and counters.
+
+Usage: python benchmarks/stub_providers.py [--port 18001] [--latency-ms 50]
+       [--tail-ratio 0.05 --tail-ms 1500] [--error-ratio 0.1 --error-status 503]
+       [--hang-ratio 0.01] [--rate-limit 10]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+DEALS_PER_RESPONSE = 20
+TOKEN_TTL = 1799  # seconds, as Amadeus issues them
+CITIES_PER_PAGE = 10
+
+LOCATIONS_FILE = Path(__file__).resolve().parent.parent / "data" / "locations.tsv"
+
+
+def load_cities() -> dict:
+    """Destination id -> (city, lower-case country code) for every bundled city"""
+    cities = {}
+    for line in LOCATIONS_FILE.read_text(encoding="utf-8").splitlines():
+        if line and not line.startswith("#"):
+            city, country = line.split("\t")[1:3]
+            cities[zlib.crc32(city.encode()) % 10_000_000] = (city, country.lower())
+    return cities
+
+
+CITIES = load_cities()
+
+
+def rapidapi_locations(query: dict) -> list:
+    name = query.get("name", [""])[0].casefold()
+    return [
+        {"dest_id": str(-city_id), "dest_type": "city", "name": city, "label": f"{city}, {country.upper()}"}
+        for city_id, (city, country) in CITIES.items()
+        if city.casefold() == name
+    ]
+
+
+def booking_cities(body: dict) -> dict:
+    countries = set(body.get("countries") or ())
+    matches = [
+        {"id": city_id, "name": {"en-gb": city}, "country": country}
+        for city_id, (city, country) in sorted(CITIES.items())
+        if not countries or country in countries
+    ]
+    offset = int(body.get("page") or 0)
+    more = offset + CITIES_PER_PAGE < len(matches)
+    return {"data": matches[offset:offset + CITIES_PER_PAGE], **({"next_page": str(offset + CITIES_PER_PAGE)} if more else {})}
+
+
+def city_name(city_id) -> str:
+    return CITIES.get(abs(int(city_id)), ("City",))[0]
+
+
+def flight_offers(query: dict) -> dict:
+    base = random.uniform(250, 600)
+    return {"data": [
+        {
+            "id": str(i),
+            "price": {"grandTotal": f"{base + i * 17.5:.2f}"},
+            "validatingAirlineCodes": [random.choice(["AF", "BA", "DL", "LH", "UA"])],
+        }
+        for i in range(DEALS_PER_RESPONSE)
+    ]}
+
+
+def rapidapi_hotels(query: dict) -> dict:
+    destination = city_name(query.get("dest_id", ["0"])[0])
+    return {"result": [
+        {
+            "hotel_name": f"Stub Hotel {destination} #{i}",
+            "min_total_price": round(random.uniform(300, 1200), 2),
+            "price_breakdown": {"strikethrough_amount": round(random.uniform(1200, 1600), 2)},
+            "review_score": round(random.uniform(6, 10), 1),
+            "url": f"https://stub.example/rapidapi/{destination}/{i}",
+            "max_photo_url": "",
+        }
+        for i in range(DEALS_PER_RESPONSE)
+    ]}
+
+
+def booking_accommodations(body: dict) -> dict:
+    city = city_name(body.get("city", 0))
+    return {"data": [
+        {
+            "id": i,
+            "name": f"Stub Stay {city} #{i}",
+            "price": {"book": round(random.uniform(300, 1200), 2), "total": round(random.uniform(1200, 1600), 2)},
+            "review_score": round(random.uniform(6, 10), 1),
+            "url": f"https://stub.example/booking/{city}/{i}",
+            "photo_url": "",
+        }
+        for i in range(DEALS_PER_RESPONSE)
+    ]}
+
+
+class Faults:
+    """Current fault settings and request counters, shared by handler threads"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.counters = {"requests": 0, "errors": 0, "slow": 0, "hung": 0, "rate_limited": 0, "tokens": 0, "lookups": 0}
+        self.tokens = set()
+        self.lock = threading.Lock()
+        self._window = (0, 0)  # (second, requests in it)
+
+    def issue_token(self) -> str:
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.counters["tokens"] += 1
+            self.tokens.add(token)
+        return token
+
+    def lookup(self) -> None:
+        with self.lock:
+            self.counters["lookups"] += 1
+
+    def authorized(self, header: str) -> bool:
+        with self.lock:
+            return header.removeprefix("Bearer ") in self.tokens
+
+    def decide(self) -> tuple:
+        """(delay seconds, status) for the next request"""
+        with self.lock:
+            s = self.settings
+            self.counters["requests"] += 1
+            if s["rate_limit"] > 0:
+                second = int(time.time())
+                count = self._window[1] + 1 if self._window[0] == second else 1
+                self._window = (second, count)
+                if count > s["rate_limit"]:
+                    self.counters["rate_limited"] += 1
+                    return 0.0, 429
+            if random.random() < s["hang_ratio"]:
+                self.counters["hung"] += 1
+                return 30.0, 200
+            delay = max(random.gauss(s["latency_ms"], s["latency_ms"] * 0.1), 0) / 1000
+            if random.random() < s["tail_ratio"]:
+                self.counters["slow"] += 1
+                delay += s["tail_ms"] / 1000
+            if random.random() < s["error_ratio"]:
+                self.counters["errors"] += 1
+                return delay, s["error_status"]
+            return delay, 200
+
+
+def make_handler(faults: Faults):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: dict, headers: dict = None) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            try:
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (timeout, hedge cancelled)
+
+        def _serve(self, build) -> None:
+            delay, status = faults.decide()
+            time.sleep(delay)
+            if status == 429:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            elif status != 200:
+                self._send(status, {"error": "injected fault"})
+            else:
+                self._send(200, build())
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/_faults":
+                with faults.lock:
+                    self._send(200, {**faults.settings, **faults.counters})
+            elif url.path == "/v2/shopping/flight-offers":
+                if faults.authorized(self.headers.get("Authorization", "")):
+                    self._serve(lambda: flight_offers(query))
+                else:
+                    self._send(401, {"errors": [{"code": 38191, "title": "Invalid access token"}]})
+            elif url.path == "/v1/hotels/locations":
+                faults.lookup()
+                self._send(200, rapidapi_locations(query))
+            elif url.path == "/v1/hotels/search":
+                self._serve(lambda: rapidapi_hotels(query))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if self.path == "/v1/security/oauth2/token":
+                form = parse_qs(raw.decode())
+                if form.get("grant_type") == ["client_credentials"] and form.get("client_id"):
+                    self._send(200, {"type": "amadeusOAuth2Token", "access_token": faults.issue_token(), "expires_in": TOKEN_TTL, "token_type": "Bearer"})
+                else:
+                    self._send(401, {"error": "invalid_client"})
+                return
+            body = json.loads(raw or b"{}")
+            if self.path == "/_faults":
+                with faults.lock:
+                    faults.settings.update({key: type(faults.settings[key])(value) for key, value in body.items() if key in faults.settings})
+                    self._send(200, faults.settings)
+            elif self.path == "/3.1/common/locations/cities":
+                faults.lookup()
+                self._send(200, booking_cities(body))
+            elif self.path == "/3.1/accommodations/search":
+                self._serve(lambda: booking_accommodations(body))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int, **settings) -> ThreadingHTTPServer:
+    """Start a stub on 127.0.0.1:port in a background thread"""
+    defaults = {
+        "latency_ms": 50.0, "tail_ratio": 0.0, "tail_ms": 1500.0, "error_ratio": 0.0,
+        "error_status": 503, "hang_ratio": 0.0, "rate_limit": 0,
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(Faults(**{**defaults, **settings})))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tail-ratio", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=1500.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-ratio", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per second before 429s (0 = unlimited)")
+    args = parser.parse_args()
+
+    settings = {name: value for name, value in vars(args).items() if name != "port"}
+    server = serve(args.port, **settings)
+    print(f"Stub providers on http://127.0.0.1:{args.port} {settings}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+TravelDeals search-result cache
+Bounded TTL + LRU cache with stale-while-revalidate for the search tools
+"""
+
+import asyncio
+import logging
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from locations import canonical_args
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Budgets are rounded up to this many dollars before they become part of a key
+BUDGET_BUCKET = float(os.getenv("CACHE_BUDGET_BUCKET", "50"))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "600"))
+
+DEFAULT_TTLS = {
+    "search_flight_deals": float(os.getenv("CACHE_TTL_FLIGHTS", "300")),
+    "search_hotel_deals": float(os.getenv("CACHE_TTL_HOTELS", "900")),
+}
+
+_CITY_FIELDS = ("origin", "destination")
+_COUNT_FIELDS = ("guests", "flexible_days")
+_DATE_FIELDS = ("departure_date", "return_date", "checkin_date", "checkout_date")
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y", "%m/%d/%Y", "%Y%m%d")
+
+
+def normalize_city(value: str) -> str:
+    """Collapse whitespace in a city/airport string and upper-case IATA codes"""
+    text = " ".join(str(value).split())
+    return text.upper() if len(text) == 3 and text.isalpha() else text
+
+
+def normalize_date(value: str) -> str:
+    """Canonicalize a date string to YYYY-MM-DD (unknown formats pass through)"""
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return text
+
+
+def bucket_budget(value: Any) -> Optional[float]:
+    """Round a budget up to the next bucket boundary"""
+    if value in (None, ""):
+        return None
+    return math.ceil(float(value) / BUDGET_BUCKET) * BUDGET_BUCKET
+
+
+def normalize_search_args(tool: str, args: dict, fields: Optional[Iterable[str]] = None) -> Tuple[Hashable, dict]:
+    """Build the cache key and the canonical arguments for a search.
+
+    Only fields (the properties the tool's input schema declares) are kept,
+    so extra properties a client sends neither split the key nor reach
+    providers. Places are first resolved to their canonical form (so "JFK",
+    "NYC" and "New York" share one key and one upstream query); unknown
+    places are case-folded in the key only, so the upstream query keeps a
+    usable spelling. The canonical arguments carry the bucketed budget, so
+    the upstream query is the same for every caller sharing the key; callers
+    apply their exact budget to the results afterwards.
+    """
+    if fields is not None:
+        args = {name: args[name] for name in fields if name in args}
+    query = canonical_args(tool, args)
+    for name in _CITY_FIELDS:
+        if query.get(name):
+            query[name] = normalize_city(query[name])
+    for name in _DATE_FIELDS:
+        if query.get(name):
+            query[name] = normalize_date(query[name])
+    if "budget_max" in query:
+        query["budget_max"] = bucket_budget(query["budget_max"])
+    for name in _COUNT_FIELDS:
+        if query.get(name) is not None:
+            query[name] = int(query[name])
+    if "whole_month" in query:
+        query["whole_month"] = bool(query["whole_month"])
+    query = {name: value for name, value in query.items() if value not in (None, "")}
+    key = tuple(sorted(
+        (name, value.casefold() if name in _CITY_FIELDS else value)
+        for name, value in query.items()
+    ))
+    return (tool, key), query
+
+
+def approx_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough deep size of an object in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approx_size(item, _seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), _seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += approx_size(getattr(obj, slot), _seen)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class SearchCache:
+    """In-process TTL + LRU cache with stale-while-revalidate.
+
+    Entries are fresh for their tool's TTL and may then be served stale for
+    another stale_ttl seconds while a single background refresh runs.
+    Eviction is least-recently-used, bounded by entry count and total size.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300.0,
+        stale_ttl: float = CACHE_STALE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, tool: str) -> float:
+        return self.ttls.get(tool, self.default_ttl)
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": round((lookups - self.counters["misses"]) / lookups, 4) if lookups else 0.0,
+        }
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Look up a key; returns (value, state) with state fresh/stale/miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        now = self.clock()
+        if now >= entry.stale_until:
+            self._remove(key)
+            self.counters["expirations"] += 1
+            return None, "miss"
+        self._entries.move_to_end(key)
+        return entry.value, "fresh" if now < entry.fresh_until else "stale"
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        now = self.clock()
+        self._entries[key] = CacheEntry(value, size, now + ttl, now + ttl + self.stale_ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        ttl_of: Optional[Callable[[Any], float]] = None,
+    ) -> Tuple[Any, str]:
+        """Return (value, state), loading on a miss.
+
+        A stale value is returned immediately and refreshed in the background.
+        ttl_of may shorten the TTL for a given value (e.g. partial results).
+        """
+        value, state = self.get(key)
+        if state == "fresh":
+            self.counters["hits"] += 1
+            return value, state
+        if state == "stale":
+            self.counters["stale_hits"] += 1
+            self._schedule_refresh(key, loader, ttl, ttl_of)
+            return value, state
+
+        self.counters["misses"] += 1
+        value = await loader()
+        self.put(key, value, ttl_of(value) if ttl_of else ttl)
+        return value, state
+
+    def _schedule_refresh(self, key, loader, ttl, ttl_of) -> None:
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                value = await loader()
+                self.put(key, value, ttl_of(value) if ttl_of else ttl)
+                self.counters["refreshes"] += 1
+            except Exception as e:
+                self.counters["refresh_errors"] += 1
+                logger.warning(f"Background cache refresh failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
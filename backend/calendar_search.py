@@ -0,0 +1,55 @@
+"""
+TravelDeals flexible-date search
+Builds the departure/return date grid for calendar flight searches
+"""
+
+import calendar
+import os
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+# Widest +/- window a flexible-date search accepts (days)
+FLEXIBLE_DAYS_MAX = 7
+
+# Upper bound on upstream searches one calendar request may trigger
+CALENDAR_MAX_CELLS = int(os.getenv("CALENDAR_MAX_CELLS", "100"))
+
+# Concurrent cell searches that may hit providers at once (across requests)
+CALENDAR_CONCURRENCY = int(os.getenv("CALENDAR_CONCURRENCY", "8"))
+
+Cell = Tuple[str, Optional[str]]  # (departure_date, return_date)
+
+
+def calendar_cells(
+    departure_date: str,
+    return_date: Optional[str] = None,
+    flexible_days: int = 0,
+    whole_month: bool = False,
+) -> Tuple[List[str], List[Optional[str]], List[Cell]]:
+    """Departure dates, return dates and the (departure, return) cells to search.
+
+    whole_month searches every departure day in departure_date's month and
+    keeps the trip length fixed. Otherwise departures (and returns, for a
+    round trip) vary by +/- flexible_days, skipping returns before departure.
+    """
+    if not 0 <= flexible_days <= FLEXIBLE_DAYS_MAX:
+        raise ValueError(f"flexible_days must be between 0 and {FLEXIBLE_DAYS_MAX}")
+    departure = date.fromisoformat(departure_date)
+    back = date.fromisoformat(return_date) if return_date else None
+
+    if whole_month:
+        days = calendar.monthrange(departure.year, departure.month)[1]
+        departures = [departure.replace(day=day) for day in range(1, days + 1)]
+        trip = back - departure if back else None
+        cells = [(d.isoformat(), (d + trip).isoformat() if trip is not None else None) for d in departures]
+        returns = sorted({cell[1] for cell in cells}) if trip is not None else [None]
+        return [d.isoformat() for d in departures], returns, cells
+
+    offsets = range(-flexible_days, flexible_days + 1)
+    departures = [departure + timedelta(days=offset) for offset in offsets]
+    if back is None:
+        return [d.isoformat() for d in departures], [None], [(d.isoformat(), None) for d in departures]
+
+    returns = [back + timedelta(days=offset) for offset in offsets]
+    cells = [(d.isoformat(), r.isoformat()) for d in departures for r in returns if r >= d]
+    return [d.isoformat() for d in departures], [r.isoformat() for r in returns], cells
@@ -0,0 +1,60 @@
+"""
+TravelDeals request coalescing
+Identical in-flight calls share one execution (single-flight)
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one execution per key at a time.
+
+    Callers arriving while a call for the same key is in flight await the
+    same task and receive its result or its exception. A caller that is
+    cancelled only stops waiting; the shared execution is cancelled once the
+    last waiter has gone.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.counters = {"executions": 0, "coalesced": 0, "abandoned": 0}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {**self.counters, "in_flight": len(self._calls)}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Everyone waiting was cancelled; stop the upstream work too
+                self._forget(key, call)
+                call.task.cancel()
+                self.counters["abandoned"] += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,310 @@
+"""
+TravelDeals in-memory deal index
+Partitioned deal store sorted by price and by savings, with budget, destination and date lookups
+"""
+
+import heapq
+import os
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cache import DEFAULT_TTLS
+from models import TravelDeal, deal_key
+
+# How long a deal stays in the index after it was last seen (seconds). By
+# default as long as the search cache keeps the result it came from, so the
+# index never outlives the fan-out that found a deal; DEAL_TTL sets one
+# value for every type
+_FLIGHT_TTL = DEFAULT_TTLS["search_flight_deals"]
+_HOTEL_TTL = DEFAULT_TTLS["search_hotel_deals"]
+DEAL_TTLS = {
+    deal_type: float(os.getenv("DEAL_TTL") or ttl)
+    for deal_type, ttl in (("flight", _FLIGHT_TTL), ("hotel", _HOTEL_TTL), ("package", min(_FLIGHT_TTL, _HOTEL_TTL)))
+}
+
+RouteKey = Tuple[str, str, str]  # (deal_type, destination, origin)
+PartitionKey = Tuple[str, str, str, Optional[int]]  # route + start date ordinal
+
+# Orders a query can rank by: entry -> sort key, smallest first
+ORDERS: Dict[str, Callable[["_Entry"], Tuple[float, int]]] = {
+    "price": lambda entry: (entry.price, entry.seq),
+    "savings": lambda entry: (-entry.savings, entry.seq),
+}
+
+
+class _Entry:
+    __slots__ = ("deal", "key", "price", "savings", "seq", "start", "end", "expires_at")
+
+    def __init__(self, deal: TravelDeal, key: tuple, seq: int, expires_at: float):
+        self.deal = deal
+        self.key = key
+        self.price = deal.price
+        self.savings = deal.savings
+        self.seq = seq
+        self.start, self.end = deal.date_range
+        self.expires_at = expires_at
+
+
+class _Partition:
+    """Deals of one route and start date, kept sorted in every order of ORDERS"""
+
+    __slots__ = ("sort_keys", "entries", "by_key")
+
+    def __init__(self):
+        self.sort_keys: Dict[str, List[Tuple[float, int]]] = {order: [] for order in ORDERS}
+        self.entries: Dict[str, List[_Entry]] = {order: [] for order in ORDERS}
+        self.by_key: Dict[tuple, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def insert(self, entry: _Entry) -> None:
+        for order, sort_key in ORDERS.items():
+            position = bisect_right(self.sort_keys[order], sort_key(entry))
+            self.sort_keys[order].insert(position, sort_key(entry))
+            self.entries[order].insert(position, entry)
+        self.by_key[entry.key] = entry
+
+    def remove(self, entry: _Entry) -> None:
+        for order, sort_key in ORDERS.items():
+            position = bisect_left(self.sort_keys[order], sort_key(entry))
+            del self.sort_keys[order][position]
+            del self.entries[order][position]
+        del self.by_key[entry.key]
+
+    def under(self, budget_max: Optional[float]) -> int:
+        """Number of entries priced at or below budget_max"""
+        if budget_max is None:
+            return len(self.by_key)
+        return bisect_right(self.sort_keys["price"], (budget_max, float("inf")))
+
+
+class _Route:
+    """Partitions of one (deal_type, destination, origin) by start date"""
+
+    __slots__ = ("partitions", "starts", "start_of")
+
+    def __init__(self):
+        self.partitions: Dict[Optional[int], _Partition] = {}
+        self.starts: List[int] = []  # sorted dated partitions, for range bisects
+        self.start_of: Dict[tuple, Optional[int]] = {}  # deal key -> its partition
+
+    def drop(self, start: Optional[int], entry: _Entry) -> None:
+        """Remove entry from its partition, and the partition once empty"""
+        partition = self.partitions[start]
+        partition.remove(entry)
+        del self.start_of[entry.key]
+        if not partition:
+            del self.partitions[start]
+            if start is not None:
+                del self.starts[bisect_left(self.starts, start)]
+
+    def between(self, date_from: Optional[int], date_to: Optional[int]) -> List[_Partition]:
+        """Partitions starting in [date_from, date_to]; undated ones only when unbounded"""
+        if date_from is None and date_to is None:
+            return list(self.partitions.values())
+        low = 0 if date_from is None else bisect_left(self.starts, date_from)
+        high = len(self.starts) if date_to is None else bisect_right(self.starts, date_to)
+        return [self.partitions[start] for start in self.starts[low:high]]
+
+
+def _place(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def _route_key(deal: TravelDeal) -> RouteKey:
+    return (deal.deal_type, _place(deal.destination), _place(deal.origin))
+
+
+class DealIndex:
+    """Indexed store of deals seen by the search tools.
+
+    Deals are grouped by route (deal_type, destination, origin) and start
+    date, so date filters pick partitions with a bisect. Each partition is
+    kept sorted both by price and by savings: a budget cut is a bisect, and
+    the first k matches in either order are read off the front. Deals are
+    identified by deal_key, so one listing on several dates is several
+    deals. Inserting a deal that is already present refreshes its expiry
+    (and re-sorts it if it changed); stale deals are dropped after their
+    type's TTL without being seen again.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = DEAL_TTLS, clock: Callable[[], float] = time.monotonic):
+        self.ttls = ttls
+        self.default_ttl = min(ttls.values())
+        self.clock = clock
+        self._routes: Dict[RouteKey, _Route] = {}
+        self._by_type: Dict[str, set] = {}
+        self._expiry: List[Tuple[float, int, PartitionKey, tuple]] = []
+        self._versions: Dict[str, int] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return sum(len(partition) for route in self._routes.values() for partition in route.partitions.values())
+
+    def version(self, deal_type: str) -> int:
+        """Counter bumped whenever the deals of a type change"""
+        return self._versions.get(deal_type, 0)
+
+    def add(self, deal: TravelDeal) -> None:
+        now = self.clock()
+        rkey = _route_key(deal)
+        key = deal_key(deal)
+        expires_at = now + self.ttls.get(deal.deal_type, self.default_ttl)
+        route = self._routes.get(rkey)
+        if route is None:
+            route = self._routes[rkey] = _Route()
+            self._by_type.setdefault(deal.deal_type, set()).add(rkey)
+
+        start = deal.date_range[0]
+        if key in route.start_of:
+            # Same deal seen again: refresh it, or re-sort it if it changed
+            previous = route.start_of[key]
+            current = route.partitions[previous].by_key[key]
+            if current.deal == deal:
+                current.expires_at = expires_at
+                return
+            route.drop(previous, current)
+
+        partition = route.partitions.get(start)
+        if partition is None:
+            partition = route.partitions[start] = _Partition()
+            if start is not None:
+                insort(route.starts, start)
+
+        self._seq += 1
+        entry = _Entry(deal, key, self._seq, expires_at)
+        partition.insert(entry)
+        route.start_of[key] = start
+        heapq.heappush(self._expiry, (entry.expires_at, entry.seq, (*rkey, start), key))
+        self._bump(deal.deal_type)
+
+    def add_many(self, deals: Iterable[TravelDeal]) -> None:
+        """Insert deals as provider responses arrive, then drop expired ones"""
+        for deal in deals:
+            self.add(deal)
+        self.expire()
+
+    def expire(self) -> int:
+        """Remove deals not seen for their TTL; returns how many"""
+        now = self.clock()
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, seq, pkey, key = heapq.heappop(self._expiry)
+            rkey, start = pkey[:3], pkey[3]
+            route = self._routes.get(rkey)
+            partition = route.partitions.get(start) if route else None
+            entry = partition.by_key.get(key) if partition else None
+            if entry is None or entry.seq != seq:
+                continue  # replaced since this expiry was scheduled
+            if entry.expires_at > now:
+                # Seen again since; reschedule at the refreshed time
+                heapq.heappush(self._expiry, (entry.expires_at, seq, pkey, key))
+                continue
+            route.drop(start, entry)
+            removed += 1
+            self._bump(rkey[0])
+            if not route.partitions:
+                del self._routes[rkey]
+                self._by_type[rkey[0]].discard(rkey)
+        return removed
+
+    def query(
+        self,
+        deal_type: str,
+        destination: Optional[str] = None,
+        origin: Optional[str] = None,
+        budget_max: Optional[float] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: Optional[int] = None,
+        order_by: str = "price",
+    ) -> List[TravelDeal]:
+        """Live deals matching the filters, cheapest (or biggest savings) first.
+
+        date_from/date_to bound the start date (as ordinals) and end, when
+        given, must match the end date exactly. Start dates select
+        partitions; within one, the budget cut is a bisect in price order and
+        the scan stops after limit matches. Several partitions are merged
+        lazily in the requested order.
+        """
+        now = self.clock()
+        sort_key = ORDERS[order_by]
+        streams = [
+            self._scan(partition, order_by, budget_max)
+            for partition in self._matching(deal_type, destination, origin, date_from, date_to)
+        ]
+        if not streams:
+            return []
+        merged = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=sort_key)
+
+        results = []
+        for entry in merged:
+            if entry.expires_at <= now:
+                continue
+            if end is not None and entry.end != end:
+                continue
+            results.append(entry.deal)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def totals(
+        self,
+        deal_type: str,
+        destination: Optional[str] = None,
+        origin: Optional[str] = None,
+        budget_max: Optional[float] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Tuple[int, float]:
+        """(number of matching live deals, their total savings), filtered like query"""
+        now = self.clock()
+        count, savings = 0, 0.0
+        for partition in self._matching(deal_type, destination, origin, date_from, date_to):
+            for entry in self._scan(partition, "price", budget_max):
+                if entry.expires_at > now and (end is None or entry.end == end):
+                    count += 1
+                    savings += entry.savings
+        return count, savings
+
+    def deals(self, deal_type: str) -> List[TravelDeal]:
+        """All live deals of a type"""
+        return self.query(deal_type)
+
+    def _matching(
+        self,
+        deal_type: str,
+        destination: Optional[str],
+        origin: Optional[str],
+        date_from: Optional[int],
+        date_to: Optional[int],
+    ) -> List[_Partition]:
+        if destination is not None and origin is not None:
+            route = self._routes.get((deal_type, _place(destination), _place(origin)))
+            routes = [route] if route else []
+        else:
+            routes = [
+                self._routes[rkey]
+                for rkey in self._by_type.get(deal_type, ())
+                if (destination is None or rkey[1] == _place(destination))
+                and (origin is None or rkey[2] == _place(origin))
+            ]
+        return [partition for route in routes for partition in route.between(date_from, date_to)]
+
+    @staticmethod
+    def _scan(partition: _Partition, order_by: str, budget_max: Optional[float]) -> Iterator[_Entry]:
+        if order_by == "price":
+            entries = partition.entries["price"]
+            for position in range(partition.under(budget_max)):
+                yield entries[position]
+            return
+        for entry in partition.entries[order_by]:
+            if budget_max is None or entry.price <= budget_max:
+                yield entry
+
+    def _bump(self, deal_type: str) -> None:
+        self._versions[deal_type] = self._versions.get(deal_type, 0) + 1
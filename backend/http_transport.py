@@ -0,0 +1,163 @@
+"""
+TravelDeals HTTP transport
+Serves many MCP client sessions from one process over Streamable HTTP and SSE
+"""
+
+import json
+import logging
+import os
+import socket
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import uvicorn
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Concurrent MCP sessions, and HTTP requests being processed before shedding load
+HTTP_MAX_SESSIONS = int(os.getenv("HTTP_MAX_SESSIONS", "10000"))
+HTTP_MAX_INFLIGHT = int(os.getenv("HTTP_MAX_INFLIGHT", "512"))
+HTTP_SESSION_IDLE_TIMEOUT = float(os.getenv("HTTP_SESSION_IDLE_TIMEOUT", "1800"))
+
+
+class BackpressureMiddleware:
+    """Rejects MCP message POSTs with 503 once too many are in flight.
+
+    Long-lived GET streams (SSE) are not counted. Clients are told to retry
+    via Retry-After instead of piling more work onto a saturated loop.
+    """
+
+    def __init__(self, app, max_inflight: int = HTTP_MAX_INFLIGHT):
+        self.app = app
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        if self.inflight >= self.max_inflight:
+            self.rejected += 1
+            body = json.dumps({"error": "server busy, retry shortly"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", b"1"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
+
+
+class _ASGIEndpoint:
+    """Starlette routes treat non-function endpoints as raw ASGI apps"""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def __call__(self, scope, receive, send):
+        await self.handler(scope, receive, send)
+
+
+def build_app(travel_server, stateless: bool = False) -> BackpressureMiddleware:
+    """ASGI app exposing one TravelDealsServer to many clients.
+
+    /mcp   Streamable HTTP (current MCP transport)
+    /sse   legacy HTTP+SSE stream, with client messages POSTed to /messages/
+    /health liveness and load summary
+    /metrics Prometheus text exposition of this process's metrics
+
+    Stateless mode keeps no per-session state between requests, so any
+    worker process can answer any request. The SSE transport needs its
+    stream and its POSTs on the same process and is left out.
+    """
+    mcp_server = travel_server.server
+    if stateless:
+        manager = StreamableHTTPSessionManager(app=mcp_server, stateless=True)
+    else:
+        manager = StreamableHTTPSessionManager(
+            app=mcp_server,
+            max_sessions=HTTP_MAX_SESSIONS,
+            session_idle_timeout=HTTP_SESSION_IDLE_TIMEOUT,
+        )
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request: Request) -> Response:
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await mcp_server.run(read_stream, write_stream, travel_server.initialization_options())
+        return Response()
+
+    async def metrics(request: Request) -> Response:
+        return Response(travel_server.metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({
+            "status": "ok",
+            "pid": os.getpid(),
+            "inflight_requests": app.inflight,
+            "rejected_requests": app.rejected,
+            "sessions": travel_server.session_limiter.stats(),
+            "providers": {provider.name: provider.limiter.stats() for provider in travel_server.providers},
+        })
+
+    @asynccontextmanager
+    async def lifespan(_):
+        async with manager.run():
+            travel_server.deal_alerts.start(default=True)
+            logger.info("TravelDeals MCP HTTP transport started")
+            yield
+        await travel_server.aclose()
+
+    routes = [
+        Route("/mcp", endpoint=_ASGIEndpoint(manager.handle_request)),
+        Route("/health", endpoint=health),
+        Route("/metrics", endpoint=metrics),
+    ]
+    if not stateless:
+        routes += [
+            Route("/sse", endpoint=handle_sse),
+            Mount("/messages/", app=sse.handle_post_message),
+        ]
+    starlette_app = Starlette(routes=routes, lifespan=lifespan)
+    app = BackpressureMiddleware(starlette_app)
+    return app
+
+
+async def run_http(
+    travel_server,
+    host: str,
+    port: int,
+    sockets: Optional[List[socket.socket]] = None,
+    stateless: bool = False,
+    limit_max_requests: Optional[int] = None,
+) -> None:
+    """Serve until interrupted, or until limit_max_requests have been handled.
+
+    Pre-forked workers pass the listening socket inherited from the
+    supervisor instead of binding host/port themselves.
+    """
+    config = uvicorn.Config(
+        build_app(travel_server, stateless=stateless),
+        host=host,
+        port=port,
+        log_level="info",
+        limit_max_requests=limit_max_requests,
+    )
+    await uvicorn.Server(config).serve(sockets=sockets)
@@ -0,0 +1,223 @@
+"""
+TravelDeals location resolution
+Maps free-form city, airport and alias strings to one canonical place
+"""
+
+import difflib
+import os
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Bundled tables of cities (with their IATA codes, airports and aliases)
+# and of the country names a place may be qualified with
+LOCATIONS_FILE = os.getenv(
+    "LOCATIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "locations.tsv")
+)
+COUNTRIES_FILE = os.getenv(
+    "COUNTRIES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "countries.tsv")
+)
+
+# Distinct strings whose resolution is memoized
+LOCATION_CACHE_SIZE = int(os.getenv("LOCATION_CACHE_SIZE", "4096"))
+
+# Shortest input completed from a unique prefix, and the similarity a
+# misspelling needs to be matched (difflib ratio)
+MIN_PREFIX = 4
+FUZZY_CUTOFF = 0.85
+
+# Form each tool's place arguments are canonicalized to: "code" is the
+# IATA city code flight APIs take, "city" the name hotel APIs search by
+PLACE_FORMS = {
+    "search_flight_deals": {"origin": "code", "destination": "code"},
+    "search_hotel_deals": {"destination": "city"},
+    "search_package_deals": {"origin": "code", "destination": "city"},
+    "get_destination_insights": {"destination": "city"},
+}
+
+
+class Location(NamedTuple):
+    code: str  # IATA city (metro) code, e.g. NYC for JFK/LGA/EWR
+    city: str
+    country: str
+
+
+def fold(text: str) -> str:
+    """Lookup key: accents stripped, case-folded, punctuation dropped, spaces collapsed"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = "".join(ch if ch.isalnum() else " " for ch in text.casefold())
+    return " ".join(text.split())
+
+
+def _qualifier_key(text: str) -> str:
+    """fold() without spaces, so "D.C." and "DC" compare equal"""
+    return fold(text).replace(" ", "")
+
+
+# Trie marker for a prefix shared by names of different locations
+_SHARED = object()
+
+
+class _TrieNode:
+    __slots__ = ("children", "location")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # The one location every name below this node belongs to, or _SHARED
+        self.location = None
+
+
+class _Names:
+    """Exact, unique-prefix and fuzzy matching over one set of names"""
+
+    def __init__(self):
+        self.by_key: Dict[str, Location] = {}
+        self.root = _TrieNode()
+        self.names: List[str] = []
+
+    def add(self, name: str, location: Location) -> None:
+        key = fold(name)
+        if not key:
+            return
+        self.by_key.setdefault(key, location)
+        if len(key) > 3:
+            self.names.append(key)
+            node = self.root
+            for ch in key:
+                node = node.children.setdefault(ch, _TrieNode())
+                if node.location is None:
+                    node.location = location
+                elif node.location != location:
+                    node.location = _SHARED
+
+    def complete(self, prefix: str) -> Optional[Location]:
+        """The location whose names are the only ones starting with prefix"""
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node.location if node.location is not _SHARED else None
+
+    def match(self, key: str) -> Optional[Location]:
+        location = self.by_key.get(key)
+        if location is not None or len(key) < MIN_PREFIX:
+            return location
+        location = self.complete(key)
+        if location is not None:
+            return location
+        matches = difflib.get_close_matches(key, self.names, n=1, cutoff=FUZZY_CUTOFF)
+        return self.by_key[matches[0]] if matches else None
+
+
+class LocationIndex:
+    """Exact, unique-prefix and fuzzy lookup over codes, names and aliases.
+
+    Every form matches IATA city codes, city names and local spellings.
+    Airport codes and airport or area names ("Newark", "Baltimore", "Bali")
+    only match for the "code" form: a flight there uses that metro's
+    airports, but a hotel search for Baltimore must not become Washington.
+    A longer input that is a prefix of only one location's names ("san
+    fran") is completed through a trie, and misspellings ("barcelonna")
+    fall back to a fuzzy match. Qualifiers ("Paris, France", "Portland
+    (OR)") must name the location's country or region, otherwise the place
+    is unknown ("Paris, Texas" is not Paris, France).
+    """
+
+    def __init__(self, locations: Dict[Location, Tuple[List[str], List[str]]], qualifiers: Dict[Location, Set[str]]):
+        self.forms = {"city": _Names(), "code": _Names()}
+        for location, (names, area_names) in locations.items():
+            for name in names:
+                self.forms["city"].add(name, location)
+                self.forms["code"].add(name, location)
+            for name in area_names:
+                self.forms["code"].add(name, location)
+        self.qualifiers = {location: {_qualifier_key(name) for name in names} for location, names in qualifiers.items()}
+
+    @classmethod
+    def load(cls, path: str = LOCATIONS_FILE, countries_path: str = COUNTRIES_FILE) -> "LocationIndex":
+        """Parse the tab-separated tables (see the header line of each)"""
+        country_names: Dict[str, List[str]] = {}
+        for country, names in _rows(countries_path, 2):
+            country_names[country] = [country, *names.split("|")]
+        locations: Dict[Location, Tuple[List[str], List[str]]] = {}
+        qualifiers: Dict[Location, Set[str]] = {}
+        for code, city, country, region, airports, area_names, aliases in _rows(path, 7):
+            location = Location(code, city, country)
+            locations[location] = (
+                [code, city, *filter(None, aliases.split("|"))],
+                [*airports.split(), *filter(None, area_names.split("|"))],
+            )
+            qualifiers[location] = {*country_names.get(country, [country]), *filter(None, region.split("|"))}
+        return cls(locations, qualifiers)
+
+    def lookup(self, text: str, form: str = "code") -> Optional[Location]:
+        names = self.forms[form]
+        key = fold(text)
+        if not key:
+            return None
+        location = names.by_key.get(key)
+        if location is not None:
+            return location
+        # "Paris, France" / "London (UK)": match the head, then require
+        # every qualifier to name that location's country or region
+        head, *rest = text.replace("(", ",").replace(")", ",").split(",")
+        qualifiers = [_qualifier_key(part) for part in rest if fold(part)]
+        if not qualifiers:
+            return names.match(key)
+        location = names.match(fold(head))
+        if location is None or not all(q in self.qualifiers.get(location, ()) for q in qualifiers):
+            return None
+        return location
+
+
+def _rows(path: str, columns: int):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            yield (line.rstrip("\n").split("\t") + [""] * columns)[:columns]
+
+
+@lru_cache(maxsize=1)
+def location_index() -> LocationIndex:
+    """The bundled index, loaded on first use"""
+    return LocationIndex.load()
+
+
+@lru_cache(maxsize=LOCATION_CACHE_SIZE)
+def resolve(text: str, form: str = "code") -> Optional[Location]:
+    """Canonical location for a free-form place string, or None if unknown"""
+    return location_index().lookup(text, form)
+
+
+def canonical_place(text: str, form: str) -> str:
+    """text as an IATA city code ("code") or city name ("city"); unchanged if unknown"""
+    location = resolve(text, form)
+    if location is None:
+        return text
+    return location.code if form == "code" else location.city
+
+
+def canonical_args(tool: str, args: dict) -> dict:
+    """Copy of a tool's arguments with its place fields canonicalized"""
+    forms = PLACE_FORMS.get(tool)
+    if not forms:
+        return args
+    resolved = dict(args)
+    for name, form in forms.items():
+        value = resolved.get(name)
+        if isinstance(value, str) and value:
+            resolved[name] = canonical_place(value, form)
+    return resolved
+
+
+def location_stats() -> dict:
+    info = resolve.cache_info()
+    return {
+        "loaded": location_index.cache_info().currsize > 0,
+        "memo_hits": info.hits,
+        "memo_misses": info.misses,
+        "memo_size": info.currsize,
+    }
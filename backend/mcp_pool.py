@@ -0,0 +1,299 @@
+"""
+Apify agent MCP client pool
+Keeps several initialized sessions with the Apify actors MCP server warm so a.py's prompts can share them
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+logger = logging.getLogger("mcp-pool")
+
+# Server processes kept running, and requests each may serve at once
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_SESSION_CONCURRENCY = int(os.getenv("MCP_SESSION_CONCURRENCY", "4"))
+
+# Spawning can include an npx download, so allow it a while
+MCP_INIT_TIMEOUT = float(os.getenv("MCP_INIT_TIMEOUT", "120"))
+
+# Idle sessions are pinged this often; one that does not answer within
+# MCP_PING_TIMEOUT is replaced
+MCP_HEALTH_INTERVAL = float(os.getenv("MCP_HEALTH_INTERVAL", "30"))
+MCP_PING_TIMEOUT = float(os.getenv("MCP_PING_TIMEOUT", "10"))
+
+# Errors meaning the session's server is gone rather than the request failed
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+
+# Respawn backoff after consecutive failures (seconds)
+RESPAWN_BACKOFF_BASE = 1.0
+RESPAWN_BACKOFF_MAX = 30.0
+
+
+class PooledSession:
+    """One server process and its initialized ClientSession.
+
+    The stdio transport and session are entered and exited by a single
+    owning task (anyio requires it), which parks until the slot is stopped
+    or the server goes away. The tool list is fetched once at startup;
+    cache holds per-session objects callers build from it (e.g. an agent).
+    """
+
+    def __init__(self, index: int, server_params: StdioServerParameters):
+        self.index = index
+        self.server_params = server_params
+        self.session: Optional[ClientSession] = None
+        self.tools: List[Any] = []
+        self.cache: Dict[str, Any] = {}
+        self.load = 0
+        self.healthy = False
+        self.started_at = 0.0
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, timeout: float = MCP_INIT_TIMEOUT) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._serve(ready, self._stop))
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except BaseException:
+            await self.stop()
+            raise
+        self.healthy = True
+        self.started_at = time.monotonic()
+
+    async def _serve(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    tools = await session.list_tools()
+                    self.session, self.tools, self.cache = session, tools.tools, {}
+                    ready.set_result(None)
+                    await stop.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e if isinstance(e, Exception) else RuntimeError("MCP session cancelled"))
+            raise
+        finally:
+            self.healthy = False
+            self.session = None
+
+    @property
+    def alive(self) -> bool:
+        return self.healthy and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout: float = MCP_PING_TIMEOUT) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        self.healthy = False
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except BaseException:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+class SessionPool:
+    """Warm MCP client sessions shared by concurrent callers.
+
+    acquire() hands out the least-loaded healthy session, waiting while
+    every session already serves MCP_SESSION_CONCURRENCY callers. A
+    background check pings idle sessions, and sessions whose server died,
+    stopped answering or failed a caller are respawned with backoff.
+    """
+
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        size: int = MCP_POOL_SIZE,
+        per_session: int = MCP_SESSION_CONCURRENCY,
+        health_interval: float = MCP_HEALTH_INTERVAL,
+    ):
+        self.slots = [PooledSession(index, server_params) for index in range(max(size, 1))]
+        self.per_session = max(per_session, 1)
+        self.health_interval = health_interval
+        self._available = asyncio.Condition()
+        self._respawning: Dict[int, asyncio.Task] = {}
+        self._checking: Dict[int, asyncio.Task] = {}
+        self._failures: Dict[int, int] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.counters = {"acquired": 0, "waited": 0, "respawned": 0, "ping_failures": 0, "spawn_failures": 0}
+
+    async def __aenter__(self) -> "SessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Spawn every session concurrently; fails only if none comes up"""
+        results = await asyncio.gather(*(slot.start() for slot in self.slots), return_exceptions=True)
+        failed = [(slot, result) for slot, result in zip(self.slots, results) if isinstance(result, BaseException)]
+        if len(failed) == len(self.slots):
+            raise RuntimeError(f"No MCP session could be started: {failed[0][1]!r}")
+        for slot in self.slots:
+            if slot.alive:
+                self._watch(slot)
+        for slot, error in failed:
+            logger.warning(f"MCP session {slot.index} failed to start: {error!r}")
+            self._respawn(slot)
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        self._closing = True
+        tasks = [
+            task for task in (self._health_task, *self._respawning.values(), *self._checking.values()) if task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        async with self._available:
+            self._available.notify_all()
+        await asyncio.gather(*(slot.stop() for slot in self.slots), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "sessions": len(self.slots),
+            "healthy": sum(1 for slot in self.slots if slot.alive),
+            "in_use": sum(slot.load for slot in self.slots),
+        }
+
+    @property
+    def tools(self) -> List[Any]:
+        """Tool list of the server (the same for every session)"""
+        for slot in self.slots:
+            if slot.alive:
+                return slot.tools
+        return []
+
+    def _pick(self) -> Optional[PooledSession]:
+        candidates = [slot for slot in self.slots if slot.alive and slot.load < self.per_session]
+        return min(candidates, key=lambda slot: slot.load) if candidates else None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledSession]:
+        """Borrow a warm session; it is checked (and replaced if dead) when the caller fails"""
+        async with self._available:
+            slot = self._pick()
+            if slot is None:
+                self.counters["waited"] += 1
+                while slot is None:
+                    if self._closing:
+                        raise RuntimeError("MCP session pool is closed")
+                    await self._available.wait()
+                    slot = self._pick()
+            slot.load += 1
+            self.counters["acquired"] += 1
+        try:
+            yield slot
+        except CONNECTION_ERRORS:
+            # Out of rotation at once, so queued callers skip it
+            self._respawn(slot)
+            raise
+        except Exception:
+            if not self._closing and slot.index not in self._checking:
+                self._checking[slot.index] = asyncio.create_task(self._check(slot))
+            raise
+        finally:
+            async with self._available:
+                slot.load -= 1
+                # Wake a respawn waiting for the slot to drain as well as queued callers
+                self._available.notify_all()
+
+    def _watch(self, slot: PooledSession) -> None:
+        """Respawn the slot as soon as its server exits on its own"""
+        stop = slot._stop
+
+        def exited(task: asyncio.Task) -> None:
+            if not stop.is_set():
+                logger.warning(f"MCP session {slot.index} exited; respawning")
+                self._respawn(slot)
+
+        slot._task.add_done_callback(exited)
+
+    async def run(self, fn: Callable[[PooledSession], Awaitable[Any]], retries: int = 1) -> Any:
+        """await fn(session) on a pooled session, retrying on another one if its server died"""
+        for attempt in range(retries + 1):
+            try:
+                async with self.acquire() as slot:
+                    return await fn(slot)
+            except CONNECTION_ERRORS:
+                if attempt == retries:
+                    raise
+
+    async def _check(self, slot: PooledSession) -> None:
+        try:
+            if slot.index in self._respawning:
+                return
+            if not await slot.ping():
+                self.counters["ping_failures"] += 1
+                self._respawn(slot)
+        finally:
+            self._checking.pop(slot.index, None)
+
+    def _respawn(self, slot: PooledSession) -> None:
+        if self._closing or slot.index in self._respawning:
+            return
+        slot.healthy = False
+        self._respawning[slot.index] = asyncio.create_task(self._restart(slot))
+
+    async def _restart(self, slot: PooledSession) -> None:
+        try:
+            while not self._closing:
+                failures = self._failures.get(slot.index, 0)
+                if failures:
+                    await asyncio.sleep(min(RESPAWN_BACKOFF_BASE * 2 ** (failures - 1), RESPAWN_BACKOFF_MAX))
+                # Let callers still using the old session finish first
+                async with self._available:
+                    await self._available.wait_for(lambda: slot.load == 0 or self._closing)
+                await slot.stop()
+                try:
+                    await slot.start()
+                except Exception as e:
+                    self._failures[slot.index] = failures + 1
+                    self.counters["spawn_failures"] += 1
+                    logger.warning(f"MCP session {slot.index} respawn failed: {e!r}")
+                    continue
+                self._failures.pop(slot.index, None)
+                self._watch(slot)
+                self.counters["respawned"] += 1
+                logger.info(f"MCP session {slot.index} respawned")
+                async with self._available:
+                    self._available.notify_all()
+                return
+        finally:
+            self._respawning.pop(slot.index, None)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for slot in self.slots:
+                if slot.index in self._respawning:
+                    continue
+                if not slot.alive:
+                    self._respawn(slot)
+                elif slot.load == 0 and not await slot.ping():
+                    self.counters["ping_failures"] += 1
+                    self._respawn(slot)
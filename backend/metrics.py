@@ -0,0 +1,202 @@
+"""
+TravelDeals metrics
+Low-overhead counters and latency histograms for the tool hot path
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Set METRICS_ENABLED=0 to turn recording into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ENCODE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if seen + bucket >= rank and bucket:
+                low = self.bounds[index - 1] if index else 0.0
+                high = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return low + (high - low) * (rank - seen) / bucket
+            seen += bucket
+        return self.bounds[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+        }
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs for Prometheus exposition"""
+        total = 0
+        buckets = []
+        for bound, bucket in zip(list(self.bounds) + [float("inf")], self.counts):
+            total += bucket
+            buckets.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return buckets
+
+
+class Metrics:
+    """Per-tool and per-provider latency, in-flight counts, errors and encode time.
+
+    Hot-path calls check one flag and return when disabled. Component
+    counters that already exist (cache, coalescing, limiters) are pulled by
+    collectors only when a snapshot is taken, so they add no per-call cost.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.started = time.time()
+        self.tool_latency: Dict[str, Histogram] = {}
+        self.tool_errors: Dict[str, int] = {}
+        self.tool_inflight: Dict[str, int] = {}
+        self.provider_latency: Dict[str, Histogram] = {}
+        self.provider_calls: Dict[Tuple[str, str], int] = {}
+        self.encode_latency = Histogram(ENCODE_BUCKETS)
+        self.encoded_bytes = 0
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def add_collector(self, name: str, collect: Callable[[], dict]) -> None:
+        self._collectors[name] = collect
+
+    # Hot path
+
+    def tool_started(self, tool: str) -> float:
+        if not self.enabled:
+            return 0.0
+        self.tool_inflight[tool] = self.tool_inflight.get(tool, 0) + 1
+        return time.perf_counter()
+
+    def tool_finished(self, tool: str, started: float, error: bool = False) -> None:
+        if not self.enabled:
+            return
+        self.tool_inflight[tool] -= 1
+        histogram = self.tool_latency.get(tool)
+        if histogram is None:
+            histogram = self.tool_latency[tool] = Histogram()
+        histogram.observe(time.perf_counter() - started)
+        if error:
+            self.tool_errors[tool] = self.tool_errors.get(tool, 0) + 1
+
+    def provider_result(self, provider: str, status: str, latency_ms: float) -> None:
+        if not self.enabled:
+            return
+        histogram = self.provider_latency.get(provider)
+        if histogram is None:
+            histogram = self.provider_latency[provider] = Histogram()
+        histogram.observe(latency_ms / 1000)
+        key = (provider, status)
+        self.provider_calls[key] = self.provider_calls.get(key, 0) + 1
+
+    def encoded(self, seconds: float, size: int) -> None:
+        self.encode_latency.observe(seconds)
+        self.encoded_bytes += size
+
+    # Reporting
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view of everything, for travel://metrics"""
+        tools = {}
+        for tool in sorted(set(self.tool_latency) | set(self.tool_inflight)):
+            histogram = self.tool_latency.get(tool) or Histogram()
+            tools[tool] = {
+                **histogram.summary(),
+                "errors": self.tool_errors.get(tool, 0),
+                "inflight": self.tool_inflight.get(tool, 0),
+            }
+        providers = {}
+        for provider, histogram in sorted(self.provider_latency.items()):
+            providers[provider] = {
+                **histogram.summary(),
+                "status": {status: count for (name, status), count in self.provider_calls.items() if name == provider},
+            }
+        return {
+            "enabled": self.enabled,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "tools": tools,
+            "providers": providers,
+            "serialization": {**self.encode_latency.summary(), "bytes": self.encoded_bytes},
+            **{name: collect() for name, collect in self._collectors.items()},
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: Dict[str, Histogram], label: Optional[str]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for value, hist in sorted(series.items()):
+                labels = f'{label}="{value}",' if label else ""
+                for le, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{{labels}le="{le}"}} {count}')
+                suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {hist.sum}")
+                lines.append(f"{name}_count{suffix} {hist.count}")
+
+        def simple(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        histogram("travel_tool_duration_seconds", "Tool call latency", self.tool_latency, "tool")
+        simple("travel_tool_errors_total", "counter", "Tool calls that returned an error",
+               [(f'{{tool="{tool}"}}', count) for tool, count in sorted(self.tool_errors.items())])
+        simple("travel_tool_inflight", "gauge", "Tool calls in progress",
+               [(f'{{tool="{tool}"}}', count) for tool, count in sorted(self.tool_inflight.items())])
+        histogram("travel_provider_duration_seconds", "Provider call latency", self.provider_latency, "provider")
+        simple("travel_provider_calls_total", "counter", "Provider calls by outcome",
+               [(f'{{provider="{provider}",status="{status}"}}', count)
+                for (provider, status), count in sorted(self.provider_calls.items())])
+        histogram("travel_serialization_seconds", "Response encoding time", {"": self.encode_latency}, None)
+        simple("travel_serialization_bytes_total", "counter", "Encoded response bytes", [("", self.encoded_bytes)])
+
+        # Component counters, flattened: travel_<collector>_<field>
+        for collector, collect in self._collectors.items():
+            for key, value in _numeric_fields(collect()):
+                name = f"travel_{collector}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _numeric_fields(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        name = f"{prefix}{key}".replace("-", "_").replace(".", "_")
+        if isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+        elif isinstance(value, dict):
+            yield from _numeric_fields(value, f"{name}_")
@@ -0,0 +1,122 @@
+"""
+TravelDeals data models
+Shared by the MCP server and the provider adapters
+"""
+
+import sys
+from datetime import date
+from typing import Optional, Tuple
+
+
+def parse_dates(dates: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse "YYYY-MM-DD" or "YYYY-MM-DD - YYYY-MM-DD" into date ordinals.
+
+    A single date yields the same start and end; unparsable text yields
+    (None, None).
+    """
+    start, _, end = dates.partition(" - ")
+    try:
+        start_ordinal = date.fromisoformat(start.strip()).toordinal()
+        end_ordinal = date.fromisoformat(end.strip()).toordinal() if end else start_ordinal
+    except ValueError:
+        return None, None
+    return start_ordinal, end_ordinal
+
+
+def format_dates(start: int, end: Optional[int]) -> str:
+    """Inverse of parse_dates for a start ordinal and optional end ordinal"""
+    if end is None:
+        return date.fromordinal(start).isoformat()
+    return f"{date.fromordinal(start).isoformat()} - {date.fromordinal(end).isoformat()}"
+
+
+class TravelDeal:
+    """Travel deal data structure.
+
+    Slotted to avoid a per-instance __dict__. Low-cardinality strings
+    (provider, destination, origin, deal_type) are interned so every deal
+    shares one copy, and dates are kept as date ordinals with the dates
+    string rebuilt on access. Text that is not an ISO date (range) is kept
+    verbatim.
+    """
+
+    __slots__ = (
+        "title", "price", "original_price", "savings", "destination",
+        "provider", "rating", "url", "image_url", "deal_type", "origin",
+        "start", "end", "raw_dates",
+    )
+
+    def __init__(
+        self,
+        title: str,
+        price: float,
+        original_price: float,
+        savings: float,
+        destination: str,
+        dates: str,
+        provider: str,
+        rating: float,
+        url: str,
+        image_url: str,
+        deal_type: str,  # "flight", "hotel", "package"
+        origin: str = "",  # flights and packages only
+    ):
+        self.title = title
+        self.price = price
+        self.original_price = original_price
+        self.savings = savings
+        self.destination = sys.intern(destination)
+        self.provider = sys.intern(provider)
+        self.rating = rating
+        self.url = url
+        self.image_url = image_url
+        self.deal_type = sys.intern(deal_type)
+        self.origin = sys.intern(origin)
+
+        start, end = parse_dates(dates)
+        self.start = start
+        self.end = end if start is not None and " - " in dates else None
+        self.raw_dates = dates if start is None else None
+
+    @property
+    def dates(self) -> str:
+        if self.raw_dates is not None:
+            return self.raw_dates
+        return format_dates(self.start, self.end)
+
+    @property
+    def date_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """(start, end) date ordinals; a single date has end == start"""
+        return self.start, self.start if self.end is None else self.end
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TravelDeal):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"TravelDeal(title={self.title!r}, price={self.price!r}, "
+            f"original_price={self.original_price!r}, savings={self.savings!r}, "
+            f"destination={self.destination!r}, dates={self.dates!r}, "
+            f"provider={self.provider!r}, rating={self.rating!r}, url={self.url!r}, "
+            f"image_url={self.image_url!r}, deal_type={self.deal_type!r}, origin={self.origin!r})"
+        )
+
+
+def deal_key(deal: TravelDeal) -> tuple:
+    """Identity of a deal across providers and repeated searches.
+
+    The same listing (URL, or title when there is none) is a different
+    deal for other dates or from another provider: offer URLs and demo
+    links are shared across dates.
+    """
+    dates = (deal.start, deal.end, deal.raw_dates)
+    if deal.url and deal.deal_type != "package":
+        return (deal.deal_type, deal.url, deal.provider, *dates)
+    return (deal.deal_type, " ".join(deal.title.casefold().split()), deal.provider, *dates)
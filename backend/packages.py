@@ -0,0 +1,101 @@
+"""
+TravelDeals package builder
+Top-k flight x hotel join under a total budget
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import List, Optional
+
+from models import TravelDeal
+
+
+@dataclass
+class PackageDeal:
+    """A flight combined with a hotel stay"""
+    flight: TravelDeal
+    hotel: TravelDeal
+    nights: int
+
+    @property
+    def price(self) -> float:
+        return self.flight.price + self.hotel.price * self.nights
+
+    @property
+    def original_price(self) -> float:
+        return self.flight.original_price + self.hotel.original_price * self.nights
+
+    @property
+    def savings(self) -> float:
+        return self.flight.savings + self.hotel.savings * self.nights
+
+    def to_travel_deal(self) -> TravelDeal:
+        return TravelDeal(
+            title=f"{self.flight.title} + {self.hotel.title}",
+            price=self.price,
+            original_price=self.original_price,
+            savings=self.savings,
+            destination=self.hotel.destination,
+            dates=self.hotel.dates,
+            provider=f"{self.flight.provider} + {self.hotel.provider}",
+            rating=self.hotel.rating,
+            url=self.hotel.url,
+            image_url=self.hotel.image_url,
+            deal_type="package",
+            origin=self.flight.origin,
+        )
+
+
+def top_k_packages(
+    flights: List[TravelDeal],
+    hotels: List[TravelDeal],
+    nights: int,
+    k: int = 5,
+    budget_max: Optional[float] = None,
+) -> tuple[List[PackageDeal], int]:
+    """Best k flight+hotel combinations by total savings within budget.
+
+    Both sides are sorted by savings so the scan can stop as soon as the
+    remaining pairs cannot beat the current k-th best; a flight never
+    contributes more than k pairs, and flights that cannot fit the budget
+    even with the cheapest hotel are skipped. Ties prefer the cheaper
+    package. Returns the packages and the number of pairs examined.
+    """
+    if k <= 0 or not flights or not hotels:
+        return [], 0
+
+    flights = sorted(flights, key=lambda deal: (-deal.savings, deal.price))
+    hotels = sorted(hotels, key=lambda deal: (-deal.savings, deal.price))
+    best_hotel_savings = hotels[0].savings * nights
+    cheapest_hotel = min(hotel.price for hotel in hotels) * nights
+
+    # Min-heap of the current best k: (savings, -price, flight_idx, hotel_idx)
+    heap: list = []
+    examined = 0
+    for f_idx, flight in enumerate(flights):
+        if len(heap) == k and flight.savings + best_hotel_savings < heap[0][0]:
+            break  # no later flight can reach the k-th best
+        if budget_max is not None and flight.price + cheapest_hotel > budget_max:
+            continue
+
+        fitted = 0
+        for h_idx, hotel in enumerate(hotels):
+            savings = flight.savings + hotel.savings * nights
+            if len(heap) == k and savings < heap[0][0]:
+                break  # hotels are sorted, the rest are worse for this flight
+            examined += 1
+            price = flight.price + hotel.price * nights
+            if budget_max is not None and price > budget_max:
+                continue
+
+            entry = (savings, -price, f_idx, h_idx)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            fitted += 1
+            if fitted == k:
+                break  # the remaining hotels rank below these k
+
+    ranked = sorted(heap, reverse=True)
+    return [PackageDeal(flights[f], hotels[h], nights) for _, _, f, h in ranked], examined
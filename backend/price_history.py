@@ -0,0 +1,422 @@
+"""
+TravelDeals price history
+Append-only on-disk log of every deal fetched, with per-destination monthly rollups
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from locations import canonical_place
+from models import TravelDeal, deal_key
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Database file, in the user's data directory unless set; empty disables the store
+PRICE_HISTORY_PATH = os.getenv("PRICE_HISTORY_PATH", os.path.join(
+    os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "travel-deals-mcp", "price_history.db",
+))
+
+# Buffered observations are written in one batch once PRICE_HISTORY_BATCH
+# have accumulated, or PRICE_HISTORY_FLUSH_INTERVAL seconds after the first
+PRICE_HISTORY_BATCH = int(os.getenv("PRICE_HISTORY_BATCH", "1000"))
+PRICE_HISTORY_FLUSH_INTERVAL = float(os.getenv("PRICE_HISTORY_FLUSH_INTERVAL", "1.0"))
+
+# Observations buffered beyond this while the disk falls behind are dropped
+PRICE_HISTORY_MAX_PENDING = int(os.getenv("PRICE_HISTORY_MAX_PENDING", "100000"))
+
+# Rollups written by other processes are picked up when a read finds the
+# in-memory copy older than this (seconds)
+PRICE_HISTORY_SYNC_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    seen REAL NOT NULL,
+    deal_type TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    deal TEXT NOT NULL,
+    price REAL NOT NULL,
+    original_price REAL NOT NULL,
+    month TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    destination TEXT NOT NULL,
+    deal_type TEXT NOT NULL,
+    month TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    price_sum REAL NOT NULL,
+    price_min REAL NOT NULL,
+    price_max REAL NOT NULL,
+    savings_sum REAL NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (destination, deal_type, month)
+);
+CREATE INDEX IF NOT EXISTS rollups_version ON rollups (version);
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (id, version) VALUES (0, 0);
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (destination, deal_type, month, count, price_sum, price_min, price_max, savings_sum, version)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (destination, deal_type, month) DO UPDATE SET
+    count = count + excluded.count,
+    price_sum = price_sum + excluded.price_sum,
+    price_min = min(price_min, excluded.price_min),
+    price_max = max(price_max, excluded.price_max),
+    savings_sum = savings_sum + excluded.savings_sum,
+    version = excluded.version
+"""
+
+_MONTH_NAMES = {
+    name.casefold(): number
+    for number in range(1, 13)
+    for name in (date(2000, number, 1).strftime("%B"), date(2000, number, 1).strftime("%b"))
+}
+
+RollupKey = Tuple[str, str, str]  # (destination, deal_type, month)
+
+
+def place(value: str) -> str:
+    """Destination key: the canonical city name ("PAR" and "Paris" agree), case-folded"""
+    return " ".join(canonical_place(value, "city").casefold().split())
+
+
+def travel_month(deal: TravelDeal, seen: float) -> str:
+    """YYYY-MM the trip starts in, or the month it was seen if it has no dates"""
+    if deal.start is not None:
+        return date.fromordinal(deal.start).strftime("%Y-%m")
+    return datetime.fromtimestamp(seen).strftime("%Y-%m")
+
+
+def parse_month(value: str, today: Optional[date] = None) -> Optional[str]:
+    """YYYY-MM from "2026-11", "11", "November" or "Nov" (the next such month)"""
+    text = value.strip().casefold()
+    try:
+        return datetime.strptime(text, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        pass
+    number = int(text) if text.isdigit() else _MONTH_NAMES.get(text)
+    if number is None or not 1 <= number <= 12:
+        return None
+    today = today or date.today()
+    year = today.year if number >= today.month else today.year + 1
+    return f"{year}-{number:02d}"
+
+
+class Rollup:
+    """Running count/sum/min/max of prices and savings ratios"""
+
+    __slots__ = ("count", "price_sum", "price_min", "price_max", "savings_sum", "version")
+
+    def __init__(self, count=0, price_sum=0.0, price_min=float("inf"), price_max=0.0, savings_sum=0.0, version=0):
+        self.count = count
+        self.price_sum = price_sum
+        self.price_min = price_min
+        self.price_max = price_max
+        self.savings_sum = savings_sum
+        self.version = version  # store version this total was read at
+
+    def add(self, price: float, savings: float) -> None:
+        self.count += 1
+        self.price_sum += price
+        self.price_min = min(self.price_min, price)
+        self.price_max = max(self.price_max, price)
+        self.savings_sum += savings
+
+    def merge(self, other: "Rollup") -> None:
+        self.count += other.count
+        self.price_sum += other.price_sum
+        self.price_min = min(self.price_min, other.price_min)
+        self.price_max = max(self.price_max, other.price_max)
+        self.savings_sum += other.savings_sum
+
+    def row(self) -> tuple:
+        return (self.count, self.price_sum, self.price_min, self.price_max, self.savings_sum)
+
+    def summary(self) -> dict:
+        return {
+            "observations": self.count,
+            "avg_price": round(self.price_sum / self.count, 2),
+            "min_price": round(self.price_min, 2),
+            "max_price": round(self.price_max, 2),
+            "avg_savings": f"{self.savings_sum / self.count * 100:.0f}%",
+        }
+
+
+class PriceHistory:
+    """Every deal fetched from providers, appended to SQLite, plus rollups.
+
+    record() runs on the event loop and only buffers rows. The database is
+    opened and its rollups loaded on one background thread the first time
+    they are needed; batches are written on the same thread, in a WAL-mode
+    transaction that also upserts the (destination, deal type, travel
+    month) rollups. Reads never touch disk or history: they combine the
+    rollups loaded from disk with those of rows not yet written. Each write
+    bumps a version number stored with the rollup rows it changed, so
+    rollups written by other worker processes are merged in by version
+    instead of reloading the table.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-history")
+        self._db: Optional[sqlite3.Connection] = None
+        self._opening: Optional[asyncio.Task] = None
+
+        # Destination -> (deal_type, month) -> rollup, in three layers:
+        # on disk as of self._version, being written, and buffered
+        self._stored: Dict[str, Dict[Tuple[str, str], Rollup]] = {}
+        self._writing: Dict[RollupKey, Rollup] = {}
+        self._buffered: Dict[RollupKey, Rollup] = {}
+        self._rows: List[tuple] = []
+        self._version = 0
+        self._synced = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self.counters = {"recorded": 0, "written": 0, "batches": 0, "dropped": 0, "errors": 0}
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "buffered": len(self._rows),
+            "destinations": len(self._stored),
+            "version": self._version,
+            "path": self.path,
+        }
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _ready(self) -> None:
+        """Open the database on first use; raises if it cannot be opened"""
+        if self._opening is None:
+            self._opening = asyncio.create_task(self._open())
+        await asyncio.shield(self._opening)
+
+    async def _open(self) -> None:
+        try:
+            self._apply(await self._run(self._connect))
+        except (sqlite3.Error, OSError) as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Price history unavailable at {self.path}: {e}")
+            raise
+        self._synced = time.monotonic()
+
+    # Blocking helpers, only ever called on the executor thread
+
+    def _connect(self) -> Tuple[int, List[tuple]]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        return self._load(0)
+
+    def _load(self, since: int) -> Tuple[int, List[tuple]]:
+        """Current version and the rollup rows changed after version since"""
+        version = self._db.execute("SELECT version FROM meta").fetchone()[0]
+        rows = self._db.execute(
+            "SELECT destination, deal_type, month, count, price_sum, price_min, price_max, savings_sum, version"
+            " FROM rollups WHERE version > ?", (since,)
+        ).fetchall()
+        return version, rows
+
+    def _write(self, rows: List[tuple], rollups: Dict[RollupKey, Rollup], since: int) -> Tuple[int, List[tuple]]:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            version = self._db.execute("SELECT version FROM meta").fetchone()[0] + 1
+            self._db.execute("UPDATE meta SET version = ?", (version,))
+            self._db.executemany(
+                "INSERT INTO observations (seen, deal_type, destination, origin, provider, deal, price, original_price, month)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.executemany(_UPSERT_ROLLUP, [(*key, *rollup.row(), version) for key, rollup in rollups.items()])
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return self._load(since)
+
+    def _apply(self, loaded: Tuple[int, List[tuple]]) -> None:
+        """Replace stored rollups with loaded rows (totals, not deltas) unless ours are newer"""
+        version, rows = loaded
+        for destination, deal_type, month, count, price_sum, price_min, price_max, savings_sum, row_version in rows:
+            slots = self._stored.setdefault(destination, {})
+            current = slots.get((deal_type, month))
+            if current is None or current.version <= row_version:
+                slots[(deal_type, month)] = Rollup(count, price_sum, price_min, price_max, savings_sum, row_version)
+        self._version = max(self._version, version)
+
+    # Writes
+
+    def record(self, deals: Iterable[TravelDeal]) -> None:
+        """Buffer deals fetched from providers; written in the background"""
+        now = self.clock()
+        for deal in deals:
+            if len(self._rows) >= PRICE_HISTORY_MAX_PENDING:
+                self.counters["dropped"] += 1
+                continue
+            destination = place(deal.destination)
+            month = travel_month(deal, now)
+            savings = deal.savings / deal.original_price if deal.original_price > 0 else 0.0
+            self._rows.append((
+                now, deal.deal_type, destination, place(deal.origin), deal.provider,
+                repr(deal_key(deal)), deal.price, deal.original_price, month,
+            ))
+            key = (destination, deal.deal_type, month)
+            rollup = self._buffered.get(key)
+            if rollup is None:
+                rollup = self._buffered[key] = Rollup()
+            rollup.add(deal.price, savings)
+            self.counters["recorded"] += 1
+
+        if len(self._rows) >= PRICE_HISTORY_BATCH:
+            self._schedule_flush(0)
+        elif self._rows:
+            self._schedule_flush(PRICE_HISTORY_FLUSH_INTERVAL)
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._flush_task is not None:
+            return  # the running flush also writes rows recorded meanwhile
+        if delay > 0:
+            if self._flush_timer is None:
+                self._flush_timer = asyncio.get_running_loop().call_later(delay, self._schedule_flush, 0)
+            return
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Write buffered rows; rows recorded meanwhile go in the next batch"""
+        try:
+            while self._rows:
+                rows, self._rows = self._rows, []
+                self._writing, self._buffered = self._buffered, {}
+                try:
+                    await self._ready()
+                    loaded = await self._run(self._write, rows, self._writing, self._version)
+                except (sqlite3.Error, OSError) as e:
+                    self.counters["errors"] += 1
+                    logger.warning(f"Price history write failed, dropping {len(rows)} observations: {e}")
+                else:
+                    self._apply(loaded)
+                    self._synced = time.monotonic()
+                    self.counters["written"] += len(rows)
+                    self.counters["batches"] += 1
+                finally:
+                    self._writing = {}
+        finally:
+            self._flush_task = None
+
+    async def aclose(self) -> None:
+        """Write everything still buffered, then close the database"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._sync_task is not None:
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        if self._db is not None:
+            self._db.close()
+
+    # Reads
+
+    def rollups(self, destination: str) -> Dict[Tuple[str, str], Rollup]:
+        """(deal_type, month) -> rollup for a destination, including unwritten rows"""
+        self._maybe_sync()
+        key = place(destination)
+        combined = {}
+        for layer in (self._writing, self._buffered):
+            for (layer_destination, deal_type, month), rollup in layer.items():
+                if layer_destination == key:
+                    combined.setdefault((deal_type, month), Rollup()).merge(rollup)
+        for slot, rollup in self._stored.get(key, {}).items():
+            combined.setdefault(slot, Rollup()).merge(rollup)
+        return combined
+
+    def _maybe_sync(self) -> None:
+        """Pick up other processes' writes in the background when ours are stale"""
+        if self._sync_task is not None or self._db is None:
+            return
+        if time.monotonic() - self._synced < PRICE_HISTORY_SYNC_INTERVAL:
+            return
+        try:
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync())
+        except RuntimeError:
+            pass  # no event loop; serve what is in memory
+
+    async def _sync(self) -> None:
+        try:
+            self._apply(await self._run(self._load, self._version))
+            self._synced = time.monotonic()
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Price history sync failed: {e}")
+        finally:
+            self._sync_task = None
+
+    async def insights(self, destination: str, month: Optional[str] = None, months: int = 12) -> dict:
+        """Price history summary for a destination, from rollups only"""
+        try:
+            await self._ready()
+        except (sqlite3.Error, OSError):
+            pass  # answer from what this process has recorded
+        by_month: Dict[str, Dict[str, dict]] = {}
+        totals: Dict[str, Rollup] = {}
+        for (deal_type, slot_month), rollup in sorted(self.rollups(destination).items(), key=lambda item: item[0][1]):
+            by_month.setdefault(slot_month, {})[deal_type] = rollup
+            totals.setdefault(deal_type, Rollup()).merge(rollup)
+
+        if not by_month:
+            return {"observations": 0}
+
+        # Cheapest travel months by average price, per deal type
+        cheapest = {
+            deal_type: sorted(
+                (slot for slot, slots in by_month.items() if deal_type in slots),
+                key=lambda slot: by_month[slot][deal_type].price_sum / by_month[slot][deal_type].count,
+            )[:3]
+            for deal_type in totals
+        }
+        summary = {
+            "observations": sum(total.count for total in totals.values()),
+            "by_type": {deal_type: total.summary() for deal_type, total in totals.items()},
+            "cheapest_months": cheapest,
+            "months": {
+                slot: {deal_type: rollup.summary() for deal_type, rollup in slots.items()}
+                for slot, slots in list(by_month.items())[-months:]
+            },
+        }
+        current = datetime.fromtimestamp(self.clock()).strftime("%Y-%m")
+        # Per deal type: flight prices are per trip, hotel prices per night.
+        # Both are travel months: deals departing this month, or in month
+        for key, slot in (("travelling_this_month", current), ("travel_month", month)):
+            if slot is not None:
+                slots = by_month.get(slot, {})
+                summary[key] = {
+                    "month": slot,
+                    "observations": sum(rollup.count for rollup in slots.values()),
+                    "by_type": {deal_type: rollup.summary() for deal_type, rollup in slots.items()},
+                }
+        return summary
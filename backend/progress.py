@@ -0,0 +1,93 @@
+"""
+TravelDeals progress streaming
+Sends MCP progress and best-so-far notifications while providers respond
+"""
+
+import heapq
+import logging
+from typing import Any, List, Optional
+
+from models import TravelDeal
+from providers import ProviderResult
+
+logger = logging.getLogger("travel-deals-mcp")
+
+
+class ProgressReporter:
+    """Streams one tool call's fan-out to the client.
+
+    After each provider finishes the client gets a progress notification
+    (completed providers out of total) and a log notification carrying the
+    best deals seen so far. The final tool response is still the
+    authoritative result. Notifications stop once the reporter is closed, so
+    a background cache refresh that reuses the loader stays silent.
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        progress_token: Any,
+        request_id: Any,
+        tool: str,
+        total: int,
+        budget_max: Optional[float] = None,
+        top_n: int = 5,
+    ):
+        self.session = session
+        self.progress_token = progress_token
+        self.request_id = request_id
+        self.tool = tool
+        self.total = total
+        self.budget_max = budget_max
+        self.top_n = top_n
+        self.completed = 0
+        self.closed = False
+        self._deals: List[TravelDeal] = []
+
+    def close(self) -> None:
+        self.closed = True
+
+    def best_so_far(self) -> List[TravelDeal]:
+        return heapq.nlargest(self.top_n, self._deals, key=lambda deal: deal.savings)
+
+    async def __call__(self, result: ProviderResult) -> None:
+        if self.closed:
+            return
+        self.completed += 1
+        self._deals.extend(
+            deal for deal in result.deals
+            if not self.budget_max or deal.price <= self.budget_max
+        )
+        try:
+            await self.session.send_progress_notification(
+                self.progress_token,
+                self.completed,
+                total=self.total,
+                message=f"{result.provider}: {result.status} ({len(result.deals)} deals)",
+            )
+            await self.session.send_log_message(
+                level="info",
+                data={
+                    "tool": self.tool,
+                    "provider": result.provider,
+                    "status": result.status,
+                    "completed": self.completed,
+                    "total": self.total,
+                    "best_so_far": [
+                        {
+                            "title": deal.title,
+                            "price": deal.price,
+                            "savings": deal.savings,
+                            "provider": deal.provider,
+                            "dates": deal.dates,
+                            "url": deal.url,
+                        }
+                        for deal in self.best_so_far()
+                    ],
+                },
+                logger="travel-deals-mcp",
+                related_request_id=self.request_id,
+            )
+        except Exception as e:
+            # The client may have gone away; the search itself carries on
+            logger.debug(f"Could not send progress for {self.tool}: {e}")
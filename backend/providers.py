@@ -0,0 +1,687 @@
+"""
+TravelDeals provider adapters
+Queries every configured upstream API concurrently and merges the results
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from locations import fold, resolve
+from models import TravelDeal, deal_key
+from ratelimit import ProviderLimiter, Throttled, retry_after_seconds
+from resilience import PROVIDER_RETRIES, CircuitBreaker, CircuitOpen, HedgePolicy, backoff_delay, retryable
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Per-provider deadline and overall budget for one search (seconds)
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", "2.5"))
+SEARCH_BUDGET = float(os.getenv("SEARCH_BUDGET", "3.0"))
+
+DEMO_KEY = "demo_key"
+
+# Shared upstream connection pool. Keep-alive connections are kept up to the
+# pool size so steady traffic does not pay for new TLS handshakes.
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", str(UPSTREAM_MAX_CONNECTIONS)))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "1.0"))
+
+# Amadeus access tokens are renewed this long before they expire (seconds)
+TOKEN_EXPIRY_MARGIN = 60.0
+
+# Destination names whose provider id (or lack of one) is remembered
+DESTINATION_CACHE_SIZE = int(os.getenv("DESTINATION_CACHE_SIZE", "1024"))
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """HTTP client shared by all providers, with explicit pool sizing"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(PROVIDER_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+    )
+
+
+def _nights(checkin: str, checkout: str) -> int:
+    """Number of nights between two YYYY-MM-DD dates (at least 1)"""
+    delta = datetime.strptime(checkout, "%Y-%m-%d") - datetime.strptime(checkin, "%Y-%m-%d")
+    return max(delta.days, 1)
+
+
+def _flight_dates(args: dict) -> str:
+    return_date = args.get("return_date")
+    departure_date = args["departure_date"]
+    return f"{departure_date} - {return_date}" if return_date else departure_date
+
+
+@dataclass
+class ProviderResult:
+    """Outcome of a single provider call"""
+    provider: str
+    status: str  # "ok", "timeout", "error", "throttled", "circuit_open", "budget_exceeded"
+    deals: List[TravelDeal] = field(default_factory=list)
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+    attempts: int = 1
+    hedged: bool = False
+    circuit: str = "closed"
+
+
+@dataclass
+class FanOutResult:
+    """Merged outcome of querying every provider for one search"""
+    deals: List[TravelDeal]
+    providers: List[ProviderResult]
+    partial: bool
+    elapsed_ms: float
+
+    def metadata(self) -> dict:
+        """Provider summary included in tool responses"""
+        return {
+            "partial": self.partial,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "providers": [
+                {
+                    "name": result.provider,
+                    "status": result.status,
+                    "deals": len(result.deals),
+                    "latency_ms": round(result.latency_ms, 1),
+                    "circuit": result.circuit,
+                    **({"attempts": result.attempts} if result.attempts > 1 else {}),
+                    **({"hedged": True} if result.hedged else {}),
+                    **({"error": result.error} if result.error else {}),
+                }
+                for result in self.providers
+            ],
+        }
+
+
+class Provider:
+    """Base class for an upstream deal provider"""
+
+    name = "provider"
+    deal_types: tuple = ()
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = PROVIDER_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limiter = ProviderLimiter.for_provider(self.name)
+        self.breaker = CircuitBreaker()
+        self.hedging = HedgePolicy()
+
+    def supports(self, deal_type: str) -> bool:
+        return deal_type in self.deal_types
+
+    async def search(self, client: httpx.AsyncClient, deal_type: str, args: dict) -> List[TravelDeal]:
+        if deal_type == "flight":
+            return await self.search_flights(client, args)
+        if deal_type == "hotel":
+            return await self.search_hotels(client, args)
+        raise ValueError(f"Unsupported deal type: {deal_type}")
+
+    async def search_flights(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        raise NotImplementedError
+
+    async def search_hotels(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        raise NotImplementedError
+
+
+class AmadeusProvider(Provider):
+    """Amadeus Self-Service flight offers.
+
+    Requests carry an OAuth2 access token from the client_credentials
+    exchange (API key and secret). The token is reused until shortly before
+    it expires, and fetched again when the API answers 401.
+    """
+
+    name = "amadeus"
+    deal_types = ("flight",)
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = PROVIDER_TIMEOUT, api_secret: str = ""):
+        super().__init__(api_key, base_url, timeout)
+        self.api_secret = api_secret
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def access_token(self, client: httpx.AsyncClient, stale: Optional[str] = None) -> str:
+        """Current access token; stale names one the API rejected"""
+        async with self._token_lock:
+            if self._token and self._token != stale and time.monotonic() < self._token_expires_at:
+                return self._token
+            response = await client.post(
+                f"{self.base_url}/v1/security/oauth2/token",
+                data={"grant_type": "client_credentials", "client_id": self.api_key, "client_secret": self.api_secret},
+            )
+            response.raise_for_status()
+            body = response.json()
+            self._token = body["access_token"]
+            self._token_expires_at = time.monotonic() + float(body.get("expires_in", 0)) - TOKEN_EXPIRY_MARGIN
+            return self._token
+
+    async def search_flights(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        params = {
+            "originLocationCode": args["origin"],
+            "destinationLocationCode": args["destination"],
+            "departureDate": args["departure_date"],
+            "adults": 1,
+            "max": 50,
+        }
+        if args.get("return_date"):
+            params["returnDate"] = args["return_date"]
+        if args.get("budget_max"):
+            params["maxPrice"] = int(args["budget_max"])
+
+        url = f"{self.base_url}/v2/shopping/flight-offers"
+        token = await self.access_token(client)
+        response = await client.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        if response.status_code == 401:
+            token = await self.access_token(client, stale=token)
+            response = await client.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        response.raise_for_status()
+
+        deals = []
+        for offer in response.json().get("data", []):
+            price = float(offer["price"]["grandTotal"])
+            carriers = offer.get("validatingAirlineCodes") or ["Amadeus"]
+            deals.append(TravelDeal(
+                title=f"{args['origin']} to {args['destination']} ({carriers[0]})",
+                price=price,
+                original_price=price,  # Amadeus publishes no reference fare
+                savings=0.0,
+                destination=args["destination"],
+                dates=_flight_dates(args),
+                provider="Amadeus",
+                rating=0.0,
+                url=f"{self.base_url}/v2/shopping/flight-offers#{offer.get('id', '')}",
+                image_url="",
+                deal_type="flight",
+                origin=args["origin"],
+            ))
+        return deals
+
+
+class RapidAPIBookingProvider(Provider):
+    """Booking.com hotel search via RapidAPI.
+
+    The search takes a destination id, looked up by name through the
+    locations endpoint and remembered per name.
+    """
+
+    name = "rapidapi"
+    deal_types = ("hotel",)
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = PROVIDER_TIMEOUT):
+        super().__init__(api_key, base_url, timeout)
+        self._destinations: "OrderedDict[str, Optional[Tuple[str, str]]]" = OrderedDict()
+
+    @property
+    def _headers(self) -> dict:
+        return {"X-RapidAPI-Key": self.api_key, "X-RapidAPI-Host": httpx.URL(self.base_url).host}
+
+    async def destination_id(self, client: httpx.AsyncClient, destination: str) -> Optional[Tuple[str, str]]:
+        """(dest_id, dest_type) for a place name, None when the API knows none"""
+        key = fold(destination)
+        if key in self._destinations:
+            self._destinations.move_to_end(key)
+            return self._destinations[key]
+        response = await client.get(
+            f"{self.base_url}/v1/hotels/locations",
+            headers=self._headers,
+            params={"name": destination, "locale": "en-us"},
+        )
+        response.raise_for_status()
+        matches = response.json() or []
+        # Prefer the city itself over hotels, districts or landmarks of that name
+        match = next((m for m in matches if m.get("dest_type") == "city"), matches[0] if matches else None)
+        found = (str(match["dest_id"]), match.get("dest_type", "city")) if match else None
+        self._destinations[key] = found
+        if len(self._destinations) > DESTINATION_CACHE_SIZE:
+            self._destinations.popitem(last=False)
+        return found
+
+    async def search_hotels(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        checkin = args["checkin_date"]
+        checkout = args["checkout_date"]
+        destination = await self.destination_id(client, args["destination"])
+        if destination is None:
+            return []
+        dest_id, dest_type = destination
+        response = await client.get(
+            f"{self.base_url}/v1/hotels/search",
+            headers=self._headers,
+            params={
+                "dest_id": dest_id,
+                "dest_type": dest_type,
+                "checkin_date": checkin,
+                "checkout_date": checkout,
+                "adults_number": args.get("guests", 2),
+                "room_number": 1,
+                "order_by": "price",
+                "filter_by_currency": "USD",
+                "units": "metric",
+                "locale": "en-us",
+            },
+        )
+        response.raise_for_status()
+
+        nights = _nights(checkin, checkout)
+        deals = []
+        for hotel in response.json().get("result", []):
+            price = float(hotel["min_total_price"]) / nights
+            breakdown = hotel.get("price_breakdown") or {}
+            original_price = float(breakdown.get("strikethrough_amount") or 0) / nights or price
+            deals.append(TravelDeal(
+                title=hotel.get("hotel_name", f"Hotel in {args['destination']}"),
+                price=round(price, 2),
+                original_price=round(max(original_price, price), 2),
+                savings=round(max(original_price - price, 0.0), 2),
+                destination=args["destination"],
+                dates=f"{checkin} - {checkout}",
+                provider="Booking.com",
+                rating=round(float(hotel.get("review_score") or 0) / 2, 1),
+                url=hotel.get("url", ""),
+                image_url=hotel.get("max_photo_url", ""),
+                deal_type="hotel",
+            ))
+        return deals
+
+
+class BookingProvider(Provider):
+    """Booking.com Demand API accommodation search.
+
+    The search takes a numeric city id. The Demand API lists cities per
+    country, so the destination's country (from the location index) is
+    fetched once and its city ids kept by name.
+    """
+
+    name = "booking"
+    deal_types = ("hotel",)
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = PROVIDER_TIMEOUT):
+        super().__init__(api_key, base_url, timeout)
+        self._cities: Dict[str, Dict[str, int]] = {}  # country -> folded city name -> id
+
+    @property
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    async def _country_cities(self, client: httpx.AsyncClient, country: str) -> Dict[str, int]:
+        cities: Dict[str, int] = {}
+        page: Optional[str] = None
+        while True:
+            body = {"countries": [country], "languages": ["en-gb"]}
+            if page:
+                body["page"] = page
+            response = await client.post(f"{self.base_url}/3.1/common/locations/cities", headers=self._headers, json=body)
+            response.raise_for_status()
+            payload = response.json()
+            for city in payload.get("data", []):
+                for name in (city.get("name") or {}).values():
+                    cities.setdefault(fold(name), int(city["id"]))
+            page = payload.get("next_page")
+            if not page:
+                return cities
+
+    async def city_id(self, client: httpx.AsyncClient, destination: str) -> Optional[int]:
+        """Demand API city id for a place name, None when it cannot be placed"""
+        location = resolve(destination, "city")
+        if location is None:
+            return None
+        country = location.country.lower()
+        if country not in self._cities:
+            self._cities[country] = await self._country_cities(client, country)
+        cities = self._cities[country]
+        return cities.get(fold(location.city), cities.get(fold(destination)))
+
+    async def search_hotels(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        checkin = args["checkin_date"]
+        checkout = args["checkout_date"]
+        city = await self.city_id(client, args["destination"])
+        if city is None:
+            return []
+        response = await client.post(
+            f"{self.base_url}/3.1/accommodations/search",
+            headers=self._headers,
+            json={
+                "booker": {"country": "us", "platform": "desktop"},
+                "checkin": checkin,
+                "checkout": checkout,
+                "city": city,
+                "guests": {"number_of_adults": args.get("guests", 2), "number_of_rooms": 1},
+                "currency": "USD",
+            },
+        )
+        response.raise_for_status()
+        nights = _nights(checkin, checkout)
+        deals = []
+        for accommodation in response.json().get("data", []):
+            price_info = accommodation.get("price") or {}
+            price = float(price_info["book"]) / nights
+            original_price = float(price_info.get("total") or price_info["book"]) / nights
+            deals.append(TravelDeal(
+                title=accommodation.get("name", f"Stay in {args['destination']}"),
+                price=round(price, 2),
+                original_price=round(max(original_price, price), 2),
+                savings=round(max(original_price - price, 0.0), 2),
+                destination=args["destination"],
+                dates=f"{checkin} - {checkout}",
+                provider="Booking.com",
+                rating=round(float(accommodation.get("review_score") or 0) / 2, 1),
+                url=accommodation.get("url", ""),
+                image_url=accommodation.get("photo_url", ""),
+                deal_type="hotel",
+            ))
+        return deals
+
+
+class DemoProvider(Provider):
+    """Canned deals used when no real API key is configured"""
+
+    name = "demo"
+    deal_types = ("flight", "hotel")
+
+    def __init__(self, timeout: float = PROVIDER_TIMEOUT):
+        super().__init__(api_key=DEMO_KEY, base_url="", timeout=timeout)
+
+    async def search_flights(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        origin = args["origin"]
+        destination = args["destination"]
+        dates = _flight_dates(args)
+        return [
+            TravelDeal(
+                title=f"{origin} to {destination} Round-trip",
+                price=450,
+                original_price=680,
+                savings=230,
+                destination=destination,
+                dates=dates,
+                provider="Skyscanner",
+                rating=4.5,
+                url="https://skyscanner.com/deal123",
+                image_url="https://example.com/flight.jpg",
+                deal_type="flight",
+                origin=origin
+            ),
+            TravelDeal(
+                title=f"Direct Flight {origin}-{destination}",
+                price=520,
+                original_price=750,
+                savings=230,
+                destination=destination,
+                dates=dates,
+                provider="Expedia",
+                rating=4.3,
+                url="https://expedia.com/deal456",
+                image_url="https://example.com/flight2.jpg",
+                deal_type="flight",
+                origin=origin
+            )
+        ]
+
+    async def search_hotels(self, client: httpx.AsyncClient, args: dict) -> List[TravelDeal]:
+        destination = args["destination"]
+        dates = f"{args['checkin_date']} - {args['checkout_date']}"
+        return [
+            TravelDeal(
+                title=f"Luxury Hotel in {destination}",
+                price=180,
+                original_price=280,
+                savings=100,
+                destination=destination,
+                dates=dates,
+                provider="Booking.com",
+                rating=4.7,
+                url="https://booking.com/hotel123",
+                image_url="https://example.com/hotel.jpg",
+                deal_type="hotel"
+            ),
+            TravelDeal(
+                title=f"Boutique Hotel {destination}",
+                price=145,
+                original_price=220,
+                savings=75,
+                destination=destination,
+                dates=dates,
+                provider="Hotels.com",
+                rating=4.4,
+                url="https://hotels.com/hotel456",
+                image_url="https://example.com/hotel2.jpg",
+                deal_type="hotel"
+            )
+        ]
+
+
+def count_providers(providers: List[Provider], deal_type: str) -> int:
+    """Number of providers a fan-out for deal_type will query"""
+    return sum(1 for provider in providers if provider.supports(deal_type))
+
+
+def build_providers(apis: Dict[str, str]) -> List[Provider]:
+    """Create an adapter for every provider with a real API key.
+
+    Base URLs can be overridden (e.g. AMADEUS_BASE_URL=http://127.0.0.1:8001)
+    to point the adapters at local stub servers. Falls back to the demo
+    provider when nothing is configured.
+    """
+    providers: List[Provider] = []
+    if apis.get("amadeus_api_key", DEMO_KEY) != DEMO_KEY:
+        providers.append(AmadeusProvider(
+            apis["amadeus_api_key"],
+            os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com"),
+            api_secret=apis.get("amadeus_api_secret", ""),
+        ))
+    if apis.get("rapidapi_key", DEMO_KEY) != DEMO_KEY:
+        providers.append(RapidAPIBookingProvider(
+            apis["rapidapi_key"],
+            os.getenv("RAPIDAPI_BASE_URL", "https://booking-com.p.rapidapi.com"),
+        ))
+    if apis.get("booking_api_key", DEMO_KEY) != DEMO_KEY:
+        providers.append(BookingProvider(
+            apis["booking_api_key"],
+            os.getenv("BOOKING_BASE_URL", "https://demandapi.booking.com"),
+        ))
+    if not providers:
+        providers.append(DemoProvider())
+    return providers
+
+
+def merge_deals(results: List[ProviderResult]) -> List[TravelDeal]:
+    """Merge provider results, keeping the cheapest copy of duplicate deals"""
+    merged: Dict[tuple, TravelDeal] = {}
+    for result in results:
+        for deal in result.deals:
+            key = deal_key(deal)
+            current = merged.get(key)
+            if current is None or deal.price < current.price:
+                merged[key] = deal
+    return list(merged.values())
+
+
+async def _search(provider: Provider, client: httpx.AsyncClient, deal_type: str, args: dict, timeout: float) -> List[TravelDeal]:
+    """One upstream call, with its outcome fed back to the provider's limiter"""
+    start = time.perf_counter()
+    try:
+        deals = await asyncio.wait_for(provider.search(client, deal_type, args), timeout)
+    except httpx.HTTPStatusError as e:
+        provider.limiter.record((time.perf_counter() - start) * 1000, e.response.status_code, retry_after_seconds(e.response))
+        raise
+    except (asyncio.TimeoutError, httpx.TransportError):
+        provider.limiter.record((time.perf_counter() - start) * 1000)
+        raise
+    latency_ms = (time.perf_counter() - start) * 1000
+    provider.limiter.record(latency_ms, 200)
+    provider.hedging.observe(latency_ms)
+    return deals
+
+
+async def _attempt(provider: Provider, client: httpx.AsyncClient, deal_type: str, args: dict, deadline: float) -> List[TravelDeal]:
+    """Admission plus one upstream call, both bounded by deadline"""
+    async with provider.limiter.admit(deadline - time.perf_counter()):
+        return await _search(provider, client, deal_type, args, deadline - time.perf_counter())
+
+
+async def _hedged(provider: Provider, client: httpx.AsyncClient, deal_type: str, args: dict, deadline: float) -> tuple:
+    """Run one attempt, adding a duplicate if it outlives the hedge delay.
+
+    Returns (deals, hedged). The first successful copy wins and the other
+    is cancelled; if both fail, the last error is raised.
+    """
+    delay = provider.hedging.delay()
+    primary = asyncio.create_task(_attempt(provider, client, deal_type, args, deadline))
+    tasks = {primary}
+    try:
+        if delay is None or time.perf_counter() + delay >= deadline:
+            return await primary, False
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not provider.hedging.allow():
+            return await primary, False
+
+        tasks.add(asyncio.create_task(_attempt(provider, client, deal_type, args, deadline)))
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        provider.hedging.hedge_wins += 1
+                    return task.result(), True
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _resilient_search(provider: Provider, client: httpx.AsyncClient, deal_type: str, args: dict, result: ProviderResult) -> List[TravelDeal]:
+    """Breaker check, then hedged attempts with jittered retries of transient errors.
+
+    Everything, including backoff sleeps, fits in the provider's timeout.
+    Attempt and hedge counts are written to result.
+    """
+    if not provider.breaker.allow():
+        raise CircuitOpen(f"circuit open after repeated failures; retrying in up to {provider.breaker.open_seconds:.0f}s")
+
+    start = time.perf_counter()
+    deadline = start + provider.timeout
+    try:
+        while True:
+            try:
+                deals, hedged = await _hedged(provider, client, deal_type, args, deadline)
+                result.hedged = result.hedged or hedged
+                break
+            except Exception as e:
+                delay = backoff_delay(result.attempts)
+                if result.attempts > PROVIDER_RETRIES or not retryable(e) or time.perf_counter() + delay >= deadline:
+                    raise
+                result.attempts += 1
+                await asyncio.sleep(delay)
+    except (Throttled, asyncio.CancelledError):
+        # Shed locally or abandoned by the caller: says nothing about provider health
+        provider.breaker.release_probe()
+        raise
+    except Exception:
+        provider.breaker.record(False, (time.perf_counter() - start) * 1000)
+        raise
+    provider.breaker.record(True, (time.perf_counter() - start) * 1000)
+    return deals
+
+
+async def _call_provider(
+    provider: Provider,
+    client: httpx.AsyncClient,
+    deal_type: str,
+    args: dict,
+) -> ProviderResult:
+    start = time.perf_counter()
+    result = ProviderResult(provider=provider.name, status="ok")
+    try:
+        result.deals = await _resilient_search(provider, client, deal_type, args, result)
+    except (Throttled, CircuitOpen) as e:
+        result.status = "throttled" if isinstance(e, Throttled) else "circuit_open"
+        result.error = str(e)
+    except asyncio.TimeoutError:
+        result.status, result.error = "timeout", f"no response within {provider.timeout:.1f}s"
+    except Exception as e:
+        logger.warning(f"Provider {provider.name} failed: {e}")
+        result.status, result.error = "error", str(e)
+    result.latency_ms = (time.perf_counter() - start) * 1000
+    result.circuit = provider.breaker.state
+    return result
+
+
+async def fan_out(
+    client: httpx.AsyncClient,
+    providers: List[Provider],
+    deal_type: str,
+    args: dict,
+    budget: float = SEARCH_BUDGET,
+    on_result: Optional[Callable[[ProviderResult], Awaitable[None]]] = None,
+) -> FanOutResult:
+    """Query every provider supporting deal_type concurrently.
+
+    Each provider gets its own deadline; whatever has arrived when the
+    overall budget runs out is returned and the result is flagged partial.
+    on_result, when given, is awaited with each provider's result as soon
+    as that provider finishes.
+    """
+    start = time.perf_counter()
+    tasks = {
+        asyncio.create_task(_call_provider(provider, client, deal_type, args)): provider
+        for provider in providers
+        if provider.supports(deal_type)
+    }
+    if not tasks:
+        return FanOutResult(deals=[], providers=[], partial=False, elapsed_ms=0.0)
+
+    deadline = start + budget
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if on_result:
+                for task in done:
+                    await on_result(task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    results = []
+    for task, provider in tasks.items():
+        if task not in pending:
+            results.append(task.result())
+        else:
+            results.append(ProviderResult(
+                provider=provider.name,
+                status="budget_exceeded",
+                latency_ms=elapsed_ms,
+                error=f"search budget of {budget:.1f}s exhausted",
+                circuit=provider.breaker.state,
+            ))
+
+    return FanOutResult(
+        deals=merge_deals(results),
+        providers=results,
+        partial=any(result.status != "ok" for result in results),
+        elapsed_ms=elapsed_ms,
+    )
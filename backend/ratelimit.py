@@ -0,0 +1,250 @@
+"""
+TravelDeals upstream rate limiting
+Per-provider token buckets and adaptive (AIMD) concurrency limits
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+# Requests per second and burst size each provider's quota allows (0 = unlimited)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "amadeus": (float(os.getenv("AMADEUS_RATE_LIMIT", "10")), int(os.getenv("AMADEUS_BURST", "10"))),
+    "rapidapi": (float(os.getenv("RAPIDAPI_RATE_LIMIT", "5")), int(os.getenv("RAPIDAPI_BURST", "5"))),
+    "booking": (float(os.getenv("BOOKING_RATE_LIMIT", "20")), int(os.getenv("BOOKING_BURST", "20"))),
+}
+
+# Worker processes splitting each quota; the supervisor sets it for its workers
+QUOTA_SHARES = max(int(os.getenv("PROVIDER_QUOTA_SHARES", "1")), 1)
+
+# Adaptive concurrency bounds per provider
+CONCURRENCY_MIN = int(os.getenv("PROVIDER_CONCURRENCY_MIN", "2"))
+CONCURRENCY_MAX = int(os.getenv("PROVIDER_CONCURRENCY_MAX", "32"))
+CONCURRENCY_INITIAL = int(os.getenv("PROVIDER_CONCURRENCY_INITIAL", "8"))
+
+# Back off when recent latency exceeds the long-run baseline by this factor
+LATENCY_TOLERANCE = float(os.getenv("PROVIDER_LATENCY_TOLERANCE", "2.0"))
+
+# Multiplicative decrease applied on overload signals
+BACKOFF_FACTOR = 0.7
+
+
+class Throttled(Exception):
+    """A call was shed locally instead of exceeding a provider's quota"""
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, up to burst banked.
+
+    A Retry-After from the provider pauses the bucket until that time.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        self._refill(now)
+        wait = max(self.paused_until - now, 0.0)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available now; returns whether it did"""
+        if self.delay() > 0:
+            return False
+        if self.rate > 0:
+            self.tokens -= 1
+        return True
+
+    async def acquire(self, timeout: float) -> None:
+        """Take a token, waiting at most timeout seconds; raises Throttled otherwise"""
+        if self.rate <= 0:
+            return
+        deadline = self.clock() + timeout
+        while True:
+            if self.try_acquire():
+                return
+            wait = self.delay()
+            if self.clock() + wait > deadline:
+                raise Throttled(f"rate limit of {self.rate:g}/s reached")
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by upstream responses.
+
+    Each success raises the limit by 1/limit (about +1 per round of calls).
+    A 429, a 5xx, a timeout or latency above LATENCY_TOLERANCE times the
+    baseline cuts it by BACKOFF_FACTOR, at most once per round so one burst
+    of failures does not collapse it to the minimum. The baseline is a slow
+    moving average of latency; recent latency is a fast one.
+    """
+
+    def __init__(
+        self,
+        initial: int = CONCURRENCY_INITIAL,
+        minimum: int = CONCURRENCY_MIN,
+        maximum: int = CONCURRENCY_MAX,
+        tolerance: float = LATENCY_TOLERANCE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.tolerance = tolerance
+        self.clock = clock
+        self.inflight = 0
+        self.baseline_ms: Optional[float] = None
+        self.recent_ms: Optional[float] = None
+        self._waiters: deque = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def waiting(self) -> int:
+        """Callers queued for a slot"""
+        return len(self._waiters)
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    async def acquire(self, timeout: float) -> None:
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            raise Throttled(f"concurrency limit of {int(self.limit)} reached")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._wake()
+
+    def on_success(self, latency_ms: float) -> None:
+        if self.baseline_ms is None:
+            self.baseline_ms = self.recent_ms = latency_ms
+        else:
+            self.baseline_ms += 0.02 * (latency_ms - self.baseline_ms)
+            self.recent_ms += 0.3 * (latency_ms - self.recent_ms)
+        if self.recent_ms > self.baseline_ms * self.tolerance:
+            self.on_overload()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_overload(self) -> None:
+        now = self.clock()
+        # One decrease per round trip of the recent latency
+        if now - self._last_decrease < (self.recent_ms or 0) / 1000:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * BACKOFF_FACTOR)
+
+
+class ProviderLimiter:
+    """Admission control for one provider: a token bucket plus AIMD concurrency"""
+
+    def __init__(self, rate: float = 0.0, burst: int = 1, concurrency: Optional[AdaptiveLimiter] = None):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency or AdaptiveLimiter()
+        self.counters = {"admitted": 0, "throttled": 0, "overloads": 0}
+
+    @classmethod
+    def for_provider(cls, name: str, shares: int = QUOTA_SHARES) -> "ProviderLimiter":
+        """Limiter for this process's share of a provider's quota"""
+        rate, burst = DEFAULT_RATE_LIMITS.get(name, (0.0, 1))
+        return cls(rate / shares, max(burst // shares, 1))
+
+    @asynccontextmanager
+    async def admit(self, timeout: float) -> AsyncIterator[None]:
+        """Hold a concurrency slot and a rate token for one upstream call.
+
+        Raises Throttled if neither is available within timeout, so calls
+        over quota fail fast instead of piling up behind the provider.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            await self.concurrency.acquire(timeout)
+        except Throttled:
+            self.counters["throttled"] += 1
+            raise
+        try:
+            await self.bucket.acquire(max(deadline - time.monotonic(), 0.0))
+        except Throttled:
+            self.concurrency.release()
+            self.counters["throttled"] += 1
+            raise
+        self.counters["admitted"] += 1
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+    def record(self, latency_ms: float, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        """Feed one call's outcome back; status_code None means a timeout"""
+        if status_code is not None and status_code < 500 and status_code != 429:
+            self.concurrency.on_success(latency_ms)
+            return
+        self.counters["overloads"] += 1
+        self.concurrency.on_overload()
+        if retry_after:
+            self.bucket.pause(retry_after)
+
+    def has_headroom(self, reserve: float) -> bool:
+        """Whether one more call would leave reserve (a fraction) of both
+        the concurrency limit and the token burst free for other callers"""
+        limiter = self.concurrency
+        if limiter.waiting or limiter.inflight + 1 > int(limiter.limit) * (1 - reserve):
+            return False
+        if self.bucket.rate <= 0:
+            return True
+        return self.bucket.delay() == 0 and self.bucket.tokens - 1 >= self.bucket.burst * reserve
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "rate": self.bucket.rate,
+            "concurrency_limit": int(self.concurrency.limit),
+            "inflight": self.concurrency.inflight,
+            "latency_ms": round(self.concurrency.recent_ms or 0.0, 1),
+            "baseline_ms": round(self.concurrency.baseline_ms or 0.0, 1),
+        }
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Retry-After header in seconds (delta form only), if present"""
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
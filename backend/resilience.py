@@ -0,0 +1,171 @@
+"""
+TravelDeals provider resilience
+Circuit breakers, hedging policy and retry backoff for upstream calls
+"""
+
+import os
+import random
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import httpx
+
+# Circuit breaker: open when at least BREAKER_FAILURE_RATIO of the last
+# BREAKER_WINDOW calls failed or were slower than BREAKER_SLOW_CALL_MS
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATIO = float(os.getenv("BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_SLOW_CALL_MS = float(os.getenv("BREAKER_SLOW_CALL_MS", "2000"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+# Retries of transient failures, with full-jitter exponential backoff
+PROVIDER_RETRIES = int(os.getenv("PROVIDER_RETRIES", "1"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.1"))
+RETRYABLE_STATUS = {502, 503, 504}
+
+# Hedging: send a duplicate request once the first has taken longer than
+# the provider's recent p95, for at most HEDGE_MAX_RATIO of calls
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "50"))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 200
+
+
+class CircuitOpen(Exception):
+    """Calls to a provider are short-circuited while it is failing"""
+
+
+class CircuitBreaker:
+    """closed -> open -> half_open -> closed breaker over a sliding window.
+
+    While open, calls fail immediately. After BREAKER_OPEN_SECONDS a few
+    probe calls are let through (half-open): a successful probe closes the
+    breaker, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_ratio: float = BREAKER_FAILURE_RATIO,
+        slow_call_ms: float = BREAKER_SLOW_CALL_MS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probes = 0
+        self._outcomes: deque = deque(maxlen=window)
+        self.counters = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; counts half-open probes"""
+        if self.state == "open":
+            if self.clock() - self.opened_at < self.open_seconds:
+                self.counters["rejected"] += 1
+                return False
+            self.state, self.probes = "half_open", 0
+        if self.state == "half_open":
+            if self.probes >= self.half_open_probes:
+                self.counters["rejected"] += 1
+                return False
+            self.probes += 1
+        return True
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        failed = not ok or latency_ms > self.slow_call_ms
+        if self.state == "half_open":
+            if failed:
+                self._open()
+            else:
+                self.state = "closed"
+                self._outcomes.clear()
+            return
+
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_ratio:
+            self._open()
+
+    def release_probe(self) -> None:
+        """A half-open probe ended without an outcome (e.g. it was shed)"""
+        if self.state == "half_open" and self.probes > 0:
+            self.probes -= 1
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.opened_at = self.clock()
+        self._outcomes.clear()
+        self.counters["opened"] += 1
+
+    def stats(self) -> dict:
+        return {**self.counters, "state": self.state}
+
+
+class HedgePolicy:
+    """When to send a hedged duplicate of a slow provider call.
+
+    The delay is the provider's recent HEDGE_QUANTILE latency (never below
+    HEDGE_MIN_DELAY_MS); no hedges are sent until enough latencies have been
+    observed. Hedges are capped at HEDGE_MAX_RATIO of calls so a slow
+    provider does not get double the load.
+    """
+
+    def __init__(
+        self,
+        quantile: float = HEDGE_QUANTILE,
+        min_delay_ms: float = HEDGE_MIN_DELAY_MS,
+        max_ratio: float = HEDGE_MAX_RATIO,
+    ):
+        self.quantile = quantile
+        self.min_delay_ms = min_delay_ms
+        self.max_ratio = max_ratio
+        self._latencies: deque = deque(maxlen=HEDGE_WINDOW)
+        self._sorted: Optional[list] = None
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, latency_ms: float) -> None:
+        self._latencies.append(latency_ms)
+        self._sorted = None
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off for now"""
+        self.calls += 1
+        if self.max_ratio <= 0 or len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._latencies)
+        index = min(int(len(self._sorted) * self.quantile), len(self._sorted) - 1)
+        return max(self._sorted[index], self.min_delay_ms) / 1000
+
+    def allow(self) -> bool:
+        if self.hedges + 1 > self.calls * self.max_ratio:
+            return False
+        self.hedges += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+def retryable(error: BaseException) -> bool:
+    """Transient failures worth retrying: connection problems and 502/503/504"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY) -> float:
+    """Full-jitter exponential backoff before retry number attempt (1-based)"""
+    return random.uniform(0, base * 2 ** (attempt - 1))
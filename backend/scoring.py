@@ -0,0 +1,90 @@
+"""
+TravelDeals scoring
+Columnar (NumPy) scoring and top-N selection for compare_deals
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+from models import TravelDeal
+
+CRITERIA = ("price", "rating", "value", "savings")
+
+# Weights of the blended "value" score
+VALUE_WEIGHTS = {"savings": 0.4, "rating": 0.3, "price": 0.3}
+
+
+def deal_nights(deal: TravelDeal) -> int:
+    """Nights covered by a hotel deal's dates (1 otherwise)"""
+    if deal.deal_type != "hotel" or deal.start is None or deal.end is None:
+        return 1
+    return max(deal.end - deal.start, 1)
+
+
+class DealColumns:
+    """Struct-of-arrays view over a sequence of deals, gathered one attribute at a time"""
+
+    def __init__(self, deals: Sequence[TravelDeal]):
+        self.deals = list(deals)
+        count = len(self.deals)
+        self.price = np.fromiter((deal.price for deal in self.deals), dtype=np.float64, count=count)
+        self.original_price = np.fromiter((deal.original_price for deal in self.deals), dtype=np.float64, count=count)
+        self.savings = np.fromiter((deal.savings for deal in self.deals), dtype=np.float64, count=count)
+        self.rating = np.fromiter((deal.rating for deal in self.deals), dtype=np.float64, count=count)
+        self.nights = np.fromiter((deal_nights(deal) for deal in self.deals), dtype=np.float64, count=count)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to 0-100 (all equal -> 100)"""
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.full_like(values, 100.0)
+    return (values - low) / (high - low) * 100.0
+
+
+def score(columns: DealColumns, criteria: str) -> np.ndarray:
+    """Score every deal 0-100 for the given criteria (higher is better)"""
+    if criteria not in CRITERIA:
+        raise ValueError(f"Unknown criteria: {criteria}")
+    if not len(columns):
+        return np.empty(0)
+
+    if criteria == "price":
+        return 100.0 - _scale(columns.price)
+    if criteria == "rating":
+        return np.clip(columns.rating, 0.0, 5.0) / 5.0 * 100.0
+    if criteria == "savings":
+        return _scale(columns.savings * columns.nights)
+
+    savings_percent = np.divide(
+        columns.savings * 100.0,
+        columns.original_price,
+        out=np.zeros_like(columns.savings),
+        where=columns.original_price > 0,
+    )
+    return (
+        VALUE_WEIGHTS["savings"] * np.clip(savings_percent, 0.0, 100.0)
+        + VALUE_WEIGHTS["rating"] * (np.clip(columns.rating, 0.0, 5.0) / 5.0 * 100.0)
+        + VALUE_WEIGHTS["price"] * (100.0 - _scale(columns.price))
+    )
+
+
+def top_n(columns: DealColumns, criteria: str, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and scores of the n best deals, best first.
+
+    Uses argpartition so only the selected n are fully sorted.
+    """
+    scores = score(columns, criteria)
+    n = min(n, len(scores))
+    if n <= 0:
+        return np.empty(0, dtype=np.intp), scores[:0]
+    if n < len(scores):
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order, scores[order]
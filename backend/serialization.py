@@ -0,0 +1,69 @@
+"""
+TravelDeals serialization
+JSON encoding for tool and resource responses
+"""
+
+import json
+import os
+import time
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+# Default output format of a server, "compact" or "pretty" (also
+# --output-format); pretty JSON is ~30% larger
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "compact")
+
+# Set JSON_ENCODER=json to force the stdlib encoder even if orjson is installed
+USE_ORJSON = orjson is not None and os.getenv("JSON_ENCODER", "orjson") == "orjson"
+
+
+OUTPUT_FORMATS = ("compact", "pretty")
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encode a response body, compact unless pretty. Uses orjson when it is installed."""
+    if USE_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option).decode()
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+class Encoder:
+    """Response encoding for one server.
+
+    Holds the server's output format, and an observer called with
+    (seconds, characters) after each encode when one is set.
+    """
+
+    def __init__(self, output_format: str = OUTPUT_FORMAT, observer: Optional[Callable[[float, int], None]] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.pretty = output_format == "pretty"
+        self.observer = observer
+
+    def dumps(self, obj: Any) -> str:
+        if self.observer is None:
+            return dumps(obj, self.pretty)
+        started = time.perf_counter()
+        text = dumps(obj, self.pretty)
+        self.observer(time.perf_counter() - started, len(text))
+        return text
+
+
+class StaticResources:
+    """Resource bodies that never change, encoded once at startup"""
+
+    def __init__(self, payloads: dict, encode: Callable[[Any], str] = dumps):
+        self._bodies = {uri: encode(payload) for uri, payload in payloads.items()}
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._bodies
+
+    def get(self, uri: str) -> Optional[str]:
+        return self._bodies.get(uri)
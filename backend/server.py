@@ -4,16 +4,26 @@ TravelDeals MCP Server
 Finds best travel deals using multiple APIs via MCP protocol
 """
 
+# Imported first so the startup profile also times the imports below
+from startup import startup_profile
+
+import argparse
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List, Optional
+import signal
+import socket
+import sys
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from datetime import datetime, timedelta
 
-from mcp.server import Server
+from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 from mcp.types import (
+    CallToolResult,
     Resource,
     Tool,
     TextContent,
@@ -23,139 +33,290 @@ from mcp.types import (
 )
 import httpx
 import os
-from dataclasses import dataclass
+
+startup_profile.mark("mcp imports")
+
+from alerts import DealAlerts, load_watch_list
+from cache import SearchCache, normalize_search_args
+from calendar_search import CALENDAR_CONCURRENCY, CALENDAR_MAX_CELLS, FLEXIBLE_DAYS_MAX, calendar_cells
+from coalesce import SingleFlight
+from deal_index import DealIndex
+from locations import PLACE_FORMS, canonical_args, canonical_place, location_stats
+from models import parse_dates
+from packages import top_k_packages
+from price_history import PRICE_HISTORY_PATH, PriceHistory, parse_month
+from progress import ProgressReporter
+from providers import FanOutResult, Provider, build_http_client, build_providers, count_providers, fan_out
+from metrics import Metrics
+from serialization import OUTPUT_FORMAT, OUTPUT_FORMATS, Encoder, StaticResources
+from sessions import SessionLimiter
+from shared_cache import SHARED_CACHE_PATH, SharedCache
+
+if TYPE_CHECKING:
+    from scoring import DealColumns  # imports numpy; loaded by the first compare_deals
+
+startup_profile.mark("server modules")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("travel-deals-mcp")
 
-@dataclass
-class TravelDeal:
-    """Travel deal data structure"""
-    title: str
-    price: float
-    original_price: float
-    savings: float
-    destination: str
-    dates: str
-    provider: str
-    rating: float
-    url: str
-    image_url: str
-    deal_type: str  # "flight", "hotel", "package"
+# Tools whose identical in-flight calls are coalesced into one execution
+COALESCED_TOOLS = {"search_flight_deals", "search_hotel_deals", "search_package_deals"}
+
+# Metric labels; anything else a client sends is counted as "unknown"
+KNOWN_TOOLS = COALESCED_TOOLS | {"get_destination_insights", "compare_deals"}
+
+# Number of flight + hotel combinations returned by search_package_deals
+PACKAGE_TOP_K = int(os.getenv("PACKAGE_TOP_K", "5"))
+
+# Number of deals returned by search and compare tools
+SEARCH_TOP_N = 5
+COMPARE_TOP_N = int(os.getenv("COMPARE_TOP_N", "3"))
+
+DEAL_TYPES = {"flights": "flight", "hotels": "hotel", "packages": "package"}
+
+# Resource bodies that never change; encoded once by StaticResources
+STATIC_RESOURCES = {
+    "travel://popular-destinations": {
+        "destinations": [
+            {"name": "Paris", "country": "France", "avg_deal_savings": "35%"},
+            {"name": "Tokyo", "country": "Japan", "avg_deal_savings": "28%"},
+            {"name": "New York", "country": "USA", "avg_deal_savings": "42%"},
+            {"name": "London", "country": "UK", "avg_deal_savings": "31%"},
+            {"name": "Barcelona", "country": "Spain", "avg_deal_savings": "38%"}
+        ]
+    }
+}
 
 class TravelDealsServer:
     """Main server class for travel deals MCP"""
     
-    def __init__(self):
-        self.server = Server("travel-deals-mcp")
-        self.http_client = httpx.AsyncClient()
+    def __init__(
+        self,
+        shared_cache_path: Optional[str] = SHARED_CACHE_PATH,
+        price_history_path: Optional[str] = PRICE_HISTORY_PATH,
+        output_format: str = OUTPUT_FORMAT,
+    ):
+        self.server = Server("travel-deals-mcp", version="1.0.0")
+        self.encoder = Encoder(output_format)
+        # Built by the first tool call that needs them: creating the client
+        # loads httpcore and an SSL context, which a client waiting on
+        # initialize/list_tools should not pay for
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._providers: Optional[List[Provider]] = None
         
         # API configurations (replace with real API keys)
         self.apis = {
             "amadeus_api_key": os.getenv("AMADEUS_API_KEY", "demo_key"),
+            "amadeus_api_secret": os.getenv("AMADEUS_API_SECRET", ""),
             "rapidapi_key": os.getenv("RAPIDAPI_KEY", "demo_key"),
             "booking_api_key": os.getenv("BOOKING_API_KEY", "demo_key")
         }
+        self.search_cache = SearchCache()
+        self.shared_cache = SharedCache(shared_cache_path) if shared_cache_path else None
+        self.single_flight = SingleFlight()
+        self.price_history = PriceHistory(price_history_path) if price_history_path else None
+        self.static_resources = StaticResources(STATIC_RESOURCES, self.encoder.dumps)
+        self.calendar_limiter = asyncio.Semaphore(CALENDAR_CONCURRENCY)
+        self.session_limiter = SessionLimiter()
+        self.deal_alerts = DealAlerts(self.fan_out, lambda: self.providers, load_watch_list(), encode=self.encoder.dumps)
+        self.metrics = self.setup_metrics()
+        
+        # Deals seen by searches, with a columnar view rebuilt on change
+        self.deal_index = DealIndex()
+        self._columns: dict[str, tuple[int, "DealColumns"]] = {}
         
         self.setup_tools()
         self.setup_resources()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = build_http_client()
+        return self._http_client
+
+    @property
+    def providers(self) -> List[Provider]:
+        if self._providers is None:
+            self._providers = build_providers(self.apis)
+        return self._providers
         
+    def setup_metrics(self) -> Metrics:
+        """Hot-path metrics, plus collectors for the components' own counters"""
+        metrics = Metrics()
+        if metrics.enabled:
+            self.encoder.observer = metrics.encoded
+        metrics.add_collector("cache", self.search_cache.stats)
+        metrics.add_collector("single_flight", self.single_flight.stats)
+        metrics.add_collector("sessions", self.session_limiter.stats)
+        metrics.add_collector("deal_alerts", self.deal_alerts.stats)
+        metrics.add_collector("locations", location_stats)
+        if self.shared_cache is not None:
+            metrics.add_collector("shared_cache", self.shared_cache.stats)
+        if self.price_history is not None:
+            metrics.add_collector("price_history", self.price_history.stats)
+        metrics.add_collector("upstream", lambda: {
+            provider.name: {
+                "limiter": provider.limiter.stats(),
+                "breaker": provider.breaker.stats(),
+                "hedging": provider.hedging.stats(),
+            }
+            for provider in self._providers or ()
+        })
+        return metrics
+
     def setup_tools(self):
         """Define MCP tools for travel deals"""
         
+        tools = [
+            Tool(
+                name="search_flight_deals",
+                description="Find best flight deals for given destinations and dates",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "origin": {"type": "string", "description": "Origin city/airport"},
+                        "destination": {"type": "string", "description": "Destination city/airport"},
+                        "departure_date": {"type": "string", "description": "Departure date (YYYY-MM-DD)"},
+                        "return_date": {"type": "string", "description": "Return date (YYYY-MM-DD)", "optional": True},
+                        "budget_max": {"type": "number", "description": "Maximum budget", "optional": True},
+                        "flexible_days": {"type": "integer", "minimum": 0, "maximum": FLEXIBLE_DAYS_MAX, "description": "Also search +/- this many days around the dates and return a price calendar", "optional": True},
+                        "whole_month": {"type": "boolean", "description": "Search every departure day in the departure month (trip length kept)", "optional": True}
+                    },
+                    "required": ["origin", "destination", "departure_date"]
+                }
+            ),
+            Tool(
+                name="search_hotel_deals",
+                description="Find best hotel deals for given location and dates",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "destination": {"type": "string", "description": "Destination city"},
+                        "checkin_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
+                        "checkout_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
+                        "guests": {"type": "number", "description": "Number of guests", "default": 2},
+                        "budget_max": {"type": "number", "description": "Maximum budget per night", "optional": True}
+                    },
+                    "required": ["destination", "checkin_date", "checkout_date"]
+                }
+            ),
+            Tool(
+                name="search_package_deals",
+                description="Find best vacation package deals (flight + hotel)",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "origin": {"type": "string", "description": "Origin city"},
+                        "destination": {"type": "string", "description": "Destination city"},
+                        "departure_date": {"type": "string", "description": "Departure date (YYYY-MM-DD)"},
+                        "return_date": {"type": "string", "description": "Return date (YYYY-MM-DD)"},
+                        "budget_max": {"type": "number", "description": "Maximum total budget", "optional": True}
+                    },
+                    "required": ["origin", "destination", "departure_date", "return_date"]
+                }
+            ),
+            Tool(
+                name="get_destination_insights",
+                description="Get travel insights and tips for a destination",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "destination": {"type": "string", "description": "Destination city/country"},
+                        "travel_month": {"type": "string", "description": "Month of travel (optional)"}
+                    },
+                    "required": ["destination"]
+                }
+            ),
+            Tool(
+                name="compare_deals",
+                description="Compare multiple travel deals and find the best value",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "deal_type": {"type": "string", "description": "Type of deals to compare", "enum": ["flights", "hotels", "packages"]},
+                        "criteria": {"type": "string", "description": "Comparison criteria", "enum": ["price", "rating", "value", "savings"]}
+                    },
+                    "required": ["deal_type", "criteria"]
+                }
+            )
+        ]
+
+        # Search cache keys are built from the declared properties only
+        self.tool_fields = {tool.name: tuple(tool.inputSchema["properties"]) for tool in tools}
+
+        # The SDK re-checks each schema on every call; compile them once instead
+        self.tool_validators = {
+            tool.name: validator_for(tool.inputSchema)(tool.inputSchema)
+            for tool in tools
+        }
+
         @self.server.list_tools()
         async def handle_list_tools() -> list[Tool]:
-            return [
-                Tool(
-                    name="search_flight_deals",
-                    description="Find best flight deals for given destinations and dates",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "origin": {"type": "string", "description": "Origin city/airport"},
-                            "destination": {"type": "string", "description": "Destination city/airport"},
-                            "departure_date": {"type": "string", "description": "Departure date (YYYY-MM-DD)"},
-                            "return_date": {"type": "string", "description": "Return date (YYYY-MM-DD)", "optional": True},
-                            "budget_max": {"type": "number", "description": "Maximum budget", "optional": True}
-                        },
-                        "required": ["origin", "destination", "departure_date"]
-                    }
-                ),
-                Tool(
-                    name="search_hotel_deals",
-                    description="Find best hotel deals for given location and dates",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "destination": {"type": "string", "description": "Destination city"},
-                            "checkin_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
-                            "checkout_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
-                            "guests": {"type": "number", "description": "Number of guests", "default": 2},
-                            "budget_max": {"type": "number", "description": "Maximum budget per night", "optional": True}
-                        },
-                        "required": ["destination", "checkin_date", "checkout_date"]
-                    }
-                ),
-                Tool(
-                    name="search_package_deals",
-                    description="Find best vacation package deals (flight + hotel)",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "origin": {"type": "string", "description": "Origin city"},
-                            "destination": {"type": "string", "description": "Destination city"},
-                            "departure_date": {"type": "string", "description": "Departure date (YYYY-MM-DD)"},
-                            "return_date": {"type": "string", "description": "Return date (YYYY-MM-DD)"},
-                            "budget_max": {"type": "number", "description": "Maximum total budget", "optional": True}
-                        },
-                        "required": ["origin", "destination", "departure_date", "return_date"]
-                    }
-                ),
-                Tool(
-                    name="get_destination_insights",
-                    description="Get travel insights and tips for a destination",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "destination": {"type": "string", "description": "Destination city/country"},
-                            "travel_month": {"type": "string", "description": "Month of travel (optional)"}
-                        },
-                        "required": ["destination"]
-                    }
-                ),
-                Tool(
-                    name="compare_deals",
-                    description="Compare multiple travel deals and find the best value",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "deal_type": {"type": "string", "description": "Type of deals to compare", "enum": ["flights", "hotels", "packages"]},
-                            "criteria": {"type": "string", "description": "Comparison criteria", "enum": ["price", "rating", "value", "savings"]}
-                        },
-                        "required": ["deal_type", "criteria"]
-                    }
-                )
-            ]
+            startup_profile.finish("first list_tools")
+            return tools
 
-        @self.server.call_tool()
-        async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
+        @self.server.call_tool(validate_input=False)
+        async def handle_call_tool(name: str, arguments: dict) -> list[TextContent] | CallToolResult:
+            metric_name = name if name in KNOWN_TOOLS else "unknown"
+            started = self.metrics.tool_started(metric_name)
+            failed = False
             try:
-                if name == "search_flight_deals":
-                    return await self.search_flight_deals(arguments)
-                elif name == "search_hotel_deals":
-                    return await self.search_hotel_deals(arguments)
-                elif name == "search_package_deals":
-                    return await self.search_package_deals(arguments)
-                elif name == "get_destination_insights":
-                    return await self.get_destination_insights(arguments)
-                elif name == "compare_deals":
-                    return await self.compare_deals(arguments)
-                else:
-                    raise ValueError(f"Unknown tool: {name}")
+                validator = self.tool_validators.get(name)
+                error = best_match(validator.iter_errors(arguments)) if validator is not None else None
+                if error is not None:
+                    failed = True
+                    return CallToolResult(
+                        content=[TextContent(type="text", text=f"Input validation error: {error.message}")],
+                        isError=True,
+                    )
+                # "JFK", "NYC" and "New York" become one canonical place
+                arguments = canonical_args(name, arguments)
+                async with self.session_limiter.slot(self.client_key()):
+                    if name in COALESCED_TOOLS:
+                        # Identical overlapping searches share one upstream execution
+                        key, _ = normalize_search_args(name, arguments, self.tool_fields[name])
+                        return await self.single_flight.do(
+                            (key, arguments.get("budget_max")),
+                            lambda: self.dispatch(name, arguments),
+                        )
+                    return await self.dispatch(name, arguments)
             except Exception as e:
+                failed = True
                 logger.error(f"Error calling tool {name}: {e}")
                 return [TextContent(type="text", text=f"Error: {str(e)}")]
+            finally:
+                self.metrics.tool_finished(metric_name, started, failed)
+
+    def client_key(self):
+        """Who the request being handled counts against for session limits.
+
+        Over HTTP this is the client address, which stays the same across
+        the fresh session stateless mode creates for every request; over
+        stdio it is the session. None outside a request.
+        """
+        try:
+            ctx = self.server.request_context
+        except LookupError:
+            return None
+        client = getattr(ctx.request, "client", None)
+        return client.host if client is not None else ctx.session
+
+    async def dispatch(self, name: str, arguments: dict) -> list[TextContent]:
+        """Route a tool call to its implementation"""
+        if name == "search_flight_deals":
+            return await self.search_flight_deals(arguments)
+        elif name == "search_hotel_deals":
+            return await self.search_hotel_deals(arguments)
+        elif name == "search_package_deals":
+            return await self.search_package_deals(arguments)
+        elif name == "get_destination_insights":
+            return await self.get_destination_insights(arguments)
+        elif name == "compare_deals":
+            return await self.compare_deals(arguments)
+        else:
+            raise ValueError(f"Unknown tool: {name}")
 
     def setup_resources(self):
         """Define MCP resources"""
@@ -172,7 +333,7 @@ class TravelDealsServer:
                 Resource(
                     uri="travel://deal-alerts",
                     name="Deal Alerts",
-                    description="Current travel deal alerts and notifications",
+                    description="Price drops found by the background watcher on watched routes",
                     mimeType="application/json"
                 ),
                 Resource(
@@ -180,81 +341,146 @@ class TravelDealsServer:
                     name="Best Times to Travel",
                     description="Optimal travel times for different destinations",
                     mimeType="application/json"
+                ),
+                Resource(
+                    uri="travel://cache-stats",
+                    name="Search Cache Stats",
+                    description="Search cache and request coalescing counters",
+                    mimeType="application/json"
+                ),
+                Resource(
+                    uri="travel://metrics",
+                    name="Server Metrics",
+                    description="Tool and provider latency histograms, in-flight calls, errors, cache and limiter counters",
+                    mimeType="application/json"
                 )
             ]
 
         @self.server.read_resource()
         async def handle_read_resource(uri: str) -> str:
-            if uri == "travel://popular-destinations":
-                return json.dumps({
-                    "destinations": [
-                        {"name": "Paris", "country": "France", "avg_deal_savings": "35%"},
-                        {"name": "Tokyo", "country": "Japan", "avg_deal_savings": "28%"},
-                        {"name": "New York", "country": "USA", "avg_deal_savings": "42%"},
-                        {"name": "London", "country": "UK", "avg_deal_savings": "31%"},
-                        {"name": "Barcelona", "country": "Spain", "avg_deal_savings": "38%"}
-                    ]
-                })
-            elif uri == "travel://deal-alerts":
-                return json.dumps({
-                    "alerts": [
-                        {"destination": "Bali", "savings": "45%", "expires": "2025-06-15"},
-                        {"destination": "Iceland", "savings": "52%", "expires": "2025-06-10"},
-                        {"destination": "Costa Rica", "savings": "38%", "expires": "2025-06-20"}
-                    ]
+            uri = str(uri)  # the SDK passes a pydantic AnyUrl
+            body = self.static_resources.get(uri)
+            if body is not None:
+                return body
+            if uri == "travel://deal-alerts":
+                return self.deal_alerts.snapshot()
+            elif uri == "travel://cache-stats":
+                return self.encoder.dumps({
+                    **self.search_cache.stats(),
+                    "single_flight": self.single_flight.stats(),
+                    "shared": self.shared_cache.stats() if self.shared_cache is not None else None
                 })
+            elif uri == "travel://metrics":
+                return self.encoder.dumps(self.metrics.snapshot())
             else:
                 raise ValueError(f"Unknown resource: {uri}")
 
+    async def fan_out(self, tool: str, deal_type: str, args: dict, on_result=None, limiter=None) -> tuple[FanOutResult, str]:
+        """Query all configured providers concurrently, through the search cache.
+
+        Returns the merged result and the cache state (fresh/stale/miss).
+        Concurrent misses for the same key share one upstream fan-out, and
+        limiter (a semaphore) bounds how many fan-outs reach providers at
+        once. Partial results are cached as already stale so the next call
+        revalidates them. on_result only fires when providers are actually
+        queried, i.e. on a cache miss.
+        """
+        key, query = normalize_search_args(tool, args, self.tool_fields.get(tool))
+        ttl = self.search_cache.ttl_for(tool)
+
+        shared_ttl = None
+
+        def ttl_of(search: FanOutResult) -> float:
+            if search.partial:
+                return 0
+            # Results from another worker keep that worker's expiry
+            return min(ttl, shared_ttl) if shared_ttl is not None else ttl
+
+        async def query_providers() -> FanOutResult:
+            if limiter is None:
+                search = await fan_out(self.http_client, self.providers, deal_type, query, on_result=on_result)
+            else:
+                async with limiter:
+                    search = await fan_out(self.http_client, self.providers, deal_type, query, on_result=on_result)
+            for result in search.providers:
+                self.metrics.provider_result(result.provider, result.status, result.latency_ms)
+            if self.price_history is not None:
+                self.price_history.record(search.deals)
+            return search
+
+        async def load() -> FanOutResult:
+            nonlocal shared_ttl
+            if self.shared_cache is None:
+                return await query_providers()
+            search, shared_ttl = await self.shared_cache.get_or_load(key, query_providers, ttl_of)
+            return search
+
+        return await self.single_flight.do(
+            ("fan_out", key),
+            lambda: self.search_cache.get_or_load(key, load, ttl, ttl_of=ttl_of),
+        )
+
+    @contextmanager
+    def streaming(self, tool: str, deal_types: tuple, budget_max=None):
+        """Progress reporter for the current request, or None.
+
+        Streaming is on when the client sent a progressToken with the call.
+        """
+        reporter = None
+        try:
+            ctx = self.server.request_context
+        except LookupError:
+            ctx = None  # called outside an MCP request
+        token = ctx.meta.progressToken if ctx is not None and ctx.meta is not None else None
+        if token is not None:
+            total = sum(count_providers(self.providers, deal_type) for deal_type in deal_types)
+            reporter = ProgressReporter(ctx.session, token, ctx.request_id, tool, total, budget_max)
+        try:
+            yield reporter
+        finally:
+            if reporter is not None:
+                reporter.close()
+
+    def remember_deals(self, deals) -> None:
+        """Record deals returned by a search in the deal index"""
+        self.deal_index.add_many(deals)
+
+    def deal_columns(self, deal_type: str) -> "DealColumns":
+        """Columnar view of indexed deals, rebuilt only when they changed"""
+        from scoring import DealColumns
+        self.deal_index.expire()
+        version = self.deal_index.version(deal_type)
+        cached = self._columns.get(deal_type)
+        if cached is None or cached[0] != version:
+            cached = (version, DealColumns(self.deal_index.deals(deal_type)))
+            self._columns[deal_type] = cached
+        return cached[1]
+
     async def search_flight_deals(self, args: dict) -> list[TextContent]:
         """Search for flight deals"""
+        if args.get("flexible_days") or args.get("whole_month"):
+            return await self.search_flight_calendar(args)
+        
         origin = args["origin"]
         destination = args["destination"]
         departure_date = args["departure_date"]
         return_date = args.get("return_date")
         budget_max = args.get("budget_max")
         
-        # Demo data - replace with real API calls
-        demo_deals = [
-            TravelDeal(
-                title=f"{origin} to {destination} Round-trip",
-                price=450,
-                original_price=680,
-                savings=230,
-                destination=destination,
-                dates=f"{departure_date} - {return_date}" if return_date else departure_date,
-                provider="Skyscanner",
-                rating=4.5,
-                url="https://skyscanner.com/deal123",
-                image_url="https://example.com/flight.jpg",
-                deal_type="flight"
-            ),
-            TravelDeal(
-                title=f"Direct Flight {origin}-{destination}",
-                price=520,
-                original_price=750,
-                savings=230,
-                destination=destination,
-                dates=f"{departure_date} - {return_date}" if return_date else departure_date,
-                provider="Expedia",
-                rating=4.3,
-                url="https://expedia.com/deal456",
-                image_url="https://example.com/flight2.jpg",
-                deal_type="flight"
-            )
-        ]
-        
-        # Filter by budget if provided
-        if budget_max:
-            demo_deals = [deal for deal in demo_deals if deal.price <= budget_max]
+        with self.streaming("search_flight_deals", ("flight",), budget_max) as reporter:
+            search, cache_state = await self.fan_out("search_flight_deals", "flight", args, on_result=reporter)
+        self.remember_deals(search.deals)
         
-        # Sort by savings
-        demo_deals.sort(key=lambda x: x.savings, reverse=True)
+        # The departure date picks the route's partition; best savings first
+        start, end = parse_dates(f"{departure_date} - {return_date}" if return_date else departure_date)
+        filters = dict(destination=destination, origin=origin, budget_max=budget_max or None, date_from=start, date_to=start, end=end)
+        top_deals = self.deal_index.query("flight", **filters, order_by="savings", limit=SEARCH_TOP_N)
+        deals_found, _ = self.deal_index.totals("flight", **filters)
         
         result = {
             "search_params": args,
-            "deals_found": len(demo_deals),
-            "best_savings": f"${demo_deals[0].savings:.0f}" if demo_deals else "N/A",
+            "deals_found": deals_found,
+            "best_savings": f"${top_deals[0].savings:.0f}" if top_deals else "N/A",
             "deals": [
                 {
                     "title": deal.title,
@@ -267,13 +493,76 @@ class TravelDealsServer:
                     "dates": deal.dates,
                     "url": deal.url
                 }
-                for deal in demo_deals[:5]  # Top 5 deals
-            ]
+                for deal in top_deals
+            ],
+            "search_metadata": {**search.metadata(), "cache": cache_state}
         }
         
         return [TextContent(
             type="text", 
-            text=f"🛫 Flight Deals Found!\n\n{json.dumps(result, indent=2)}"
+            text=f"🛫 Flight Deals Found!\n\n{self.encoder.dumps(result)}"
+        )]
+
+    async def search_flight_calendar(self, args: dict) -> list[TextContent]:
+        """Cheapest flight per departure/return date pair"""
+        departures, returns, cells = calendar_cells(
+            args["departure_date"],
+            args.get("return_date"),
+            flexible_days=int(args.get("flexible_days") or 0),
+            whole_month=bool(args.get("whole_month"))
+        )
+        if len(cells) > CALENDAR_MAX_CELLS:
+            raise ValueError(f"Calendar of {len(cells)} dates exceeds the limit of {CALENDAR_MAX_CELLS}")
+        budget_max = args.get("budget_max")
+        
+        # One cached, coalesced search per cell; overlapping windows share cells
+        route = {"origin": args["origin"], "destination": args["destination"]}
+        if budget_max:
+            route["budget_max"] = budget_max
+        searches = await asyncio.gather(*[
+            self.fan_out(
+                "search_flight_deals", "flight",
+                {**route, "departure_date": departure, **({"return_date": back} if back else {})},
+                limiter=self.calendar_limiter
+            )
+            for departure, back in cells
+        ])
+        
+        calendar = []
+        for (departure, back), (search, cache_state) in zip(cells, searches):
+            self.remember_deals(search.deals)
+            affordable = [deal for deal in search.deals if not budget_max or deal.price <= budget_max]
+            best = min(affordable, key=lambda deal: deal.price) if affordable else None
+            calendar.append({
+                "departure_date": departure,
+                "return_date": back,
+                "min_price": best.price if best else None,
+                "deals": len(affordable),
+                "partial": search.partial,
+                "cache": cache_state,
+                **({"title": best.title, "provider": best.provider, "url": best.url} if best else {})
+            })
+        
+        priced = [cell for cell in calendar if cell["min_price"] is not None]
+        cheapest = min(priced, key=lambda cell: cell["min_price"]) if priced else None
+        prices = {(cell["departure_date"], cell["return_date"]): cell["min_price"] for cell in calendar}
+        
+        result = {
+            "search_params": args,
+            "dates_searched": len(cells),
+            "dates_from_cache": sum(1 for cell in calendar if cell["cache"] != "miss"),
+            "cheapest": cheapest,
+            "grid": {
+                "departure_dates": departures,
+                "return_dates": returns,
+                "min_prices": [[prices.get((departure, back)) for back in returns] for departure in departures]
+            },
+            "calendar": calendar
+        }
+        
+        return [TextContent(
+            type="text",
+            text=f"📅 Flight Price Calendar\n\n{self.encoder.dumps(result)}"
         )]
 
     async def search_hotel_deals(self, args: dict) -> list[TextContent]:
@@ -284,45 +573,19 @@ class TravelDealsServer:
         guests = args.get("guests", 2)
         budget_max = args.get("budget_max")
         
-        # Demo data
-        demo_deals = [
-            TravelDeal(
-                title=f"Luxury Hotel in {destination}",
-                price=180,
-                original_price=280,
-                savings=100,
-                destination=destination,
-                dates=f"{checkin} - {checkout}",
-                provider="Booking.com",
-                rating=4.7,
-                url="https://booking.com/hotel123",
-                image_url="https://example.com/hotel.jpg",
-                deal_type="hotel"
-            ),
-            TravelDeal(
-                title=f"Boutique Hotel {destination}",
-                price=145,
-                original_price=220,
-                savings=75,
-                destination=destination,
-                dates=f"{checkin} - {checkout}",
-                provider="Hotels.com",
-                rating=4.4,
-                url="https://hotels.com/hotel456",
-                image_url="https://example.com/hotel2.jpg",
-                deal_type="hotel"
-            )
-        ]
+        with self.streaming("search_hotel_deals", ("hotel",), budget_max) as reporter:
+            search, cache_state = await self.fan_out("search_hotel_deals", "hotel", args, on_result=reporter)
+        self.remember_deals(search.deals)
         
-        if budget_max:
-            demo_deals = [deal for deal in demo_deals if deal.price <= budget_max]
-            
-        demo_deals.sort(key=lambda x: x.savings, reverse=True)
+        start, end = parse_dates(f"{checkin} - {checkout}")
+        filters = dict(destination=destination, origin="", budget_max=budget_max or None, date_from=start, date_to=start, end=end)
+        top_deals = self.deal_index.query("hotel", **filters, order_by="savings", limit=SEARCH_TOP_N)
+        deals_found, total_savings = self.deal_index.totals("hotel", **filters)
         
         result = {
             "search_params": args,
-            "deals_found": len(demo_deals),
-            "avg_savings": f"${sum(deal.savings for deal in demo_deals)/len(demo_deals):.0f}" if demo_deals else "N/A",
+            "deals_found": deals_found,
+            "avg_savings": f"${total_savings/deals_found:.0f}" if deals_found else "N/A",
             "deals": [
                 {
                     "title": deal.title,
@@ -334,88 +597,260 @@ class TravelDealsServer:
                     "rating": deal.rating,
                     "url": deal.url
                 }
-                for deal in demo_deals[:5]
-            ]
+                for deal in top_deals
+            ],
+            "search_metadata": {**search.metadata(), "cache": cache_state}
         }
         
         return [TextContent(
             type="text",
-            text=f"🏨 Hotel Deals Found!\n\n{json.dumps(result, indent=2)}"
+            text=f"🏨 Hotel Deals Found!\n\n{self.encoder.dumps(result)}"
         )]
 
     async def search_package_deals(self, args: dict) -> list[TextContent]:
         """Search for vacation package deals"""
-        # Implementation similar to above
+        departure_date = args["departure_date"]
+        return_date = args["return_date"]
+        budget_max = args.get("budget_max")
+        nights = max((datetime.strptime(return_date, "%Y-%m-%d") - datetime.strptime(departure_date, "%Y-%m-%d")).days, 1)
+        
+        flight_args = {
+            "origin": args["origin"],
+            "destination": args["destination"],
+            "departure_date": departure_date,
+            "return_date": return_date
+        }
+        hotel_args = {
+            "destination": args["destination"],
+            "checkin_date": departure_date,
+            "checkout_date": return_date
+        }
+        with self.streaming("search_package_deals", ("flight", "hotel")) as reporter:
+            (flights, flight_cache), (hotels, hotel_cache) = await asyncio.gather(
+                self.fan_out("search_flight_deals", "flight", flight_args, on_result=reporter),
+                self.fan_out("search_hotel_deals", "hotel", hotel_args, on_result=reporter)
+            )
+        
+        self.remember_deals(flights.deals)
+        self.remember_deals(hotels.deals)
+        packages, examined = top_k_packages(flights.deals, hotels.deals, nights, k=PACKAGE_TOP_K, budget_max=budget_max)
+        self.remember_deals(package.to_travel_deal() for package in packages)
+        
         result = {
-            "message": "Package deals feature coming soon!",
-            "search_params": args
+            "search_params": args,
+            "deals_found": len(packages),
+            "best_savings": f"${packages[0].savings:.0f}" if packages else "N/A",
+            "deals": [
+                {
+                    "title": f"{package.flight.title} + {package.hotel.title}",
+                    "total_price": package.price,
+                    "original_price": package.original_price,
+                    "savings": package.savings,
+                    "savings_percent": f"{(package.savings/package.original_price)*100:.0f}%",
+                    "nights": nights,
+                    "flight": {
+                        "title": package.flight.title,
+                        "price": package.flight.price,
+                        "provider": package.flight.provider,
+                        "url": package.flight.url
+                    },
+                    "hotel": {
+                        "title": package.hotel.title,
+                        "price_per_night": package.hotel.price,
+                        "provider": package.hotel.provider,
+                        "rating": package.hotel.rating,
+                        "url": package.hotel.url
+                    }
+                }
+                for package in packages
+            ],
+            "search_metadata": {
+                "partial": flights.partial or hotels.partial,
+                "combinations_examined": examined,
+                "combinations_possible": len(flights.deals) * len(hotels.deals),
+                "flights": {**flights.metadata(), "cache": flight_cache},
+                "hotels": {**hotels.metadata(), "cache": hotel_cache}
+            }
         }
-        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        
+        return [TextContent(
+            type="text",
+            text=f"🧳 Package Deals Found!\n\n{self.encoder.dumps(result)}"
+        )]
 
     async def get_destination_insights(self, args: dict) -> list[TextContent]:
-        """Get destination insights"""
+        """Get destination insights from the price history rollups"""
         destination = args["destination"]
+        month = parse_month(args["travel_month"]) if args.get("travel_month") else None
+        history = await self.price_history.insights(destination, month) if self.price_history is not None else {"observations": 0}
         
         insights = {
             "destination": destination,
-            "best_time_to_visit": "April-June, September-November",
-            "avg_temperature": "22°C (72°F)",
-            "currency": "EUR",
-            "top_attractions": ["Eiffel Tower", "Louvre Museum", "Notre Dame"],
+            "best_time_to_visit": (
+                history["cheapest_months"] if history["observations"]
+                else "Not enough price history yet - run a few searches first"
+            ),
             "travel_tips": [
                 "Book flights 6-8 weeks in advance for best deals",
                 "Consider off-season travel for 40% savings",
                 "Use public transport for budget-friendly local travel"
             ],
-            "current_deals_available": 12,
-            "avg_savings_this_month": "34%"
+            # Deals are indexed under the place form their search tool uses
+            "current_deals_available": sum(
+                self.deal_index.totals(deal_type, destination=canonical_place(destination, PLACE_FORMS[tool]["destination"]))[0]
+                for deal_type, tool in (("flight", "search_flight_deals"), ("hotel", "search_hotel_deals"))
+            ),
+            "avg_savings_travelling_this_month": {
+                deal_type: summary["avg_savings"]
+                for deal_type, summary in history.get("travelling_this_month", {}).get("by_type", {}).items()
+            } or "N/A",
+            "price_history": history
         }
         
         return [TextContent(
             type="text",
-            text=f"🌍 {destination} Travel Insights\n\n{json.dumps(insights, indent=2)}"
+            text=f"🌍 {destination} Travel Insights\n\n{self.encoder.dumps(insights)}"
         )]
 
     async def compare_deals(self, args: dict) -> list[TextContent]:
-        """Compare deals"""
+        """Compare deals from recent searches"""
         deal_type = args["deal_type"]
         criteria = args["criteria"]
+        if deal_type not in DEAL_TYPES:
+            raise ValueError(f"Unknown deal type: {deal_type}")
+        
+        from scoring import top_n
+        columns = self.deal_columns(DEAL_TYPES[deal_type])
+        indices, scores = top_n(columns, criteria, COMPARE_TOP_N)
+        ranked = [(columns.deals[i], columns.nights[i], score) for i, score in zip(indices, scores)]
         
         comparison = {
             "comparison_type": f"{deal_type} by {criteria}",
+            "deals_compared": len(columns),
             "top_deals": [
-                {"rank": 1, "deal": "Paris Flight Deal", "score": 95, "value": "$230 savings"},
-                {"rank": 2, "deal": "London Hotel Deal", "score": 89, "value": "$180 savings"},
-                {"rank": 3, "deal": "Tokyo Package Deal", "score": 85, "value": "$450 savings"}
+                {
+                    "rank": rank,
+                    "deal": deal.title,
+                    "destination": deal.destination,
+                    "provider": deal.provider,
+                    "price": deal.price,
+                    "rating": deal.rating,
+                    "score": round(float(score)),
+                    "value": f"${deal.savings * nights:.0f} savings"
+                }
+                for rank, (deal, nights, score) in enumerate(ranked, start=1)
             ],
-            "recommendation": "Paris Flight Deal offers the best value based on your criteria"
+            "recommendation": (
+                f"{ranked[0][0].title} offers the best value based on your criteria"
+                if ranked else f"No recent {deal_type} to compare yet - run a search first"
+            )
         }
         
         return [TextContent(
             type="text",
-            text=f"📊 Deal Comparison Results\n\n{json.dumps(comparison, indent=2)}"
+            text=f"📊 Deal Comparison Results\n\n{self.encoder.dumps(comparison)}"
         )]
 
+    def initialization_options(self) -> InitializationOptions:
+        """Initialization options shared by every transport"""
+        return InitializationOptions(
+            server_name="travel-deals-mcp",
+            server_version="1.0.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={},
+            ),
+        )
+
+    async def aclose(self):
+        """Stop background work and release shared connections"""
+        await self.deal_alerts.stop()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        if self.shared_cache is not None:
+            self.shared_cache.close()
+        if self.price_history is not None:
+            await self.price_history.aclose()
+
     async def run(self):
-        """Run the MCP server"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="travel-deals-mcp",
-                    server_version="1.0.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=None,
-                        experimental_capabilities=None,
-                    ),
-                ),
-            )
+        """Run the MCP server over stdio (one client per process)"""
+        self.deal_alerts.start()
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.initialization_options(),
+                )
+        finally:
+            await self.aclose()
+
+    async def run_http(self, host: str, port: int, sockets=None, stateless: bool = False, limit_max_requests=None):
+        """Serve many clients over Streamable HTTP / SSE from one process"""
+        from http_transport import run_http
+        await run_http(
+            self, host, port,
+            sockets=sockets, stateless=stateless, limit_max_requests=limit_max_requests,
+        )
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TravelDeals MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("MCP_TRANSPORT", "stdio"),
+        help="stdio for a single spawned client, http to serve many clients (default: stdio)"
+    )
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_WORKERS", "1")),
+        help="HTTP worker processes sharing the port and a cross-process cache (default: 1)"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default=OUTPUT_FORMAT,
+        help="JSON layout of tool and resource responses (default: compact, or OUTPUT_FORMAT)"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="log import, init and first list_tools timings to stderr (also MCP_PROFILE_STARTUP=1)"
+    )
+    # Set by the worker supervisor: serve on this inherited listening socket
+    parser.add_argument("--worker-fd", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def run_workers(args: argparse.Namespace) -> int:
+    """Supervise args.workers HTTP worker processes on one port"""
+    from workers import Supervisor
+    command = [sys.executable, os.path.abspath(__file__), "--transport", "http", "--host", args.host, "--port", str(args.port), "--output-format", args.output_format]
+    return Supervisor(command, args.host, args.port, workers=args.workers, shared_cache_path=SHARED_CACHE_PATH).run()
 
-async def main():
+async def main(args: argparse.Namespace):
     """Main entry point"""
-    server = TravelDealsServer()
-    await server.run()
+    if args.profile_startup:
+        startup_profile.enabled = True
+    server = TravelDealsServer(output_format=args.output_format)
+    startup_profile.mark("server init")
+    if args.worker_fd is not None:
+        from workers import worker_request_limit
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)  # reloads are driven by the supervisor
+        sock = socket.socket(fileno=args.worker_fd)
+        await server.run_http(
+            args.host, args.port,
+            sockets=[sock], stateless=True, limit_max_requests=worker_request_limit(),
+        )
+    elif args.transport == "http":
+        await server.run_http(args.host, args.port)
+    else:
+        await server.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.transport == "http" and args.workers > 1 and args.worker_fd is None:
+        sys.exit(run_workers(args))
+    asyncio.run(main(args))
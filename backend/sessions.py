@@ -0,0 +1,76 @@
+"""
+TravelDeals client limits
+Per-client concurrency caps with bounded queueing
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, Optional
+
+# Tool calls one client may run at once, and how long extra calls wait
+SESSION_MAX_CONCURRENCY = int(os.getenv("SESSION_MAX_CONCURRENCY", "8"))
+SESSION_QUEUE_TIMEOUT = float(os.getenv("SESSION_QUEUE_TIMEOUT", "5"))
+
+
+class SessionBusyError(Exception):
+    """A client has too many tool calls queued"""
+
+
+class _Slots:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.users = 0  # calls running or queued
+
+
+class SessionLimiter:
+    """Caps concurrent tool calls per client.
+
+    Calls beyond the cap wait up to queue_timeout seconds for a slot and are
+    then rejected, so one chatty client cannot monopolise a shared server.
+    The key is whatever identifies a client across its requests (the
+    server uses the HTTP client address, or the session over stdio); its
+    slots are dropped once it has no call running or queued.
+    """
+
+    def __init__(self, max_concurrency: int = SESSION_MAX_CONCURRENCY, queue_timeout: float = SESSION_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots: Dict[Hashable, _Slots] = {}
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def stats(self) -> dict:
+        return {**self.counters, "clients": len(self._slots), "max_concurrency": self.max_concurrency}
+
+    @asynccontextmanager
+    async def slot(self, client: Optional[Hashable]) -> AsyncIterator[None]:
+        if client is None:
+            yield
+            return
+
+        slots = self._slots.get(client)
+        if slots is None:
+            slots = self._slots[client] = _Slots(self.max_concurrency)
+        slots.users += 1
+        try:
+            if slots.semaphore.locked():
+                self.counters["queued"] += 1
+            try:
+                await asyncio.wait_for(slots.semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["rejected"] += 1
+                raise SessionBusyError(
+                    f"Too many concurrent requests from this client (limit {self.max_concurrency}); retry shortly"
+                )
+
+            self.counters["admitted"] += 1
+            try:
+                yield
+            finally:
+                slots.semaphore.release()
+        finally:
+            slots.users -= 1
+            if slots.users == 0:
+                del self._slots[client]
@@ -0,0 +1,183 @@
+"""
+TravelDeals shared cache tier
+SQLite-backed search-result cache shared by the worker processes on one host
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Database file; unset disables the tier unless the pre-fork supervisor sets one
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH") or None
+
+# How long another worker's in-flight fetch of the same key holds off the rest
+SHARED_CACHE_LEASE = float(os.getenv("SHARED_CACHE_LEASE", "5"))
+SHARED_CACHE_POLL = 0.05
+
+# Expired rows are swept every this many writes
+_SWEEP_EVERY = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SharedCache:
+    """Fresh search results shared between processes through one SQLite file.
+
+    Sits behind the per-process SearchCache: a local miss checks here before
+    querying providers, and complete results are written back. A lease row
+    lets the first worker to miss a key fetch it while the others wait for
+    its result instead of hitting providers with the same query. All SQLite
+    work runs on one background thread so the event loop never blocks on
+    disk.
+    """
+
+    def __init__(self, path: str, lease: float = SHARED_CACHE_LEASE, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.lease = lease
+        self.clock = clock
+        self.owner = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._writes = 0
+        self.counters = {"hits": 0, "misses": 0, "waits": 0, "wait_hits": 0, "writes": 0, "errors": 0}
+
+    def stats(self) -> dict:
+        return {**self.counters, "path": self.path, "pid": self.owner}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # Blocking helpers, only ever called on the executor thread
+
+    def _get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        row = self._db.execute(
+            "SELECT value, expires FROM entries WHERE key = ? AND expires > ?", (key, self.clock())
+        ).fetchone()
+        return row
+
+    def _put(self, key: str, blob: bytes, expires: float) -> None:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)", (key, blob, expires))
+            self._db.execute("DELETE FROM leases WHERE key = ?", (key,))
+            self._writes += 1
+            if self._writes % _SWEEP_EVERY == 0:
+                now = self.clock()
+                self._db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+                self._db.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _get_or_claim(self, key: str) -> Tuple[Optional[Tuple[bytes, float]], bool]:
+        """Fresh row for key, or take its fetch lease; (None, False) if another worker holds it"""
+        now = self.clock()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT value, expires FROM entries WHERE key = ? AND expires > ?", (key, now)).fetchone()
+            claimed = False
+            if row is None:
+                self._db.execute("DELETE FROM leases WHERE key = ? AND expires <= ?", (key, now))
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)", (key, self.owner, now + self.lease)
+                )
+                claimed = cursor.rowcount == 1
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return row, claimed
+
+    def _release(self, key: str) -> None:
+        self._db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    # Async API
+
+    async def get(self, key: Hashable) -> Tuple[Optional[Any], float]:
+        """Return (value, remaining TTL) for a fresh entry, else (None, 0)"""
+        row = await self._run(self._get, repr(key))
+        if row is None:
+            return None, 0.0
+        return pickle.loads(row[0]), row[1] - self.clock()
+
+    async def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            await self._run(self._release, repr(key))
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        await self._run(self._put, repr(key), blob, self.clock() + ttl)
+        self.counters["writes"] += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_of: Callable[[Any], float],
+    ) -> Tuple[Any, Optional[float]]:
+        """Return (value, remaining TTL if it came from the shared tier).
+
+        Falls back to loader() whenever the database is unavailable, so a
+        broken shared tier degrades to per-process caching.
+        """
+        try:
+            # Lookup and lease in one transaction, so a result written just
+            # after our miss is never fetched a second time
+            row, claimed = await self._run(self._get_or_claim, repr(key))
+            if row is not None:
+                self.counters["hits"] += 1
+                return pickle.loads(row[0]), row[1] - self.clock()
+            self.counters["misses"] += 1
+
+            if not claimed:
+                # Another worker is fetching this key; wait for its result, or
+                # take over as soon as its lease is gone without one (it
+                # failed, got a partial result, or the lease expired)
+                self.counters["waits"] += 1
+                while not claimed:
+                    await asyncio.sleep(SHARED_CACHE_POLL)
+                    row, claimed = await self._run(self._get_or_claim, repr(key))
+                    if row is not None:
+                        self.counters["wait_hits"] += 1
+                        return pickle.loads(row[0]), row[1] - self.clock()
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Shared cache unavailable: {e}")
+            return await loader(), None
+
+        try:
+            value = await loader()
+        except BaseException:
+            await self._run(self._release, repr(key))
+            raise
+        try:
+            await self.put(key, value, ttl_of(value))
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Shared cache write failed: {e}")
+        return value, None
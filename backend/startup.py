@@ -0,0 +1,55 @@
+"""
+TravelDeals startup profile
+Wall-clock marks from the start of server.py to its first list_tools answer
+"""
+
+import logging
+import os
+import time
+from typing import List, Tuple
+
+logger = logging.getLogger("travel-deals-mcp")
+
+# Log the profile once the first list_tools is answered (also --profile-startup)
+PROFILE_STARTUP = os.getenv("MCP_PROFILE_STARTUP", "0") != "0"
+
+
+class StartupProfile:
+    """Named points in server startup, timed from this module's import.
+
+    server.py imports it before anything else, so the intervals cover the
+    imports that follow, building the server and waiting for the client.
+    Marks are always recorded (a clock read each); finish() logs them when
+    profiling is enabled.
+    """
+
+    def __init__(self, enabled: bool = PROFILE_STARTUP):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.finished = False
+
+    def mark(self, name: str) -> None:
+        self.marks.append((name, time.perf_counter()))
+
+    def intervals(self) -> List[Tuple[str, float]]:
+        """(mark, milliseconds since the previous mark)"""
+        previous, intervals = self.started, []
+        for name, at in self.marks:
+            intervals.append((name, (at - previous) * 1000))
+            previous = at
+        return intervals
+
+    def finish(self, name: str) -> None:
+        """Record the final mark and log the profile (once)"""
+        if self.finished:
+            return
+        self.finished = True
+        self.mark(name)
+        if self.enabled:
+            total = (self.marks[-1][1] - self.started) * 1000
+            parts = ", ".join(f"{mark} {ms:.1f}ms" for mark, ms in self.intervals())
+            logger.info(f"startup: {parts} (total {total:.1f}ms)")
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,213 @@
+"""
+TravelDeals worker supervisor
+Runs several HTTP worker processes on one shared listening socket
+"""
+
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("travel-deals-mcp")
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+
+# Recycle a worker after this many requests (0 = never), staggered by up to
+# the jitter so workers do not all restart at once
+WORKER_MAX_REQUESTS = int(os.getenv("WORKER_MAX_REQUESTS", "0"))
+WORKER_MAX_REQUESTS_JITTER = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", "0"))
+
+# Recycle a worker whose resident memory grows past this (0 = never)
+WORKER_MAX_RSS_MB = int(os.getenv("WORKER_MAX_RSS_MB", "0"))
+
+# How long a retiring worker may drain in-flight requests before SIGKILL
+WORKER_GRACEFUL_TIMEOUT = float(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+
+# Minimum delay between replacing workers that crash on startup
+_RESPAWN_BACKOFF = 1.0
+_TICK = 0.2
+
+
+def worker_request_limit() -> Optional[int]:
+    """Requests this worker serves before exiting to be replaced"""
+    if WORKER_MAX_REQUESTS <= 0:
+        return None
+    return WORKER_MAX_REQUESTS + random.randint(0, max(WORKER_MAX_REQUESTS_JITTER, 0))
+
+
+def _rss_mb(pid: int) -> float:
+    """Resident set size of a process from /proc (Linux); 0 if unavailable"""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+@dataclass
+class _Worker:
+    process: subprocess.Popen
+    generation: int
+    started: float = field(default_factory=time.monotonic)
+    retiring_since: Optional[float] = None
+
+
+class Supervisor:
+    """Keeps N worker processes serving one listening socket.
+
+    The supervisor binds the socket once and starts each worker with the
+    socket's descriptor inherited; the kernel spreads incoming connections
+    across them. Workers are fresh interpreters, so a reload picks up new
+    code and configuration.
+
+    SIGHUP   graceful reload: start a new generation, then drain the old one
+    SIGTERM / SIGINT   drain all workers and exit
+    Workers that exit (crash, request limit) are replaced; workers over
+    the memory limit are drained and replaced.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        host: str,
+        port: int,
+        workers: int = WEB_WORKERS,
+        shared_cache_path: Optional[str] = None,
+        max_rss_mb: int = WORKER_MAX_RSS_MB,
+        graceful_timeout: float = WORKER_GRACEFUL_TIMEOUT,
+    ):
+        self.command = command
+        self.host = host
+        self.port = port
+        self.workers = max(workers, 1)
+        self.shared_cache_path = shared_cache_path
+        self.max_rss_mb = max_rss_mb
+        self.graceful_timeout = graceful_timeout
+
+        self.generation = 0
+        self._pool: Dict[int, _Worker] = {}
+        self._reload = False
+        self._stopping = False
+        self._next_spawn = 0.0
+        self.counters = {"spawned": 0, "exited": 0, "recycled": 0, "reloads": 0}
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self, sock: socket.socket) -> None:
+        # Each worker holds its own token buckets, so it gets 1/N of every quota
+        env = {**os.environ, "SHARED_CACHE_PATH": self.shared_cache_path, "PROVIDER_QUOTA_SHARES": str(self.workers)}
+        process = subprocess.Popen(
+            [*self.command, "--worker-fd", str(sock.fileno())],
+            pass_fds=(sock.fileno(),),
+            env=env,
+        )
+        self._pool[process.pid] = _Worker(process, self.generation)
+        self.counters["spawned"] += 1
+        logger.info(f"Started worker {process.pid} (generation {self.generation})")
+
+    def retire(self, worker: _Worker, reason: str) -> None:
+        if worker.retiring_since is not None:
+            return
+        worker.retiring_since = time.monotonic()
+        logger.info(f"Draining worker {worker.process.pid}: {reason}")
+        try:
+            worker.process.send_signal(signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _handle_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stopping = True
+
+    def _reap(self) -> None:
+        now = time.monotonic()
+        for pid, worker in list(self._pool.items()):
+            code = worker.process.poll()
+            if code is None:
+                if worker.retiring_since is not None and now - worker.retiring_since > self.graceful_timeout:
+                    logger.warning(f"Worker {pid} did not drain in {self.graceful_timeout}s; killing it")
+                    worker.process.kill()
+                continue
+            del self._pool[pid]
+            self.counters["exited"] += 1
+            if worker.retiring_since is None and not self._stopping:
+                logger.info(f"Worker {pid} exited with code {code}; replacing it")
+                if code != 0 and now - worker.started < _RESPAWN_BACKOFF:
+                    self._next_spawn = now + _RESPAWN_BACKOFF
+
+    def _check_memory(self) -> None:
+        if self.max_rss_mb <= 0:
+            return
+        for pid, worker in self._pool.items():
+            if worker.retiring_since is None and _rss_mb(pid) > self.max_rss_mb:
+                self.counters["recycled"] += 1
+                self.retire(worker, f"RSS above {self.max_rss_mb} MB")
+
+    def _active(self) -> List[_Worker]:
+        return [
+            worker for worker in self._pool.values()
+            if worker.generation == self.generation and worker.retiring_since is None
+        ]
+
+    def run(self) -> int:
+        """Supervise workers until stopped; returns the process exit code"""
+        private_dir = None
+        if self.shared_cache_path is None:
+            # Workers unpickle the cached results, so by default the database
+            # lives in a fresh directory only this user can open (mkdtemp
+            # makes it 0700), never at a guessable path in the temp directory
+            private_dir = tempfile.mkdtemp(prefix=f"travel-deals-cache-{self.port}-")
+            self.shared_cache_path = os.path.join(private_dir, "cache.sqlite3")
+
+        # Make sure the shared cache schema exists before workers race to create it
+        from shared_cache import SharedCache
+        SharedCache(self.shared_cache_path).close()
+
+        sock = self.bind()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._handle_signal)
+        logger.info(f"Serving on {self.host}:{self.port} with {self.workers} workers (shared cache {self.shared_cache_path})")
+
+        try:
+            while not self._stopping:
+                self._reap()
+                if self._reload:
+                    # Old workers finish in-flight requests; new connections
+                    # wait in the shared socket's backlog for the new generation
+                    self._reload = False
+                    self.counters["reloads"] += 1
+                    self.generation += 1
+                    for worker in list(self._pool.values()):
+                        if worker.generation < self.generation:
+                            self.retire(worker, "reload")
+                self._check_memory()
+                if time.monotonic() >= self._next_spawn:
+                    for _ in range(self.workers - len(self._active())):
+                        self.spawn(sock)
+                time.sleep(_TICK)
+        finally:
+            for worker in list(self._pool.values()):
+                self.retire(worker, "shutdown")
+            while self._pool:
+                self._reap()
+                time.sleep(_TICK)
+            sock.close()
+            if private_dir:
+                shutil.rmtree(private_dir, ignore_errors=True)
+        return 0
@@ -0,0 +1,208 @@
+"""
+Browserbase price extraction
+Reads listing prices from the JSON a page fetches instead of from pixels
+"""
+
+import asyncio
+import os
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from playwright.async_api import Page, Request, Response, Route
+
+# Resource types never downloaded while extracting
+BLOCKED_RESOURCE_TYPES = frozenset(
+    os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font").split(",")
+)
+
+# JSON responses read for listing data: Airbnb's PDP section and booking
+# queries, and the stub site's stay API
+PRICE_RESPONSE_PATTERN = re.compile(
+    os.getenv("PRICE_RESPONSE_PATTERN", r"StaysPdpSections|StaysPdpBookIt|PdpAvailability|/api/stays/")
+)
+
+# Milliseconds to wait for a priced response before falling back to the page text
+PRICE_RESPONSE_TIMEOUT = float(os.getenv("PRICE_RESPONSE_TIMEOUT", "15000"))
+
+PROVIDER = "Airbnb"
+
+# Keys each field is found under, in order of preference; the first match
+# closest to the top of the payload wins
+FIELD_KEYS = {
+    "total": ("total", "totalPrice", "total_price", "grandTotal"),
+    "nightly": ("nightly", "perNight", "pricePerNight", "nightlyPrice"),
+    "original": ("originalPrice", "original_price", "strikethrough", "strikethroughPrice"),
+    "price": ("price", "discountedPrice", "amount", "priceString"),
+    "rating": ("rating", "avgRating", "guestSatisfactionOverall", "starRating", "reviewScore"),
+    "title": ("title", "listingTitle", "name"),
+    "city": ("city", "localizedCity", "location"),
+    "check_in": ("check_in", "checkIn", "checkin"),
+    "check_out": ("check_out", "checkOut", "checkout"),
+}
+
+AMOUNT = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """A number from 123.4, "123.4" or a display string like "$1,234 total" """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = AMOUNT.search(value)
+        if match:
+            return float(match.group().replace(",", ""))
+    return None
+
+
+def find_fields(payload: Any, found: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Scalar values of FIELD_KEYS found breadth-first in a JSON payload.
+
+    A price key holding an object ({"price": {"total": 10}}) is searched
+    like any other object, so nested price breakdowns are picked up too.
+    """
+    found = {} if found is None else found
+    level = [payload]
+    while level:
+        children = []
+        for node in level:
+            items = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else ()
+            for key, value in items:
+                if isinstance(value, (dict, list)):
+                    children.append(value)
+                elif value not in (None, ""):
+                    for field, keys in FIELD_KEYS.items():
+                        if field not in found and key in keys:
+                            found[field] = value
+        level = children
+    return found
+
+
+def has_price(payload: Any) -> bool:
+    fields = find_fields(payload)
+    return any(parse_amount(fields.get(name)) for name in ("total", "nightly", "price"))
+
+
+def _nights(check_in: str, check_out: str) -> int:
+    try:
+        return max((date.fromisoformat(check_out) - date.fromisoformat(check_in)).days, 1)
+    except ValueError:
+        return 1
+
+
+def _rating(value: Any) -> float:
+    """Ratings on the 5-point scale the backend uses"""
+    rating = parse_amount(value) or 0.0
+    if rating > 10:
+        rating /= 20
+    elif rating > 5:
+        rating /= 2
+    return round(rating, 2)
+
+
+def listing_deal(url: str, payloads: List[Any], page_title: str = "", price_text: str = "") -> Optional[dict]:
+    """A TravelDeal-shaped record (per-night price, like the backend's hotel deals) for a listing.
+
+    Fields come from the captured payloads; dates fall back to the URL's
+    check_in/check_out, and the price to price_text read off the page
+    (a nightly rate unless it says "total").
+    Returns None when no price was found anywhere.
+    """
+    fields: Dict[str, Any] = {}
+    for payload in payloads:
+        find_fields(payload, fields)
+    query = parse_qs(urlparse(url).query)
+    check_in = str(fields.get("check_in") or query.get("check_in", [""])[0])
+    check_out = str(fields.get("check_out") or query.get("check_out", [""])[0])
+    nights = _nights(check_in, check_out)
+
+    total = parse_amount(fields.get("total"))
+    nightly = parse_amount(fields.get("nightly"))
+    price = parse_amount(fields.get("price"))
+    source = "network"
+    if total is None and nightly is None and price is None:
+        # The page shows either the stay's total ("$1,250 total") or a
+        # nightly rate ("$250 night"); only a total is divided by nights
+        amount, source = parse_amount(price_text), "page"
+        if amount is None:
+            return None
+        if "total" in price_text.casefold():
+            total = amount
+        else:
+            nightly = amount
+    if nightly is None:
+        nightly = total / nights if total is not None else price / nights
+    total = total if total is not None else nightly * nights
+    original = parse_amount(fields.get("original"))
+    original_nightly = max(original / nights if original else nightly, nightly)
+
+    return {
+        "title": str(fields.get("title") or page_title),
+        "price": round(nightly, 2),
+        "original_price": round(original_nightly, 2),
+        "savings": round(original_nightly - nightly, 2),
+        "destination": str(fields.get("city") or ""),
+        "dates": f"{check_in} - {check_out}",
+        "provider": PROVIDER,
+        "rating": _rating(fields.get("rating")),
+        "url": url,
+        "image_url": "",
+        "deal_type": "hotel",
+        "origin": "",
+        "total_price": round(total, 2),
+        "price_source": source,
+    }
+
+
+async def block_resources(page: Page, types=BLOCKED_RESOURCE_TYPES) -> None:
+    """Abort requests for images, media and fonts before they are sent"""
+    async def route(route: Route, request: Request) -> None:
+        if request.resource_type in types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", route)
+
+
+class ResponseCapture:
+    """JSON bodies of the listing-data responses a page receives.
+
+    Attach before navigating; wait() returns as soon as a captured
+    payload carries a price.
+    """
+
+    def __init__(self, page: Page, pattern: re.Pattern = PRICE_RESPONSE_PATTERN):
+        self.pattern = pattern
+        self.payloads: List[Any] = []
+        self.priced = asyncio.Event()
+        self._reads = set()
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response) -> None:
+        if not self.pattern.search(response.url):
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        task = asyncio.create_task(self._read(response))
+        self._reads.add(task)
+        task.add_done_callback(self._reads.discard)
+
+    async def _read(self, response: Response) -> None:
+        try:
+            payload = await response.json()
+        except Exception:
+            return  # body gone with the page, or not JSON after all
+        self.payloads.append(payload)
+        if has_price(payload):
+            self.priced.set()
+
+    async def wait(self, timeout_ms: float = PRICE_RESPONSE_TIMEOUT) -> bool:
+        try:
+            await asyncio.wait_for(self.priced.wait(), timeout_ms / 1000)
+            return True
+        except asyncio.TimeoutError:
+            return False
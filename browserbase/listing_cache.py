@@ -0,0 +1,160 @@
+"""
+Browserbase listing cache
+Remembers what each listing last looked like so repeat runs only scrape and emit changes
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+# Database file; empty disables the cache
+LISTING_CACHE_PATH = os.getenv("LISTING_CACHE_PATH", "listings.db")
+
+# Listings checked successfully within this many seconds are not scraped again
+LISTING_MAX_AGE = float(os.getenv("LISTING_MAX_AGE", str(24 * 3600)))
+
+# Query parameters that change what a listing page shows; the rest
+# (search ids, impression ids, ...) are tracking and dropped from the key
+KEY_PARAMS = ("check_in", "check_out", "adults", "children", "infants", "pets")
+DATE_PARAMS = ("check_in", "check_out")
+
+# Record fields that vary between scrapes without the listing changing
+VOLATILE_FIELDS = ("url", "price_source")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_hash TEXT,
+    record TEXT,
+    first_seen REAL NOT NULL,
+    checked_at REAL NOT NULL,
+    changed_at REAL,
+    ok INTEGER NOT NULL,
+    error TEXT
+);
+"""
+
+
+def _iso_date(value: str) -> str:
+    """YYYY-MM-DD for a date with or without zero padding; unparseable values pass through"""
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return value
+
+
+def listing_key(url: str) -> str:
+    """host/path?params for the URL, with only KEY_PARAMS kept, dates in ISO form, sorted and stripped of defaults"""
+    parsed = urlparse(url)
+    params = sorted(
+        (name, _iso_date(value) if name in DATE_PARAMS else value)
+        for name, value in parse_qsl(parsed.query)
+        if name in KEY_PARAMS and value not in ("", "0")
+    )
+    key = f"{parsed.netloc.lower().removeprefix('www.')}{parsed.path.rstrip('/')}"
+    return f"{key}?{urlencode(params)}" if params else key
+
+
+def content_hash(record: dict) -> str:
+    content = {name: value for name, value in record.items() if name not in VOLATILE_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class ListingCache:
+    """Last extracted record, content hash and check times of every listing.
+
+    plan() drops listings checked recently and orders the rest stalest
+    first (never-seen listings lead), so a run with a limit refreshes the
+    oldest data. record() stores a scrape and returns the record only if
+    the listing is new or its content hash changed, so callers emit just
+    the deltas. Writes run on one background thread so the event loop
+    never blocks on disk.
+    """
+
+    def __init__(self, path: str = LISTING_CACHE_PATH, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="listing-cache")
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.counters = {"fresh": 0, "new": 0, "changed": 0, "unchanged": 0, "failed": 0}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def plan(self, urls: Iterable[str], max_age: float = LISTING_MAX_AGE, limit: Optional[int] = None) -> List[str]:
+        """The URLs due for a scrape, one per listing, stalest first"""
+        checked = {
+            key: (checked_at, ok)
+            for key, checked_at, ok in self._db.execute("SELECT key, checked_at, ok FROM listings")
+        }
+        now = self.clock()
+        due: List[Tuple[float, str]] = []
+        seen = set()
+        for url in urls:
+            key = listing_key(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            checked_at, ok = checked.get(key, (0.0, False))
+            if ok and now - checked_at < max_age:
+                self.counters["fresh"] += 1
+                continue
+            due.append((checked_at, url))
+        due.sort(key=lambda item: item[0])
+        return [url for _, url in due[:limit]]
+
+    def _record(self, url: str, record: dict) -> Optional[dict]:
+        key, digest, now = listing_key(url), content_hash(record), self.clock()
+        row = self._db.execute("SELECT content_hash, record FROM listings WHERE key = ?", (key,)).fetchone()
+        if row is not None and row[0] == digest:
+            self._db.execute("UPDATE listings SET checked_at = ?, ok = 1, error = NULL WHERE key = ?", (now, key))
+            self.counters["unchanged"] += 1
+            return None
+        self._db.execute(
+            "INSERT INTO listings (key, url, content_hash, record, first_seen, checked_at, changed_at, ok)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, 1)"
+            " ON CONFLICT(key) DO UPDATE SET url = excluded.url, content_hash = excluded.content_hash,"
+            " record = excluded.record, checked_at = excluded.checked_at, changed_at = excluded.changed_at,"
+            " ok = 1, error = NULL",
+            (key, url, digest, json.dumps(record), now, now, now),
+        )
+        previous = json.loads(row[1]) if row is not None and row[1] else None
+        change = "new" if previous is None else "changed"
+        self.counters[change] += 1
+        return {**record, "change": change, "previous_price": previous and previous.get("price")}
+
+    def _record_failure(self, url: str, error: str) -> None:
+        now = self.clock()
+        self._db.execute(
+            "INSERT INTO listings (key, url, first_seen, checked_at, ok, error) VALUES (?, ?, ?, ?, 0, ?)"
+            " ON CONFLICT(key) DO UPDATE SET checked_at = excluded.checked_at, ok = 0, error = excluded.error",
+            (listing_key(url), url, now, now, error),
+        )
+        self.counters["failed"] += 1
+
+    async def record(self, url: str, record: dict) -> Optional[dict]:
+        """Store a scraped record; returns it (with change and previous_price) if new or changed, else None"""
+        return await self._run(self._record, url, record)
+
+    async def record_failure(self, url: str, error: str) -> None:
+        """Note a failed scrape; the listing stays due, behind ones not tried as recently"""
+        await self._run(self._record_failure, url, error)
+
+    def stats(self) -> dict:
+        listings, failing = self._db.execute("SELECT COUNT(*), SUM(ok = 0) FROM listings").fetchone()
+        return {**self.counters, "listings": listings, "failing": failing or 0}
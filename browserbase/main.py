@@ -1,9 +1,23 @@
-from playwright.sync_api import Playwright, sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Page, Playwright, async_playwright, TimeoutError as PlaywrightTimeoutError
 from browserbase import Browserbase
 import os
-from dotenv import load_dotenv
+import sys
+import json
 import time
-import re # For parsing prices
+import asyncio
+import argparse
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import urlopen
+from dotenv import load_dotenv
+
+import stub_site
+from extract import ResponseCapture, block_resources, listing_deal
+from listing_cache import LISTING_CACHE_PATH, LISTING_MAX_AGE, ListingCache
+from scraper import (
+    BROWSER_SESSIONS, ELEMENT_TIMEOUT, NAVIGATION_TIMEOUT, PAGES_PER_SESSION, VIEWPORT,
+    BrowserPool, BrowserSession, scrape,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,130 +26,200 @@ load_dotenv()
 BROWSERBASE_API_KEY = os.environ.get("BROWSERBASE_API_KEY")
 BROWSERBASE_PROJECT_ID = os.environ.get("BROWSERBASE_PROJECT_ID")
 
-if not BROWSERBASE_API_KEY:
-    raise ValueError("BROWSERBASE_API_KEY environment variable not set.")
-if not BROWSERBASE_PROJECT_ID:
-    raise ValueError("BROWSERBASE_PROJECT_ID environment variable not set.")
-
-bb = Browserbase(api_key=BROWSERBASE_API_KEY)
-
-def interact_with_airbnb(page: 'Page'): # Forward reference Page type hint
-    print("\n--- Starting Airbnb Interaction ---")
-    url = "https://www.airbnb.com/rooms/1423262814997006353?search_mode=regular_search&adults=1&check_in=2025-08-08&check_out=2025-08-13&children=0&infants=0&pets=0&source_impression_id=p3_1748640822_P3Oy4aNQJ_UwjG3g&previous_page_section_name=1000&federated_search_id=c74408c8-026c-4dd9-bfa1-f9120d0f9a6f"
-    print(f"Navigating to Airbnb URL: {url}")
-    page.goto(url, wait_until="domcontentloaded", timeout=90000)
-    page_title = page.title()
-    print(f"Page title: {page_title}")
-
-    print("Taking screenshot before any action on Airbnb...")
-    page.screenshot(path="screenshot_airbnb_before_action.png")
-    print("Screenshot 'screenshot_airbnb_before_action.png' saved.")
-
-    print("Scrolling down the Airbnb page...")
-    for _ in range(1): # Scroll PageDown once
-        page.keyboard.press("PageDown")
-        time.sleep(0.5)
-
-    print("Taking screenshot after scrolling on Airbnb...")
-    page.screenshot(path="screenshot_airbnb_after_scroll.png")
-    print("Screenshot 'screenshot_airbnb_after_scroll.png' saved.")
-
-    reserve_button_testid = "homes-pdp-cta-btn"
-    print(f"Attempting to find Airbnb reserve button with data-testid='{reserve_button_testid}'...")
-
-    reserve_buttons = page.get_by_test_id(reserve_button_testid)
-    count = reserve_buttons.count()
-    print(f"Found {count} elements with data-testid='{reserve_button_testid}'.")
-
-    if count == 0:
-        raise Exception(f"No element found with data-testid='{reserve_button_testid}'.")
-
-    target_button = None
-    if count == 1:
-        print("Found 1 Airbnb reserve button, attempting to click it.")
-        target_button = reserve_buttons
-    else:
-        print(f"Found {count} Airbnb reserve buttons. Attempting to click the last one that is visible.")
-        for i in range(count - 1, -1, -1):
-            btn = reserve_buttons.nth(i)
-            if btn.is_visible():
-                print(f"Airbnb reserve button at index {i} (from end) is visible. Selecting this one.")
-                target_button = btn
-                break
-        if not target_button:
-            print("No visible Airbnb reserve button found among the multiple matches. Defaulting to the last one in DOM.")
-            target_button = reserve_buttons.last()
-
-    print("Ensuring Airbnb reserve button is in view and clicking...")
-    target_button.scroll_into_view_if_needed(timeout=10000)
-    target_button.click(timeout=30000)
-    print("Clicked the Airbnb Reserve button successfully.")
-
-    print("Pausing for 3 seconds to observe the result of the Airbnb click...")
-    time.sleep(3)
-
-    print("Taking screenshot after clicking Airbnb 'Reserve' button...")
-    page.screenshot(path="screenshot_airbnb_after_click.png")
-    print("Screenshot 'screenshot_airbnb_after_click.png' saved.")
-    print("--- Finished Airbnb Interaction ---")
-
-
-
-def run(playwright: Playwright) -> None:
-    print("Creating Browserbase session...")
-    session = bb.sessions.create(project_id=BROWSERBASE_PROJECT_ID)
-    print(f"Session created: {session.id}")
-    print(f"View live session or replay at: https://browserbase.com/sessions/{session.id}")
-
-    print(f"Connecting to Browserbase session via CDP: {session.connect_url}")
-    chromium = playwright.chromium
-    browser = chromium.connect_over_cdp(session.connect_url)
-    context = browser.contexts[0]
-    page = context.pages[0]
-    page.set_viewport_size({"width": 1920, "height": 1080})
-    print("Successfully connected to the page in Browserbase.")
-
-    try:
-        # --- Task 1: Airbnb Interaction ---
-        interact_with_airbnb(page)
-
-        # --- Task 2: Flight Selection ---
-        # !!! IMPORTANT: REPLACE THIS WITH THE ACTUAL FLIGHT WEBSITE URL !!!
-        # The URL from your previous script was a placeholder.
-        # Ensure this is the URL that directly shows the flight listings.
-        # flight_search_url = "https://www.google.com/travel/flights/search?tfs=CBwQAhooEgoyMDI1LTA3LTAxagwIAhIIL20vMGY2N2QSCjIwMjUtMDctMDVyDAgCEggvbS8wN18xZEABSAFSA hauntingAdqWBZ2FvZ2xlLmNvbS90cmF2ZWwvZmxpZ2h0c6gBCENsQXdKMENVQkVGUXlRaFVCRVJFTkVNMWFVTTVSRVJGQlZWVkZVaEFDVUZWVlZGOUdRVVFCSlNCRk1UazZCVHdScklATAWL2cvMXR0ZnFsbjYSAS8yLzA3YmM2eSAFL20vMGY2N2QxNzIAGgA" # Example Google Flights URL
-        
-        # # You can set flight_search_url to None or an empty string to skip this part
-        # # flight_search_url = None 
-
-        # select_cheapest_flight(page, flight_search_url)
-
-    except PlaywrightTimeoutError as pte:
-        print(f"A Playwright timeout error occurred: {pte}")
-        try:
-            error_screenshot_path = "error_timeout_screenshot.png"
-            page.screenshot(path=error_screenshot_path)
-            print(f"Timeout error screenshot saved as '{error_screenshot_path}'")
-        except Exception as se:
-            print(f"Could not take timeout error screenshot: {se}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+AIRBNB_URL = "https://www.airbnb.com/rooms/1423262814997006353?search_mode=regular_search&adults=1&check_in=2025-08-08&check_out=2025-08-13&children=0&infants=0&pets=0&source_impression_id=p3_1748640822_P3Oy4aNQJ_UwjG3g&previous_page_section_name=1000&federated_search_id=c74408c8-026c-4dd9-bfa1-f9120d0f9a6f"
+RESERVE_BUTTON_TESTID = "homes-pdp-cta-btn"
+PRICE_TESTID = "book-it-default"
+
+# Debug screenshots are written here; JPEG ones at this quality
+SCREENSHOT_DIR = Path(os.getenv("SCREENSHOT_DIR", "screenshots"))
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "60"))
+
+
+def listing_id(url: str) -> str:
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+async def screenshot(page: Page, url: str, stage: str, kind: str) -> None:
+    """Viewport screenshot for debugging: kind is "off", "jpeg" or "png" """
+    if kind == "jpeg":
+        await page.screenshot(path=SCREENSHOT_DIR / f"{listing_id(url)}_{stage}.jpg", type="jpeg", quality=SCREENSHOT_QUALITY)
+    elif kind == "png":
+        await page.screenshot(path=SCREENSHOT_DIR / f"{listing_id(url)}_{stage}.png")
+
+
+async def extract_listing_price(page: Page, url: str, screenshots: str = "off") -> dict:
+    """The listing as a deal record, read from the JSON the page fetches"""
+    await block_resources(page)
+    capture = ResponseCapture(page)
+    await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+    page_title = await page.title()
+
+    price_text = ""
+    if not await capture.wait():
+        # No priced response arrived: fall back to the price the page shows
+        price_text = await page.get_by_test_id(PRICE_TESTID).first.inner_text(timeout=ELEMENT_TIMEOUT)
+
+    await screenshot(page, url, "extracted", screenshots)
+    deal = listing_deal(url, capture.payloads, page_title, price_text)
+    if deal is None:
+        raise ValueError("No price found in the listing's responses or page")
+    return deal
+
+
+async def interact_with_airbnb(page: Page, url: str, screenshots: str = "off") -> dict:
+    await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+    page_title = await page.title()
+
+    await screenshot(page, url, "before_action", screenshots)
+
+    # The reserve button only shows once the price has loaded, and narrow
+    # layouts render a hidden duplicate: wait for the last visible one
+    reserve_button = page.get_by_test_id(RESERVE_BUTTON_TESTID).filter(visible=True).last
+    await reserve_button.wait_for(state="visible", timeout=ELEMENT_TIMEOUT)
+    await reserve_button.scroll_into_view_if_needed(timeout=10000)
+
+    await screenshot(page, url, "after_scroll", screenshots)
+
+    # Wait for the booking page the click opens instead of a fixed pause
+    listing_url = page.url
+    await reserve_button.click(timeout=ELEMENT_TIMEOUT)
+    await page.wait_for_url(lambda current: current != listing_url, wait_until="domcontentloaded", timeout=ELEMENT_TIMEOUT)
+
+    await screenshot(page, url, "after_click", screenshots)
+
+    return {"title": page_title, "booking_url": page.url}
+
+
+MODES = {"extract": extract_listing_price, "interact": interact_with_airbnb}
+
+
+def make_visit(mode: str, screenshots: str):
+    handler = MODES[mode]
+
+    async def visit(page: Page, url: str) -> dict:
         try:
-            error_screenshot_path = "error_screenshot.png"
-            page.screenshot(path=error_screenshot_path)
-            print(f"Error screenshot saved as '{error_screenshot_path}'")
-        except Exception as se:
-            print(f"Could not take error screenshot: {se}")
-    finally:
-        print("Closing page and browser...")
-        if 'page' in locals() and not page.is_closed():
-            page.close()
-        if 'browser' in locals() and browser.is_connected():
-            browser.close()
-        print("Page and browser closed.")
-
-    print(f"Script finished! View replay at https://browserbase.com/sessions/{session.id}")
+            return await handler(page, url, screenshots)
+        except Exception as e:
+            stage = "error_timeout" if isinstance(e, PlaywrightTimeoutError) else "error"
+            try:
+                await screenshot(page, url, stage, screenshots)
+            except Exception as se:
+                print(f"Could not take error screenshot: {se}")
+            raise
+
+    return visit
+
+
+def session_opener(playwright: Playwright, local: bool):
+    """open_session for the pool: a Browserbase session over CDP, or a local Chromium"""
+    if local:
+        async def open_local(index: int) -> BrowserSession:
+            browser = await playwright.chromium.launch()
+            context = await browser.new_context(viewport=VIEWPORT)
+            return BrowserSession(index, browser, context)
+
+        return open_local
+
+    if not BROWSERBASE_API_KEY:
+        raise ValueError("BROWSERBASE_API_KEY environment variable not set.")
+    if not BROWSERBASE_PROJECT_ID:
+        raise ValueError("BROWSERBASE_PROJECT_ID environment variable not set.")
+    bb = Browserbase(api_key=BROWSERBASE_API_KEY)
+
+    async def open_browserbase(index: int) -> BrowserSession:
+        session = await asyncio.to_thread(bb.sessions.create, project_id=BROWSERBASE_PROJECT_ID)
+        print(f"Session {index} created: https://browserbase.com/sessions/{session.id}")
+        browser = await playwright.chromium.connect_over_cdp(session.connect_url)
+        return BrowserSession(index, browser, browser.contexts[0], session.id)
+
+    return open_browserbase
+
+
+def describe(data: dict) -> str:
+    if "booking_url" in data:
+        return f"{data['title']} -> {data['booking_url']}"
+    return f"{data['title']}: ${data['price']}/night, ${data['total_price']} {data['dates']} ({data['price_source']})"
+
+
+async def run(urls, sessions=BROWSER_SESSIONS, pages_per_session=PAGES_PER_SESSION, local=False,
+              mode="extract", screenshots="off", output=None, cache=None) -> int:
+    """Scrape urls; with a ListingCache, only new and changed listings are printed and written"""
+    if screenshots != "off":
+        SCREENSHOT_DIR.mkdir(exist_ok=True)
+    if not urls:
+        print("Nothing to scrape")
+        return 0
+
+    failed = 0
+    start = time.perf_counter()
+    out = open(output, "a", encoding="utf-8") if output else None
+    async with async_playwright() as playwright:
+        async with BrowserPool(session_opener(playwright, local), sessions, pages_per_session) as pool:
+            async for result in scrape(pool, urls, make_visit(mode, screenshots)):
+                if not result.ok:
+                    failed += 1
+                    print(f"[session {result.session}] {result.elapsed:.1f}s FAILED {result.url}: {result.error}")
+                    if cache:
+                        await cache.record_failure(result.url, result.error)
+                    continue
+                record = await cache.record(result.url, result.data) if cache else result.data
+                if record is None:
+                    continue  # unchanged since the last scrape
+                change = f" [{record['change']}, was ${record['previous_price']}]" if record.get("previous_price") else ""
+                print(f"[session {result.session}] {result.elapsed:.1f}s {describe(record)}{change}")
+                if out:
+                    out.write(json.dumps(record) + "\n")
+    if out:
+        out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scraped {len(urls) - failed}/{len(urls)} listings in {elapsed:.1f}s ({len(urls) / elapsed:.2f}/s)")
+    return failed
+
 
 if __name__ == "__main__":
-    with sync_playwright() as playwright:
-        run(playwright)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape listing pages over a pool of browser sessions")
+    parser.add_argument("urls", nargs="*", help="listing URLs (default: one sample Airbnb listing)")
+    parser.add_argument("--urls-file", help="file with one listing URL per line")
+    parser.add_argument("--sessions", type=int, default=BROWSER_SESSIONS, help="browser sessions kept open")
+    parser.add_argument("--pages-per-session", type=int, default=PAGES_PER_SESSION, help="pages each session renders at once")
+    parser.add_argument("--local", action="store_true", help="launch local Chromium instead of Browserbase sessions")
+    parser.add_argument("--stub", action="store_true", help="scrape the local stub site (implies --local)")
+    parser.add_argument("--listings", type=int, default=20, help="stub listings to scrape")
+    parser.add_argument("--mode", choices=sorted(MODES), default="extract",
+                        help="extract: read prices from the page's JSON; interact: click through to booking")
+    parser.add_argument("--screenshots", choices=["off", "jpeg", "png"], default="off", help="debug screenshots")
+    parser.add_argument("--output", help="append each listing's record to this JSONL file")
+    parser.add_argument("--cache", default=LISTING_CACHE_PATH, help="listing cache for incremental runs (extract mode; empty disables)")
+    parser.add_argument("--max-age", type=float, default=LISTING_MAX_AGE / 3600, help="hours before a listing is checked again")
+    parser.add_argument("--limit", type=int, help="scrape at most this many listings, stalest first")
+    parser.add_argument("--stub-port", type=int, default=18080, help="fixed so the cache recognizes stub listings across runs")
+    parser.add_argument("--stub-reprice", type=float, default=0.0, help="fraction of stub listings whose price changes this run")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file) as f:
+            urls += [line.strip() for line in f if line.strip()]
+    if args.stub:
+        server = stub_site.serve(args.stub_port, reprice_ratio=args.stub_reprice)
+        stub_url = f"http://127.0.0.1:{server.server_port}"
+        urls += stub_site.listing_urls(stub_url, args.listings)
+    if not urls:
+        urls = [AIRBNB_URL]
+
+    cache = ListingCache(args.cache) if args.cache and args.mode == "extract" else None
+    if cache:
+        listed = len(urls)
+        urls = cache.plan(urls, args.max_age * 3600, args.limit)
+        print(f"{listed} listings: {cache.counters['fresh']} checked in the last {args.max_age:g}h, {len(urls)} to scrape")
+
+    failed = asyncio.run(run(
+        urls, args.sessions, args.pages_per_session, args.local or args.stub, args.mode, args.screenshots, args.output, cache
+    ))
+    if cache:
+        print(f"Listing cache: {cache.stats()}")
+        cache.close()
+    if args.stub:
+        print(f"Stub site served: {json.loads(urlopen(stub_url + '/_stats').read())}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,206 @@
+"""
+Browserbase scraping engine
+Runs listing pages concurrently over a pool of open browser sessions
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+# Browser sessions kept open, and pages each one renders at once
+BROWSER_SESSIONS = int(os.getenv("BROWSER_SESSIONS", "2"))
+PAGES_PER_SESSION = int(os.getenv("PAGES_PER_SESSION", "3"))
+
+# Playwright timeouts (milliseconds)
+NAVIGATION_TIMEOUT = float(os.getenv("NAVIGATION_TIMEOUT", "90000"))
+ELEMENT_TIMEOUT = float(os.getenv("ELEMENT_TIMEOUT", "30000"))
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+class BrowserSession:
+    """One browser (a Browserbase session or a local Chromium) and the context its pages share"""
+
+    def __init__(self, index: int, browser: Browser, context: BrowserContext, session_id: Optional[str] = None):
+        self.index = index
+        self.browser = browser
+        self.context = context
+        self.session_id = session_id
+        self.load = 0
+        self.pages_done = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.browser.is_connected()
+
+    async def close(self) -> None:
+        try:
+            await self.browser.close()
+        except Exception:
+            pass  # already disconnected
+
+
+@dataclass
+class ListingResult:
+    url: str
+    ok: bool
+    elapsed: float
+    session: Optional[int] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class BrowserPool:
+    """Open browser sessions handing out pages to concurrent visits.
+
+    page() opens a fresh page on the least-loaded session that renders
+    fewer than pages_per_session pages, waiting while all are full. A
+    session whose browser disconnects is reopened once its pages finish.
+    open_session(index) creates a session, so the pool works the same for
+    Browserbase and a local browser.
+    """
+
+    def __init__(
+        self,
+        open_session: Callable[[int], Awaitable[BrowserSession]],
+        size: int = BROWSER_SESSIONS,
+        pages_per_session: int = PAGES_PER_SESSION,
+    ):
+        self.open_session = open_session
+        self.size = max(size, 1)
+        self.pages_per_session = max(pages_per_session, 1)
+        self.sessions: List[BrowserSession] = []
+        self._available = asyncio.Condition()
+        self._reopening: Dict[int, asyncio.Task] = {}
+        self._closing = False
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Open every session concurrently; fails only if none opens"""
+        results = await asyncio.gather(*(self.open_session(index) for index in range(self.size)), return_exceptions=True)
+        self.sessions = [result for result in results if isinstance(result, BrowserSession)]
+        if not self.sessions:
+            raise RuntimeError(f"No browser session could be opened: {results[0]!r}")
+        for result in results:
+            if isinstance(result, BaseException):
+                print(f"A browser session failed to open: {result!r}")
+
+    async def close(self) -> None:
+        self._closing = True
+        for task in self._reopening.values():
+            task.cancel()
+        await asyncio.gather(*self._reopening.values(), return_exceptions=True)
+        async with self._available:
+            self._available.notify_all()
+        await asyncio.gather(*(session.close() for session in self.sessions))
+
+    @property
+    def capacity(self) -> int:
+        return self.size * self.pages_per_session
+
+    def _pick(self) -> Optional[BrowserSession]:
+        candidates = [s for s in self.sessions if s.alive and s.load < self.pages_per_session]
+        return min(candidates, key=lambda s: s.load) if candidates else None
+
+    def _usable(self) -> bool:
+        return any(s.alive for s in self.sessions) or bool(self._reopening)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Tuple[BrowserSession, Page]]:
+        """A fresh page on a pooled session, closed on exit"""
+        async with self._available:
+            await self._available.wait_for(lambda: self._pick() is not None or self._closing or not self._usable())
+            session = self._pick()
+            if session is None:
+                raise RuntimeError("Browser pool is closed" if self._closing else "No browser session is connected")
+            session.load += 1
+        page = None
+        try:
+            page = await session.context.new_page()
+            await page.set_viewport_size(VIEWPORT)
+            yield session, page
+        finally:
+            if page is not None and not page.is_closed():
+                try:
+                    await page.close()
+                except Exception:
+                    pass  # browser went away with the page
+            async with self._available:
+                session.load -= 1
+                session.pages_done += 1
+                self._available.notify_all()
+            if not session.alive:
+                self._reopen(session)
+
+    def _reopen(self, session: BrowserSession) -> None:
+        if self._closing or session.index in self._reopening:
+            return
+        self._reopening[session.index] = asyncio.create_task(self._replace(session))
+
+    async def _replace(self, session: BrowserSession) -> None:
+        try:
+            async with self._available:
+                await self._available.wait_for(lambda: session.load == 0)
+            await session.close()
+            replacement = await self.open_session(session.index)
+            self.sessions[self.sessions.index(session)] = replacement
+            print(f"Browser session {session.index} reopened")
+        except Exception as e:
+            print(f"Browser session {session.index} could not be reopened: {e!r}")
+        finally:
+            self._reopening.pop(session.index, None)
+            async with self._available:
+                self._available.notify_all()
+
+
+async def visit_listing(
+    pool: BrowserPool, url: str, visit: Callable[[Page, str], Awaitable[dict]], retries: int = 1
+) -> ListingResult:
+    """Run visit(page, url) on a pooled page; retried on another session if the browser dropped"""
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        session = None
+        try:
+            async with pool.page() as (session, page):
+                data = await visit(page, url)
+            return ListingResult(url, True, time.perf_counter() - start, session.index, data)
+        except Exception as e:
+            error = e
+            if session is None or session.alive or attempt == retries:
+                break
+    return ListingResult(url, False, time.perf_counter() - start, session and session.index, error=repr(error))
+
+
+async def scrape(
+    pool: BrowserPool, urls: Sequence[str], visit: Callable[[Page, str], Awaitable[dict]]
+) -> AsyncIterator[ListingResult]:
+    """Visit every URL with the pool's full concurrency, yielding results as they complete"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        while not queue.empty():
+            url = queue.get_nowait()
+            results.put_nowait(await visit_listing(pool, url, visit))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(pool.capacity, len(urls)))]
+    try:
+        for _ in range(len(urls)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
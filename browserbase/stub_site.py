@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Listing page stub
+Local stand-in for Airbnb listing pages, to run the scraper without Browserbase
+
+Serves /rooms/<id> pages built like the real ones: the HTML arrives first,
+then a script fetches the stay's price from /api/stays/<id> and only then
+reveals the reserve buttons (data-testid="homes-pdp-cta-btn"). Clicking one
+navigates to /book/stays/<id>. Like the real pages, each one also pulls in
+several large photos and a web font; GET /_stats reports the bytes served,
+so blocking them shows up there. Listing data is derived from the id, so
+the same listing always renders the same content, except that a
+--reprice-ratio share of listings (picked anew each start) get a
+different price. Scrape it with e.g.
+
+    python main.py --local --stub --listings 50 --sessions 2 --pages-per-session 4
+
+Usage: python stub_site.py [--port 18080] [--latency-ms 100] [--api-latency-ms 300]
+       [--reprice-ratio 0.1]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+RESERVE_BUTTON_TESTID = "homes-pdp-cta-btn"
+
+# Static assets each listing page loads
+PHOTOS_PER_PAGE = 5
+PHOTO = bytes(200 * 1024)
+FONT = bytes(80 * 1024)
+
+LISTING_PAGE = """<!doctype html>
+<html>
+<head>
+  <title>{title} - Stub Stays</title>
+  <style>@font-face {{ font-family: Cereal; src: url("/static/cereal.woff2"); }} body {{ font-family: Cereal; }}</style>
+</head>
+<body>
+  <h1>{title}</h1>
+  {photos}
+  <div id="price" data-testid="book-it-default">Loading price…</div>
+  <button data-testid="{testid}" style="display:none" class="mobile">Reserve</button>
+  <button data-testid="{testid}" style="display:none" class="desktop">Reserve</button>
+  <script>
+    fetch("/api/stays/{listing_id}?{query}")
+      .then(response => response.json())
+      .then(stay => {{
+        document.getElementById("price").textContent = `$${{stay.price.total}} total`;
+        const button = document.querySelector("button.desktop");
+        button.style.display = "inline";
+        button.addEventListener("click", () => {{ location.href = "/book/stays/{listing_id}?{query}"; }});
+      }});
+  </script>
+</body>
+</html>
+"""
+
+BOOKING_PAGE = """<!doctype html>
+<html><head><title>Confirm and pay - Stub Stays</title></head>
+<body><h1>Confirm and pay</h1><p>{title}</p></body></html>
+"""
+
+
+def stay(listing_id: str, query: dict, reprice_ratio: float = 0.0, epoch: int = 0) -> dict:
+    """The listing's details, the same for every request with the same epoch"""
+    rng = random.Random(listing_id)
+    nightly = round(rng.uniform(60, 400), 2)
+    if random.Random(f"{listing_id}:{epoch}").random() < reprice_ratio:
+        nightly = round(nightly * random.Random(epoch).uniform(0.8, 1.2), 2)
+    discount = rng.choice([0, 0, 0.1, 0.2])
+    check_in = query.get("check_in", [""])[0]
+    check_out = query.get("check_out", [""])[0]
+    return {
+        "id": listing_id,
+        "title": f"Stub Stay #{listing_id}",
+        "check_in": check_in,
+        "check_out": check_out,
+        "price": {
+            "nightly": nightly,
+            "total": round(nightly * 5, 2),
+            "strikethrough": round(nightly * 5 / (1 - discount), 2) if discount else None,
+            "currency": "USD",
+        },
+        "rating": round(rng.uniform(4.0, 5.0), 2),
+        "reviews": rng.randint(0, 900),
+    }
+
+
+def listing_urls(base_url: str, count: int, check_in: str = "2025-08-08", check_out: str = "2025-08-13") -> list:
+    query = urlencode({"adults": 1, "check_in": check_in, "check_out": check_out})
+    return [f"{base_url}/rooms/{100000 + i}?{query}" for i in range(count)]
+
+
+def make_handler(settings: dict, counters: dict, lock: threading.Lock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            with lock:
+                counters["bytes"] += len(body)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # page closed before it finished loading
+
+        def _count(self, name: str) -> None:
+            with lock:
+                counters[name] += 1
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+            if url.path == "/_stats":
+                with lock:
+                    stats = json.dumps(counters).encode()
+                self._send(200, stats, "application/json")
+            elif len(parts) == 2 and parts[0] == "rooms":
+                self._count("pages")
+                time.sleep(settings["latency_ms"] / 1000)
+                details = stay(parts[1], query, settings["reprice_ratio"], settings["epoch"])
+                photos = "".join(f'<img src="/static/{parts[1]}-{i}.jpg" width="400">' for i in range(PHOTOS_PER_PAGE))
+                page = LISTING_PAGE.format(
+                    title=details["title"], photos=photos, testid=RESERVE_BUTTON_TESTID,
+                    listing_id=parts[1], query=url.query,
+                )
+                self._send(200, page.encode(), "text/html; charset=utf-8")
+            elif len(parts) == 3 and parts[:2] == ["api", "stays"]:
+                self._count("api")
+                time.sleep(settings["api_latency_ms"] / 1000)
+                details = stay(parts[2], query, settings["reprice_ratio"], settings["epoch"])
+                self._send(200, json.dumps(details).encode(), "application/json")
+            elif len(parts) == 3 and parts[:2] == ["book", "stays"]:
+                self._count("bookings")
+                page = BOOKING_PAGE.format(title=stay(parts[2], query)["title"])
+                self._send(200, page.encode(), "text/html; charset=utf-8")
+            elif url.path.startswith("/static/"):
+                self._count("assets")
+                if url.path.endswith(".woff2"):
+                    self._send(200, FONT, "font/woff2")
+                else:
+                    self._send(200, PHOTO, "image/jpeg")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, latency_ms: float = 100.0, api_latency_ms: float = 300.0,
+          reprice_ratio: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub on 127.0.0.1:port (0 picks a free one) in a background thread"""
+    settings = {
+        "latency_ms": latency_ms, "api_latency_ms": api_latency_ms,
+        "reprice_ratio": reprice_ratio, "epoch": random.randrange(1 << 30),
+    }
+    counters = {"pages": 0, "api": 0, "bookings": 0, "assets": 0, "bytes": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(settings, counters, threading.Lock()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--api-latency-ms", type=float, default=300.0)
+    parser.add_argument("--reprice-ratio", type=float, default=0.0, help="share of listings priced differently this run")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency_ms, args.api_latency_ms, args.reprice_ratio)
+    print(f"Stub listings on http://127.0.0.1:{args.port}/rooms/<id>")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
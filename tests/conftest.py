@@ -0,0 +1,13 @@
+"""
+Test setup
+Puts the flat backend and browserbase modules (and the provider stub) on the import path
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for directory in (ROOT / "backend", ROOT / "backend" / "benchmarks", ROOT / "browserbase"):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
@@ -0,0 +1,124 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+from mcp import StdioServerParameters
+
+pytest.importorskip("langchain_openai")
+os.environ.setdefault("OPENAI_API_KEY", "unused")  # the model is built at import, never called here
+import a  # noqa: E402
+
+SERVER = textwrap.dedent('''
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("batch-test")
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        if text == "fail":
+            raise ValueError("tool failed")
+        return text.upper()
+
+    server.run()
+''')
+
+
+def prompts(text: str) -> list:
+    async def collect():
+        return [item async for item in a.read_prompts(io.StringIO(text))]
+
+    return asyncio.run(collect())
+
+
+def test_prompts_get_stable_ids_and_bad_lines_are_reported():
+    items = prompts(
+        'cafes in Boston\n'
+        '\n'
+        '{"prompt": "hotels in Rome", "id": 7}\n'
+        '{"prompt": "cafes in Boston"\n'
+        '{"id": "no-prompt"}\n'
+        'cafes in Boston\n'
+    )
+    assert [(prompt, error) for _, prompt, error in items] == [
+        ("cafes in Boston", None),
+        ("hotels in Rome", None),
+        ('{"prompt": "cafes in Boston"', items[2][2]),
+        ('{"id": "no-prompt"}', 'no "prompt" text'),
+        ("cafes in Boston", None),
+    ]
+    assert items[2][2].startswith("invalid JSON")
+    assert items[1][0] == "7"
+    assert items[4][0] == f"{items[0][0]}#2"  # repeated text is numbered
+    assert prompts("cafes in Boston\n")[0][0] == items[0][0]
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """run_batch over a local MCP server, with the agent replaced by one echo tool call"""
+    script = tmp_path / "server.py"
+    script.write_text(SERVER)
+    monkeypatch.setattr(a, "server_params", StdioServerParameters(command=sys.executable, args=[str(script)]))
+    monkeypatch.setattr(a, "APIFY_TOKEN", "token")
+
+    async def ask(pool, prompt):
+        async def invoke(slot):
+            result = await slot.session.call_tool("echo", {"text": prompt})
+            if result.isError:
+                raise RuntimeError(result.content[0].text)
+            return {"response": result.content[0].text, "session": slot.index}
+
+        return await pool.run(invoke)
+
+    monkeypatch.setattr(a, "ask", ask)
+    output = tmp_path / "results" / "batch.jsonl"
+
+    def run(source) -> tuple:
+        counts = asyncio.run(a.run_batch(source, output, sessions=1, per_session=2, timeout=30))
+        with open(output) as f:
+            return counts, [json.loads(line) for line in f]
+
+    return run
+
+
+def test_batch_records_every_line_and_resumes(batch):
+    text = 'hello\n{"prompt": "fail"}\n{broken\nworld\n'
+    counts, records = batch(io.StringIO(text))
+    assert counts == {"ok": 2, "error": 2, "timeout": 0, "skipped": 0}
+    by_prompt = {record["prompt"]: record for record in records}
+    assert by_prompt["hello"]["response"] == "HELLO"
+    assert by_prompt["fail"]["status"] == "error"
+    assert by_prompt["{broken"]["status"] == "error" and by_prompt["{broken"]["error"].startswith("invalid JSON")
+
+    counts, records = batch(io.StringIO(text))
+    assert counts == {"ok": 0, "error": 2, "timeout": 0, "skipped": 2}
+    assert len(records) == 6
+
+
+class FailingSource:
+    def __init__(self, lines):
+        self.lines = list(lines)
+
+    def readline(self):
+        if not self.lines:
+            raise OSError("input went away")
+        return self.lines.pop(0)
+
+
+def test_failed_input_cancels_the_workers(batch, monkeypatch):
+    leftover = []
+    run_batch = a.run_batch
+
+    async def checked(*args, **kwargs):
+        try:
+            return await run_batch(*args, **kwargs)
+        finally:
+            leftover.extend(task for task in asyncio.all_tasks() if task is not asyncio.current_task())
+
+    monkeypatch.setattr(a, "run_batch", checked)
+    with pytest.raises(OSError):
+        batch(FailingSource(["hello\n"]))
+    assert leftover == []
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from datetime import date
+from types import SimpleNamespace
+
+from alerts import DealAlerts, WatchedRoute, _RouteState
+from models import TravelDeal
+
+ROUTE = WatchedRoute("hotel", "Paris", departure_date="2027-03-01", return_date="2027-03-04")
+
+
+def stay(title: str, price: float) -> TravelDeal:
+    return TravelDeal(
+        title, price, 300.0, 300.0 - price, "Paris", "2027-03-01 - 2027-03-04",
+        "Booking.com", 4.0, f"https://deals.example/{title}", "", "hotel",
+    )
+
+
+def alerts_for(routes=()) -> DealAlerts:
+    return DealAlerts(search=None, providers=list, routes=list(routes), min_drop=0.1)
+
+
+def test_relative_routes_search_the_same_distance_ahead():
+    route = WatchedRoute("flight", "Tokyo", origin="NYC", days_ahead=14, nights=5)
+    assert route.id == "flight:NYC-Tokyo:+14d/5n"
+    assert route.search_args(date(2026, 12, 1)) == ("search_flight_deals", {
+        "origin": "NYC", "destination": "Tokyo", "departure_date": "2026-12-15", "return_date": "2026-12-20",
+    })
+    assert ROUTE.search_args(date(2026, 12, 1))[1]["checkout_date"] == "2027-03-04"
+    assert WatchedRoute.from_dict({"type": "hotel", "destination": "Rome", "nights": 2}).search_args(
+        date(2026, 12, 1)
+    )[1]["checkout_date"] == "2027-01-02"
+
+
+def test_drops_raise_one_alert_until_they_deepen_or_end():
+    watcher, state = alerts_for(), _RouteState(ROUTE)
+    assert not watcher.update(state, [stay("a", 200), stay("b", 100)])
+    assert not watcher.update(state, [stay("a", 190), stay("b", 100)])  # under the 10% threshold
+    assert watcher.update(state, [stay("a", 150), stay("b", 100)])
+    assert watcher.update(state, [stay("a", 120), stay("b", 100)])  # deeper: replaced, still against 190
+    watcher._publish()
+    [alert] = json.loads(watcher.snapshot())["alerts"]
+    assert (alert["title"], alert["price"], alert["previous_price"], alert["savings"]) == ("a", 120, 190, "37%")
+    assert watcher.counters["alerts_raised"] == 1
+
+    assert watcher.update(state, [stay("a", 180), stay("b", 100)])  # back up: the drop is over
+    assert watcher.stats()["alerts"] == 0
+
+
+def test_partial_results_keep_missing_deals_and_same_result_is_skipped():
+    watcher, state = alerts_for(), _RouteState(ROUTE)
+    watcher.update(state, [stay("a", 200), stay("b", 100)])
+    assert watcher.update(state, [stay("a", 200), stay("b", 50)])
+    assert not watcher.update(state, [stay("a", 200)], complete=False)  # b's provider failed this time
+    assert watcher.stats()["alerts"] == 1
+    assert watcher.update(state, [stay("a", 200)])  # a complete result without b: it is gone
+    assert watcher.stats()["alerts"] == 0
+
+    result = SimpleNamespace()
+    watcher.update(state, [stay("a", 100)], result=result)
+    assert not watcher.update(state, [stay("a", 50)], result=result)
+    assert watcher.counters["unchanged"] == 1
+
+
+def test_watcher_polls_in_the_background_and_publishes_drops():
+    prices = iter([200, 200, 150])
+
+    async def search(tool, deal_type, args):
+        assert (tool, args["destination"]) == ("search_hotel_deals", "Paris")
+        return SimpleNamespace(deals=[stay("a", next(prices, 150))], partial=False), "demo"
+
+    async def scenario():
+        watcher = DealAlerts(search, providers=list, interval=0.02, jitter=0.0, min_drop=0.1)
+        watcher.watch(ROUTE, delay=0)
+        watcher.start(default=True)
+        for _ in range(100):
+            if watcher.stats()["alerts"]:
+                break
+            await asyncio.sleep(0.01)
+        await watcher.stop()
+        return watcher
+
+    watcher = asyncio.run(scenario())
+    body = json.loads(watcher.snapshot())
+    assert body["watching"] == 1
+    assert [alert["price"] for alert in body["alerts"]] == [150]
+    assert watcher.counters["polls"] >= 3 and watcher.counters["unchanged"] >= 1
@@ -0,0 +1,109 @@
+import asyncio
+
+from cache import SearchCache, bucket_budget, normalize_date, normalize_search_args
+
+FLIGHT_FIELDS = ("origin", "destination", "departure_date", "return_date", "budget_max", "flexible_days", "whole_month")
+
+
+def make_cache(**kwargs) -> tuple:
+    """A cache on a hand-driven clock: now[0] is the current time"""
+    now = [0.0]
+    return SearchCache(ttls={"search": 10.0}, stale_ttl=5.0, clock=lambda: now[0], **kwargs), now
+
+
+def test_entry_is_fresh_then_stale_then_gone():
+    cache, now = make_cache()
+    cache.put("key", "value", cache.ttl_for("search"))
+    assert cache.get("key") == ("value", "fresh")
+    now[0] = 10
+    assert cache.get("key") == ("value", "stale")
+    now[0] = 15
+    assert cache.get("key") == (None, "miss")
+    assert cache.counters["expirations"] == 1
+
+
+def test_stale_hit_returns_old_value_and_refreshes_in_background():
+    async def scenario():
+        cache, now = make_cache()
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return f"value {len(loads)}"
+
+        first = await cache.get_or_load("key", loader, 10.0)
+        now[0] = 12
+        stale = await cache.get_or_load("key", loader, 10.0)
+        await asyncio.sleep(0)  # let the refresh run
+        await asyncio.sleep(0)
+        fresh = await cache.get_or_load("key", loader, 10.0)
+        return first, stale, fresh, cache
+
+    first, stale, fresh, cache = asyncio.run(scenario())
+    assert first == ("value 1", "miss")
+    assert stale == ("value 1", "stale")
+    assert fresh == ("value 2", "fresh")
+    assert cache.counters["refreshes"] == 1
+
+
+def test_ttl_of_can_cache_a_value_as_already_stale():
+    async def scenario():
+        cache, _ = make_cache()
+
+        async def partial():
+            return {"partial": True}
+
+        await cache.get_or_load("key", partial, 10.0, ttl_of=lambda value: 0)
+        return cache.get("key")
+
+    assert asyncio.run(scenario()) == ({"partial": True}, "stale")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, _ = make_cache(max_entries=2)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.get("a")
+    cache.put("c", 3, 10)
+    assert cache.get("b") == (None, "miss")
+    assert cache.get("a") == (1, "fresh")
+    assert cache.counters["evictions"] == 1
+
+
+def test_byte_bound_evicts_oldest_entries():
+    cache, _ = make_cache(max_bytes=3000)
+    for key in "abc":
+        cache.put(key, "x" * 1000, 10)
+    assert cache.get("a") == (None, "miss")
+    assert cache.get("c")[1] == "fresh"
+
+
+def test_dates_and_budgets_normalize():
+    assert normalize_date("2026/12/01") == normalize_date("01.12.2026") == normalize_date("20261201") == "2026-12-01"
+    assert normalize_date("next friday") == "next friday"
+    assert bucket_budget(420) == bucket_budget(449) == 450
+    assert bucket_budget(None) is None
+
+
+def test_equivalent_searches_share_a_key():
+    args = {"origin": "JFK", "destination": "paris", "departure_date": "2026/12/01", "budget_max": 420}
+    same = {"origin": "New York", "destination": "Paris", "departure_date": "2026-12-01", "budget_max": 449}
+    key, query = normalize_search_args("search_flight_deals", args, FLIGHT_FIELDS)
+    assert key == normalize_search_args("search_flight_deals", same, FLIGHT_FIELDS)[0]
+    assert query == {"origin": "NYC", "destination": "PAR", "departure_date": "2026-12-01", "budget_max": 450}
+
+
+def test_counts_and_flags_are_coerced():
+    fields = FLIGHT_FIELDS
+    base = {"origin": "NYC", "destination": "PAR", "departure_date": "2026-12-01"}
+    key, query = normalize_search_args("search_flight_deals", {**base, "flexible_days": "3", "whole_month": 1}, fields)
+    assert query["flexible_days"] == 3 and query["whole_month"] is True
+    assert key == normalize_search_args("search_flight_deals", {**base, "flexible_days": 3, "whole_month": True}, fields)[0]
+
+
+def test_undeclared_properties_are_left_out_of_the_key():
+    args = {"origin": "NYC", "destination": "PAR", "departure_date": "2026-12-01"}
+    key, query = normalize_search_args("search_flight_deals", {**args, "tags": ["a", "b"]}, FLIGHT_FIELDS)
+    hash(key)
+    assert key == normalize_search_args("search_flight_deals", args, FLIGHT_FIELDS)[0]
+    assert "tags" not in query
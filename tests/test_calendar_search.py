@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from calendar_search import CALENDAR_MAX_CELLS, calendar_cells
+from server import TravelDealsServer
+
+ROUTE = {"origin": "NYC", "destination": "PAR"}
+
+
+def test_flexible_round_trip_grid_skips_returns_before_departure():
+    departures, returns, cells = calendar_cells("2026-12-01", "2026-12-02", flexible_days=1)
+    assert departures == ["2026-11-30", "2026-12-01", "2026-12-02"]
+    assert returns == ["2026-12-01", "2026-12-02", "2026-12-03"]
+    assert len(cells) == 8  # 9 pairs less (2026-12-02, 2026-12-01)
+    assert ("2026-12-02", "2026-12-01") not in cells
+
+
+def test_one_way_grid_has_no_returns():
+    departures, returns, cells = calendar_cells("2026-12-01", flexible_days=2)
+    assert len(departures) == 5 and returns == [None]
+    assert cells == [(departure, None) for departure in departures]
+
+
+def test_whole_month_keeps_the_trip_length():
+    departures, returns, cells = calendar_cells("2027-02-10", "2027-02-14", whole_month=True)
+    assert len(departures) == len(cells) == 28
+    assert cells[0] == ("2027-02-01", "2027-02-05") and cells[-1] == ("2027-02-28", "2027-03-04")
+    assert len(returns) == 28
+
+
+@pytest.mark.parametrize("days", [-1, 8])
+def test_window_outside_the_limits_is_rejected(days):
+    with pytest.raises(ValueError):
+        calendar_cells("2026-12-01", flexible_days=days)
+
+
+def call(monkeypatch, arguments: dict):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    async def run():
+        server = TravelDealsServer(shared_cache_path=None, price_history_path=None)
+        async with create_connected_server_and_client_session(server.server) as client:
+            result = await client.call_tool("search_flight_deals", {**ROUTE, **arguments})
+        await server.aclose()
+        return result
+
+    return asyncio.run(run())
+
+
+def test_calendar_search_prices_every_cell(monkeypatch):
+    result = call(monkeypatch, {"departure_date": "2026-12-10", "return_date": "2026-12-17", "flexible_days": 2})
+    assert not result.isError
+    calendar = json.loads(result.content[0].text.split("\n\n", 1)[1])
+    assert calendar["dates_searched"] == 25
+    assert len(calendar["grid"]["min_prices"]) == 5
+    assert all(price == 450 for row in calendar["grid"]["min_prices"] for price in row)
+    assert calendar["cheapest"]["min_price"] == 450
+
+
+@pytest.mark.parametrize("days", [-1, 8, 1.5, "3"])
+def test_schema_rejects_bad_flexible_days(monkeypatch, days):
+    result = call(monkeypatch, {"departure_date": "2026-12-10", "flexible_days": days})
+    assert result.isError
+    assert result.content[0].text.startswith("Input validation error")
+
+
+def test_calendar_over_the_cell_limit_is_an_error(monkeypatch):
+    result = call(monkeypatch, {"departure_date": "2026-12-10", "return_date": "2026-12-12", "flexible_days": 7})
+    assert f"exceeds the limit of {CALENDAR_MAX_CELLS}" in result.content[0].text
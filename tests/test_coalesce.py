@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from coalesce import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        return results, calls, flight
+
+    results, calls, flight = asyncio.run(scenario())
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "abandoned": 0, "in_flight": 0}
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_waiter_leaves_shared_call_running():
+    async def scenario():
+        flight, release = SingleFlight(), asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, flight
+
+    result, flight = asyncio.run(scenario())
+    assert result == "result"
+    assert flight.counters["abandoned"] == 0
+
+
+def test_last_waiter_cancelling_cancels_the_call():
+    async def scenario():
+        flight, started, cancelled = SingleFlight(), asyncio.Event(), asyncio.Event()
+
+        async def fetch():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flight
+
+    flight = asyncio.run(scenario())
+    assert flight.counters["abandoned"] == 1
+    assert len(flight) == 0
+
+
+def test_new_call_after_completion_runs_again():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        return [await flight.do("key", fetch), await flight.do("key", fetch)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(*(flight.do(key, lambda key=key: fetch(key)) for key in ("a", "b", "a")))
+        return results, sorted(calls)
+
+    assert asyncio.run(scenario()) == (["a", "b", "a"], ["a", "b"])
@@ -0,0 +1,143 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from deal_index import DealIndex
+from models import TravelDeal, deal_key
+
+FIRST_DAY = date(2026, 12, 1)
+
+
+def make_index(ttl: float = 100.0) -> tuple:
+    """An index on a hand-driven clock: now[0] is the current time"""
+    now = [0.0]
+    return DealIndex(ttls={"flight": ttl, "hotel": ttl}, clock=lambda: now[0]), now
+
+
+def deal(
+    title: str,
+    price: float = 100.0,
+    savings: float = 0.0,
+    deal_type: str = "hotel",
+    destination: str = "Paris",
+    origin: str = "",
+    start: date = FIRST_DAY,
+    nights: int = 3,
+    provider: str = "Test",
+    url: str = "",
+) -> TravelDeal:
+    return TravelDeal(
+        title=title, price=price, original_price=price + savings, savings=savings,
+        destination=destination, dates=f"{start.isoformat()} - {(start + timedelta(days=nights)).isoformat()}",
+        provider=provider, rating=4.0, url=url or f"https://deals.example/{title}", image_url="",
+        deal_type=deal_type, origin=origin,
+    )
+
+
+def random_deals(rng: random.Random, count: int) -> list:
+    return [
+        deal(
+            f"d{rng.randrange(count // 4)}",  # repeated listings, some on the same dates
+            price=round(rng.uniform(50, 900), 2),
+            savings=round(rng.uniform(0, 300), 2),
+            deal_type="flight",
+            destination=rng.choice(["PAR", "LON"]),
+            origin="NYC",
+            start=FIRST_DAY + timedelta(days=rng.randrange(10)),
+            nights=rng.choice([3, 7]),
+        )
+        for _ in range(count)
+    ]
+
+
+def live(deals: list) -> list:
+    """What the index should hold: the last copy seen of each deal per route"""
+    latest = {}
+    for seen in deals:
+        latest[(seen.destination, deal_key(seen))] = seen
+    return list(latest.values())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_query_matches_a_filtered_sort(seed):
+    rng = random.Random(seed)
+    index, _ = make_index()
+    deals = random_deals(rng, 400)
+    index.add_many(deals)
+    expected_pool = live(deals)
+    assert len(index) == len(expected_pool)
+
+    for _ in range(30):
+        destination = rng.choice(["PAR", "LON", None])
+        budget_max = rng.choice([None, 300, 600])
+        first = (FIRST_DAY + timedelta(days=rng.randrange(10))).toordinal()
+        last = first + rng.choice([0, 3])
+        end = rng.choice([None, first + 3])
+        matches = [
+            seen for seen in expected_pool
+            if (destination is None or seen.destination == destination)
+            and (budget_max is None or seen.price <= budget_max)
+            and first <= seen.start <= last
+            and (end is None or seen.end == end)
+        ]
+        filters = dict(
+            destination=destination, origin="NYC" if destination else None,
+            budget_max=budget_max, date_from=first, date_to=last, end=end,
+        )
+
+        by_price = index.query("flight", **filters)
+        assert [found.price for found in by_price] == sorted(seen.price for seen in matches)
+
+        top = index.query("flight", **filters, order_by="savings", limit=5)
+        assert [found.savings for found in top] == sorted((seen.savings for seen in matches), reverse=True)[:5]
+
+        count, savings = index.totals("flight", **filters)
+        assert count == len(matches)
+        assert savings == pytest.approx(sum(seen.savings for seen in matches))
+
+
+def test_deals_expire_unless_seen_again():
+    index, now = make_index(ttl=10)
+    kept, dropped = deal("kept"), deal("dropped")
+    index.add_many([kept, dropped])
+    now[0] = 6
+    index.add_many([kept])
+    now[0] = 12
+    assert index.expire() == 1
+    assert index.deals("hotel") == [kept]
+    now[0] = 22
+    index.expire()
+    assert len(index) == 0
+
+
+def test_one_listing_on_many_dates_is_many_deals():
+    # Offer and demo URLs repeat across the days of a calendar search
+    index, _ = make_index()
+    index.add_many(deal("offer", url="https://deals.example/shared", start=FIRST_DAY + timedelta(days=day)) for day in range(31))
+    assert len(index) == 31
+    assert len(index.query("hotel", date_from=FIRST_DAY.toordinal() + 30, date_to=FIRST_DAY.toordinal() + 30)) == 1
+
+
+def test_same_listing_from_two_providers_is_two_deals():
+    index, _ = make_index()
+    index.add_many([deal("stay", provider="Expedia"), deal("stay", price=90, provider="Hotels.com")])
+    assert [found.provider for found in index.query("hotel")] == ["Hotels.com", "Expedia"]
+
+
+def test_price_change_reorders_and_bumps_version():
+    index, _ = make_index()
+    index.add_many([deal("a", price=100), deal("b", price=200)])
+    version = index.version("hotel")
+    index.add(deal("a", price=300))
+    assert [found.title for found in index.query("hotel")] == ["b", "a"]
+    assert index.version("hotel") > version
+    index.add(deal("a", price=300))
+    assert index.version("hotel") == version + 1
+
+
+def test_destination_is_matched_case_and_space_insensitively():
+    index, _ = make_index()
+    index.add(deal("stay", destination="New York"))
+    assert len(index.query("hotel", destination="  new   york ")) == 1
+    assert index.query("hotel", destination="Paris") == []
@@ -0,0 +1,53 @@
+import pytest
+
+import stub_site
+from extract import find_fields, has_price, listing_deal, parse_amount
+
+URL = "https://www.airbnb.com/rooms/42?adults=1&check_in=2026-12-01&check_out=2026-12-05"
+
+
+@pytest.mark.parametrize("value, amount", [
+    (123.4, 123.4), ("123.4", 123.4), ("$1,234 total", 1234.0), ("€ 99", 99.0), (True, None), ("n/a", None), (None, None),
+])
+def test_amounts_are_read_from_numbers_and_display_strings(value, amount):
+    assert parse_amount(value) == amount
+
+
+def test_fields_closest_to_the_top_win():
+    payload = {"data": {"listing": {"title": "Loft", "price": {"total": 900, "nightly": 225}}, "title": "Outer"}}
+    fields = find_fields(payload)
+    assert fields["title"] == "Outer"
+    assert (fields["total"], fields["nightly"]) == (900, 225)
+    assert has_price(payload) and not has_price({"title": "Loft"})
+
+
+def test_stub_stay_payload_becomes_a_per_night_deal():
+    payload = stub_site.stay("42", {"check_in": ["2026-12-01"], "check_out": ["2026-12-06"]})
+    deal = listing_deal(URL, [payload], page_title="ignored")
+    assert deal["price"] == payload["price"]["nightly"]
+    assert deal["total_price"] == payload["price"]["total"]
+    assert deal["dates"] == "2026-12-01 - 2026-12-06"
+    assert deal["title"] == payload["title"] and deal["price_source"] == "network"
+    assert deal["original_price"] >= deal["price"]
+    assert 4.0 <= deal["rating"] <= 5.0
+
+
+@pytest.mark.parametrize("text, nightly, total", [
+    ("$1,000 total", 250.0, 1000.0),
+    ("$1,000 Total before taxes", 250.0, 1000.0),
+    ("$250 night", 250.0, 1000.0),
+    ("$250", 250.0, 1000.0),
+])
+def test_page_text_is_only_divided_by_nights_when_it_is_a_total(text, nightly, total):
+    deal = listing_deal(URL, [], page_title="Loft", price_text=text)  # 4 nights
+    assert (deal["price"], deal["total_price"], deal["price_source"]) == (nightly, total, "page")
+    assert deal["title"] == "Loft"
+
+
+def test_no_price_anywhere_is_no_deal():
+    assert listing_deal(URL, [{"title": "Loft"}], price_text="Price unavailable") is None
+
+
+@pytest.mark.parametrize("rating, scaled", [(4.87, 4.87), ("9.2", 4.6), (96, 4.8)])
+def test_ratings_are_scaled_to_five(rating, scaled):
+    assert listing_deal(URL, [{"total": 400, "rating": rating}])["rating"] == scaled
@@ -0,0 +1,87 @@
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+from mcp import ClientSession
+from mcp.client.streamable_http import streamable_http_client
+
+from http_transport import build_app
+from server import TravelDealsServer
+from sessions import SessionBusyError, SessionLimiter
+
+HOTEL_ARGS = {"destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04"}
+
+
+def test_limit_is_per_client_and_rejects_after_queue_timeout():
+    async def scenario():
+        limiter, release = SessionLimiter(max_concurrency=1, queue_timeout=0.05), asyncio.Event()
+
+        async def hold(client):
+            async with limiter.slot(client):
+                await release.wait()
+
+        first = asyncio.create_task(hold("10.0.0.1"))
+        other = asyncio.create_task(hold("10.0.0.2"))  # another client is not affected
+        await asyncio.sleep(0.01)
+        with pytest.raises(SessionBusyError):
+            async with limiter.slot("10.0.0.1"):
+                pass
+        stats = limiter.stats()
+        release.set()
+        await asyncio.gather(first, other)
+        return stats, limiter.stats()
+
+    busy, idle = asyncio.run(scenario())
+    assert (busy["admitted"], busy["queued"], busy["rejected"], busy["clients"]) == (2, 1, 1, 2)
+    assert idle["clients"] == 0  # slots go with the client's last call
+
+
+def test_calls_outside_a_request_are_not_limited():
+    async def scenario():
+        limiter = SessionLimiter(max_concurrency=1)
+        async with limiter.slot(None):
+            async with limiter.slot(None):
+                return limiter.stats()
+
+    assert asyncio.run(scenario())["admitted"] == 0
+
+
+class RecordingLimiter(SessionLimiter):
+    def __init__(self):
+        super().__init__()
+        self.clients = []
+
+    def slot(self, client):
+        self.clients.append(client)
+        return super().slot(client)
+
+
+def test_stateless_http_limits_by_client_address(monkeypatch):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    async def scenario():
+        travel_server = TravelDealsServer(shared_cache_path=None, price_history_path=None)
+        travel_server.session_limiter = RecordingLimiter()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(build_app(travel_server, stateless=True), log_level="warning"))
+        serving = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started:
+            await asyncio.sleep(0.01)
+        try:
+            for _ in range(2):  # every stateless request gets a new MCP session
+                async with streamable_http_client(f"http://127.0.0.1:{port}/mcp") as (read, write, _):
+                    async with ClientSession(read, write) as client:
+                        await client.initialize()
+                        result = await client.call_tool("search_hotel_deals", HOTEL_ARGS)
+                        assert not result.isError
+        finally:
+            server.should_exit = True
+            await serving
+            sock.close()
+        return travel_server.session_limiter.clients
+
+    assert asyncio.run(scenario()) == ["127.0.0.1", "127.0.0.1"]
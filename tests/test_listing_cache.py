@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from listing_cache import ListingCache, listing_key
+
+LISTING = "https://www.airbnb.com/rooms/42?check_in=2025-08-08&check_out=2025-08-13&adults=1"
+
+
+@pytest.mark.parametrize("url", [
+    "https://airbnb.com/rooms/42/?adults=1&check_out=2025-08-13&check_in=2025-08-08",
+    "https://www.airbnb.com/rooms/42?check_in=2025-8-8&check_out=2025-8-13&adults=1&children=0&source_impression_id=p3_x",
+    "https://WWW.AIRBNB.COM/rooms/42?adults=1&pets=&check_in=2025-08-08&check_out=2025-08-13&federated_search_id=abc",
+])
+def test_listing_key_ignores_tracking_defaults_order_and_date_padding(url):
+    assert listing_key(url) == listing_key(LISTING) == "airbnb.com/rooms/42?adults=1&check_in=2025-08-08&check_out=2025-08-13"
+
+
+def test_listing_key_keeps_what_changes_the_page():
+    assert listing_key(LISTING) != listing_key(LISTING.replace("adults=1", "adults=2"))
+    assert listing_key(LISTING) != listing_key(LISTING.replace("rooms/42", "rooms/43"))
+    assert listing_key("https://airbnb.com/rooms/42?check_in=soon") == "airbnb.com/rooms/42?check_in=soon"
+
+
+def test_cache_emits_only_new_and_changed_listings(tmp_path):
+    now = [1_000_000.0]
+    cache = ListingCache(str(tmp_path / "listings.db"), clock=lambda: now[0])
+    record = {"title": "Cabin", "price": 100.0, "url": LISTING, "price_source": "network"}
+
+    async def scenario():
+        new = await cache.record(LISTING, record)
+        same = await cache.record(LISTING.replace("check_in=2025-08-08", "check_in=2025-8-8"), {**record, "price_source": "page"})
+        changed = await cache.record(LISTING, {**record, "price": 90.0})
+        return new, same, changed
+
+    try:
+        new, same, changed = asyncio.run(scenario())
+        assert new["change"] == "new"
+        assert same is None
+        assert (changed["change"], changed["previous_price"]) == ("changed", 100.0)
+
+        other = LISTING.replace("rooms/42", "rooms/43")
+        assert cache.plan([LISTING, other], max_age=3600) == [other]
+        now[0] += 3600
+        assert cache.plan([LISTING, other], max_age=3600) == [other, LISTING]
+        assert cache.plan([LISTING, other], max_age=3600, limit=1) == [other]
+    finally:
+        cache.close()
+
+
+def test_failed_listings_stay_due_oldest_attempt_first(tmp_path):
+    now = [1_000_000.0]
+    cache = ListingCache(str(tmp_path / "listings.db"), clock=lambda: now[0])
+    first, second = LISTING, LISTING.replace("rooms/42", "rooms/43")
+
+    async def failures():
+        await cache.record_failure(first, "TimeoutError")
+        now[0] += 10
+        await cache.record_failure(second, "TimeoutError")
+
+    try:
+        asyncio.run(failures())
+        assert cache.plan([second, first, second], max_age=3600) == [first, second]
+        assert cache.stats()["failing"] == 2
+        recorded = asyncio.run(cache.record(first, {"title": "Cabin", "price": 100.0}))
+        assert recorded["change"] == "new"  # a failure leaves no record to compare with
+        assert cache.plan([second, first], max_age=3600) == [second]
+        assert (cache.stats()["listings"], cache.stats()["failing"], cache.counters["failed"]) == (2, 1, 2)
+    finally:
+        cache.close()
@@ -0,0 +1,86 @@
+import pytest
+
+from locations import LocationIndex, canonical_args, canonical_place, fold, location_index, location_stats, resolve
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Paris", "PAR"),
+    ("PAR", "PAR"),
+    ("JFK", "NYC"),
+    ("new york city", "NYC"),
+    ("San Fran", "SFO"),
+    ("Barcelonna", "BCN"),
+    ("München", "MUC"),
+    ("Heathrow", "LON"),
+    ("Newark", "NYC"),
+    ("Baltimore", "WAS"),
+])
+def test_flight_form_resolves_to_city_codes(text, code):
+    assert canonical_place(text, "code") == code
+
+
+@pytest.mark.parametrize("text, city", [
+    ("PAR", "Paris"),
+    ("NYC", "New York"),
+    ("Baltimore", "Baltimore"),
+    ("Newark", "Newark"),
+    ("JFK", "JFK"),
+])
+def test_airport_and_area_names_only_apply_to_flights(text, city):
+    assert canonical_place(text, "city") == city
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Paris, France", "PAR"),
+    ("London (UK)", "LON"),
+    ("London, England", "LON"),
+    ("Sydney, NSW", "SYD"),
+    ("Portland, OR", "PDX"),
+    ("Washington, DC", "WAS"),
+])
+def test_matching_qualifier_is_accepted(text, code):
+    assert canonical_place(text, "code") == code
+
+
+@pytest.mark.parametrize("text", ["Paris, TX", "Paris, Texas", "London, Ontario", "Sydney, Nova Scotia", "Portland, Maine"])
+def test_conflicting_qualifier_is_not_resolved(text):
+    assert location_index().lookup(text, "code") is None
+    assert canonical_place(text, "code") == text
+
+
+def test_unknown_place_passes_through():
+    assert canonical_place("Xyzzyville", "city") == "Xyzzyville"
+
+
+def test_canonical_args_uses_each_tools_form():
+    flight = canonical_args("search_flight_deals", {"origin": "JFK", "destination": "Paris", "departure_date": "2026-12-01"})
+    hotel = canonical_args("search_hotel_deals", {"destination": "PAR", "checkin_date": "2026-12-01"})
+    assert (flight["origin"], flight["destination"]) == ("NYC", "PAR")
+    assert hotel["destination"] == "Paris"
+
+
+def test_fold_ignores_case_accents_and_punctuation():
+    assert fold("  Zürich--Flughafen ") == "zurich flughafen"
+    assert fold("St. John's") == "st john s"
+
+
+def test_custom_tables_are_loaded_from_their_files(tmp_path):
+    locations, countries = tmp_path / "locations.tsv", tmp_path / "countries.tsv"
+    locations.write_text("# header\nXXA\tAtlantis\tAQ\tDeep\tATL1\tHarbour Field\tPoseidonia\n", encoding="utf-8")
+    countries.write_text("AQ\tAntarctica|Southern Realm\n", encoding="utf-8")
+    index = LocationIndex.load(str(locations), str(countries))
+    assert index.lookup("Poseidonia", "city").city == "Atlantis"
+    assert index.lookup("Harbour Field", "code").code == "XXA"
+    assert index.lookup("Harbour Field", "city") is None
+    assert index.lookup("Atlantis, Southern Realm", "code").code == "XXA"
+    assert index.lookup("Atlantis, Deep", "code").code == "XXA"
+    assert index.lookup("Atlantis, France", "code") is None
+
+
+def test_resolutions_are_memoized():
+    resolve.cache_clear()
+    for _ in range(3):
+        canonical_place("Lisbon", "code")
+    stats = location_stats()
+    assert stats["loaded"]
+    assert (stats["memo_misses"], stats["memo_hits"]) == (1, 2)
@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+from mcp import StdioServerParameters
+
+import mcp_pool
+from mcp_pool import SessionPool
+
+SERVER = textwrap.dedent('''
+    import os
+
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("pool-test")
+
+    @server.tool()
+    async def pid() -> int:
+        return os.getpid()
+
+    @server.tool()
+    async def crash() -> str:
+        os._exit(1)
+
+    server.run()
+''')
+
+
+@pytest.fixture
+def server_params(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(SERVER)
+    return StdioServerParameters(command=sys.executable, args=[str(script)])
+
+
+async def pid(slot) -> int:
+    result = await slot.session.call_tool("pid", {})
+    return int(result.content[0].text)
+
+
+async def wait_for(condition, timeout=20.0):
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError("condition not reached")
+
+
+def test_calls_spread_over_warm_sessions_up_to_their_limit(server_params):
+    async def scenario():
+        async with SessionPool(server_params, size=2, per_session=1) as pool:
+            assert pool.stats()["healthy"] == 2 and [tool.name for tool in pool.tools] == ["pid", "crash"]
+
+            async def call(slot):
+                await asyncio.sleep(0.1)
+                return await pid(slot)
+
+            pids = await asyncio.gather(*(pool.run(call) for _ in range(4)))
+            return pids, pool.stats()
+
+    pids, stats = asyncio.run(scenario())
+    assert len(set(pids)) == 2
+    assert stats["acquired"] == 4 and stats["waited"] == 2 and stats["in_use"] == 0
+
+
+def test_a_server_that_exits_is_respawned(server_params, monkeypatch):
+    monkeypatch.setattr(mcp_pool, "RESPAWN_BACKOFF_BASE", 0.05)
+
+    async def scenario():
+        async with SessionPool(server_params, size=1) as pool:
+            before = await pool.run(pid)
+            with pytest.raises(Exception):
+                await pool.run(lambda slot: slot.session.call_tool("crash", {}), retries=0)
+            await wait_for(lambda: pool.stats()["respawned"] == 1 and pool.stats()["healthy"] == 1)
+            return before, await pool.run(pid), pool.stats()
+
+    before, after, stats = asyncio.run(scenario())
+    assert before != after
+    assert stats["sessions"] == 1 and stats["spawn_failures"] == 0
+
+
+def test_failed_call_checks_its_session_and_close_cancels_the_check(server_params):
+    async def scenario():
+        pool = SessionPool(server_params, size=1)
+        await pool.start()
+        slot = pool.slots[0]
+
+        async def hang(timeout=None):
+            await asyncio.sleep(3600)
+
+        slot.ping = hang  # the check stays in flight until close()
+
+        async def fail(slot):
+            raise ValueError("bad tool arguments")
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await pool.run(fail)
+        await asyncio.sleep(0.05)
+        checking = dict(pool._checking)
+        await pool.close()
+        return checking, pool._checking
+
+    checking, after_close = asyncio.run(scenario())
+    assert list(checking) == [0]  # one check per session, not one per failure
+    assert checking[0].cancelled()
+    assert after_close == {}
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from http_transport import build_app
+from metrics import Histogram, Metrics
+from server import TravelDealsServer
+
+HOTEL_ARGS = {"destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04"}
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(1.0) == 0.4
+    assert histogram.cumulative() == [("0.1", 1), ("0.2", 3), ("0.4", 4), ("+Inf", 4)]
+    assert Histogram().quantile(0.99) == 0.0
+
+
+def test_tool_and_provider_calls_are_counted():
+    metrics = Metrics(enabled=True)
+    started = metrics.tool_started("search")
+    assert metrics.snapshot()["tools"]["search"]["inflight"] == 1
+    metrics.tool_finished("search", started, error=True)
+    metrics.provider_result("amadeus", "ok", 120)
+    metrics.provider_result("amadeus", "timeout", 3000)
+    metrics.add_collector("cache", lambda: {"hits": 3, "ratio": 0.5, "nested": {"size": 2}, "path": "x"})
+
+    snapshot = metrics.snapshot()
+    assert snapshot["tools"]["search"]["count"] == 1
+    assert snapshot["tools"]["search"]["errors"] == 1 and snapshot["tools"]["search"]["inflight"] == 0
+    assert snapshot["providers"]["amadeus"]["status"] == {"ok": 1, "timeout": 1}
+    assert snapshot["cache"]["hits"] == 3
+
+    text = metrics.prometheus()
+    assert 'travel_tool_errors_total{tool="search"} 1' in text
+    assert 'travel_provider_calls_total{provider="amadeus",status="timeout"} 1' in text
+    assert 'travel_provider_duration_seconds_bucket{provider="amadeus",le="+Inf"} 2' in text
+    assert "travel_cache_hits 3" in text and "travel_cache_nested_size 2" in text
+    assert "travel_cache_path" not in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.tool_finished("search", metrics.tool_started("search"))
+    metrics.provider_result("amadeus", "ok", 10)
+    snapshot = metrics.snapshot()
+    assert snapshot["enabled"] is False
+    assert snapshot["tools"] == {} and snapshot["providers"] == {}
+
+
+def test_tool_calls_show_up_in_the_metrics_resource_and_endpoint(monkeypatch):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    async def scenario():
+        server = TravelDealsServer(shared_cache_path=None, price_history_path=None)
+        server.metrics.enabled = True
+        async with create_connected_server_and_client_session(server.server) as client:
+            for _ in range(2):
+                await client.call_tool("search_hotel_deals", HOTEL_ARGS)
+            resource = await client.read_resource("travel://metrics")
+        transport = httpx.ASGITransport(app=build_app(server))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await http.get("/metrics")
+        await server.aclose()
+        return json.loads(resource.contents[0].text), response
+
+    snapshot, response = asyncio.run(scenario())
+    assert snapshot["tools"]["search_hotel_deals"]["count"] == 2
+    assert snapshot["providers"]["demo"]["status"] == {"ok": 1}  # the repeat is a cache hit
+    assert snapshot["cache"]["hits"] == 1
+    assert snapshot["serialization"]["count"] >= 2
+    assert response.status_code == 200
+    assert 'travel_tool_duration_seconds_count{tool="search_hotel_deals"} 2' in response.text
@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from models import TravelDeal, format_dates, parse_dates
+
+
+def hotel(dates: str = "2026-12-01 - 2026-12-04", **fields) -> TravelDeal:
+    values = dict(
+        title="Stay", price=100.0, original_price=120.0, savings=20.0, destination="Paris",
+        dates=dates, provider="Booking.com", rating=4.5, url="https://deals.example/stay",
+        image_url="", deal_type="hotel",
+    )
+    return TravelDeal(**{**values, **fields})
+
+
+def test_dates_are_stored_as_ordinals_and_rebuilt():
+    deal = hotel()
+    assert deal.date_range == (date(2026, 12, 1).toordinal(), date(2026, 12, 4).toordinal())
+    assert deal.dates == "2026-12-01 - 2026-12-04"
+    assert deal.raw_dates is None
+
+    one_way = hotel("2026-12-01")
+    assert one_way.dates == "2026-12-01"
+    assert one_way.end is None and one_way.date_range == (one_way.start, one_way.start)
+
+
+def test_text_that_is_not_a_date_is_kept_verbatim():
+    deal = hotel("Flexible dates")
+    assert deal.dates == "Flexible dates"
+    assert deal.date_range == (None, None)
+    assert parse_dates("soon") == (None, None)
+    assert format_dates(*parse_dates("2026-01-02 - 2026-01-05")) == "2026-01-02 - 2026-01-05"
+
+
+def test_deals_are_slotted_with_shared_strings():
+    first = hotel(provider="".join(["Booking", ".com"]), destination="".join(["Par", "is"]))
+    second = hotel()
+    assert not hasattr(first, "__dict__")
+    assert first.provider is second.provider
+    assert first.destination is second.destination
+    assert first.deal_type is second.deal_type
+
+
+def test_equality_by_value_and_not_hashable():
+    assert hotel() == hotel()
+    assert hotel() != hotel(price=99.0)
+    with pytest.raises(TypeError):
+        hash(hotel())
+    assert "dates='2026-12-01 - 2026-12-04'" in repr(hotel())
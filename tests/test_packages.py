@@ -0,0 +1,66 @@
+import itertools
+import random
+
+import pytest
+
+from models import TravelDeal
+from packages import PackageDeal, top_k_packages
+
+
+def offer(deal_type: str, name: str, price: float, savings: float) -> TravelDeal:
+    return TravelDeal(
+        title=name, price=price, original_price=price + savings, savings=savings,
+        destination="Paris", dates="2026-12-01 - 2026-12-04", provider="Test", rating=4.0,
+        url=f"https://deals.example/{name}", image_url="", deal_type=deal_type,
+        origin="NYC" if deal_type == "flight" else "",
+    )
+
+
+def brute_force(flights, hotels, nights, k, budget_max):
+    pairs = [
+        (flight.savings + hotel.savings * nights, flight.price + hotel.price * nights)
+        for flight, hotel in itertools.product(flights, hotels)
+        if budget_max is None or flight.price + hotel.price * nights <= budget_max
+    ]
+    return sorted(pairs, key=lambda pair: (-pair[0], pair[1]))[:k]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    flights = [
+        offer("flight", f"f{i}", round(rng.uniform(200, 900)), round(rng.uniform(0, 300)))
+        for i in range(rng.randint(1, 25))
+    ]
+    hotels = [
+        offer("hotel", f"h{i}", round(rng.uniform(60, 400)), round(rng.uniform(0, 120)))
+        for i in range(rng.randint(1, 25))
+    ]
+    nights, k = rng.randint(1, 7), rng.randint(1, 8)
+    budget_max = rng.choice([None, 1000, 2500])
+
+    packages, examined = top_k_packages(flights, hotels, nights, k, budget_max)
+
+    assert [(package.savings, package.price) for package in packages] == brute_force(flights, hotels, nights, k, budget_max)
+    assert examined <= len(flights) * len(hotels)
+
+
+def test_prunes_pairs_that_cannot_make_the_top_k():
+    flights = [offer("flight", f"f{i}", 500, 300 - i) for i in range(50)]
+    hotels = [offer("hotel", f"h{i}", 100, 50 - i) for i in range(50)]
+    packages, examined = top_k_packages(flights, hotels, nights=2, k=3)
+    assert [package.savings for package in packages] == [400, 399, 398]
+    assert examined < 50
+
+
+def test_empty_inputs():
+    hotel, flight = offer("hotel", "h", 100, 0), offer("flight", "f", 300, 0)
+    assert top_k_packages([], [hotel], 3) == ([], 0)
+    assert top_k_packages([flight], [hotel], 3, k=0) == ([], 0)
+
+
+def test_package_totals_count_every_night():
+    package = PackageDeal(offer("flight", "f", 300, 50), offer("hotel", "h", 100, 20), nights=3)
+    deal = package.to_travel_deal()
+    assert (deal.price, deal.original_price, deal.savings) == (600, 710, 110)
+    assert (deal.deal_type, deal.origin, deal.destination) == ("package", "NYC", "Paris")
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+from datetime import date, datetime
+
+import pytest
+
+import price_history
+from models import TravelDeal
+from price_history import PriceHistory, parse_month
+from server import TravelDealsServer
+
+SEEN = datetime(2026, 12, 5, 12).timestamp()
+
+
+def deal(price: float, dates: str, deal_type: str = "hotel", destination: str = "Paris") -> TravelDeal:
+    return TravelDeal(
+        f"{deal_type} {price}", price, price * 2, price, destination, dates,
+        "Test", 4.0, f"https://deals.example/{deal_type}/{price}/{dates}", "", deal_type,
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history" / "prices.db")
+
+
+def test_month_names_resolve_to_the_next_such_month():
+    today = date(2026, 10, 18)
+    assert parse_month("2027-02", today) == "2027-02"
+    assert parse_month("November", today) == "2026-11"
+    assert parse_month("sep", today) == "2027-09"
+    assert parse_month("10", today) == "2026-10"
+    assert parse_month("Smarch", today) is None
+
+
+def test_database_is_opened_on_first_use_not_on_construction(path):
+    async def scenario():
+        history = PriceHistory(path, clock=lambda: SEEN)
+        created = os.path.exists(path)
+        history.record([deal(100, "2026-12-10 - 2026-12-12")])
+        await history.flush()
+        await history.aclose()
+        return created
+
+    assert not asyncio.run(scenario())
+    assert os.path.exists(path)
+
+
+def test_rollups_by_type_and_travel_month_include_unwritten_rows(path):
+    async def scenario():
+        history = PriceHistory(path, clock=lambda: SEEN)
+        history.record([
+            deal(100, "2026-12-10 - 2026-12-12"),
+            deal(300, "2026-12-20 - 2026-12-22"),
+            deal(80, "2027-01-10 - 2027-01-12"),
+            deal(500, "2026-12-10", deal_type="flight", destination="PAR"),  # same city as Paris
+        ])
+        buffered = history.rollups("paris")
+        await history.flush()
+        insights = await history.insights("Paris", month="2027-01")
+        await history.aclose()
+        return buffered, insights
+
+    buffered, insights = asyncio.run(scenario())
+    december = buffered[("hotel", "2026-12")]
+    assert (december.count, december.price_min, december.price_max) == (2, 100, 300)
+    assert insights["observations"] == 4
+    assert insights["cheapest_months"] == {"hotel": ["2027-01", "2026-12"], "flight": ["2026-12"]}
+    assert insights["months"]["2026-12"]["hotel"]["avg_price"] == 200
+    assert insights["by_type"]["hotel"]["avg_savings"] == "50%"
+    assert insights["travelling_this_month"]["by_type"].keys() == {"hotel", "flight"}
+    assert insights["travel_month"] == {
+        "month": "2027-01", "observations": 1, "by_type": {"hotel": insights["months"]["2027-01"]["hotel"]},
+    }
+
+
+def test_workers_sharing_a_file_see_each_others_rollups(path, monkeypatch):
+    monkeypatch.setattr(price_history, "PRICE_HISTORY_SYNC_INTERVAL", 0.0)
+
+    async def scenario():
+        first, second = PriceHistory(path), PriceHistory(path)
+        first.record([deal(100, "2026-12-10 - 2026-12-12")])
+        await first.flush()
+        second.record([deal(300, "2026-12-10 - 2026-12-12")])
+        await second.flush()
+        await first.insights("Paris")  # stale: syncs in the background
+        while first._sync_task is not None:
+            await asyncio.sleep(0.01)
+        counts = [(await history.insights("Paris"))["observations"] for history in (first, second)]
+        for history in (first, second):
+            await history.aclose()
+        return counts
+
+    assert asyncio.run(scenario()) == [2, 2]
+
+
+def test_unavailable_database_drops_writes_but_keeps_answering(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+
+    async def scenario():
+        history = PriceHistory(str(blocker / "prices.db"))  # parent is a file
+        history.record([deal(100, "2026-12-10 - 2026-12-12")])
+        insights = await history.insights("Paris")
+        await history.flush()
+        await history.aclose()
+        return insights, history.stats()
+
+    insights, stats = asyncio.run(scenario())
+    assert insights["observations"] == 1
+    assert stats["written"] == 0 and stats["errors"] >= 1
+
+
+def test_destination_insights_tool_reports_recorded_searches(path, monkeypatch):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    checkin = date.today().replace(day=1).isoformat()
+    checkout = date.today().replace(day=3).isoformat()
+
+    async def scenario():
+        server = TravelDealsServer(shared_cache_path=None, price_history_path=path)
+        await server.search_hotel_deals({"destination": "Paris", "checkin_date": checkin, "checkout_date": checkout})
+        [content] = await server.get_destination_insights({"destination": "paris"})
+        await server.aclose()
+        return json.loads(content.text.split("\n\n", 1)[1])
+
+    insights = asyncio.run(scenario())
+    assert insights["price_history"]["observations"] == 2
+    assert insights["avg_savings_travelling_this_month"].keys() == {"hotel"}
+    assert insights["best_time_to_visit"] == {"hotel": [checkin[:7]]}
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from models import TravelDeal
+from progress import ProgressReporter
+from providers import ProviderResult
+from server import TravelDealsServer
+
+HOTEL_ARGS = {"destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04"}
+
+
+class RecordingSession:
+    """Stands in for the MCP session a reporter writes to"""
+
+    def __init__(self):
+        self.progress, self.logs = [], []
+
+    async def send_progress_notification(self, token, progress, total=None, message=None):
+        self.progress.append((token, progress, total, message))
+
+    async def send_log_message(self, level, data, logger=None, related_request_id=None):
+        self.logs.append(data)
+
+
+def offer(title: str, price: float, savings: float) -> TravelDeal:
+    return TravelDeal(title, price, price + savings, savings, "Paris", "2026-12-01 - 2026-12-04", "Test", 4.0, "", "", "hotel")
+
+
+@pytest.fixture
+def demo_server(monkeypatch):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    return TravelDealsServer(shared_cache_path=None, price_history_path=None)
+
+
+def call(server, arguments, with_progress):
+    progress, logs = [], []
+
+    async def on_progress(done, total, message):
+        progress.append((done, total, message))
+
+    async def on_log(params):
+        logs.append(params.data)
+
+    async def run():
+        async with create_connected_server_and_client_session(server.server, logging_callback=on_log) as client:
+            result = await client.call_tool(
+                "search_hotel_deals", arguments, progress_callback=on_progress if with_progress else None,
+            )
+        await server.aclose()
+        return result
+
+    return asyncio.run(run()), progress, logs
+
+
+def test_search_streams_progress_and_best_so_far(demo_server):
+    result, progress, logs = call(demo_server, HOTEL_ARGS, with_progress=True)
+    assert not result.isError
+    assert progress == [(1.0, 1.0, "demo: ok (2 deals)")]
+    assert [log["provider"] for log in logs] == ["demo"]
+    assert [deal["savings"] for deal in logs[0]["best_so_far"]] == [100, 75]
+
+
+def test_no_progress_token_means_no_notifications(demo_server):
+    result, progress, logs = call(demo_server, HOTEL_ARGS, with_progress=False)
+    assert not result.isError
+    assert progress == [] and logs == []
+
+
+def test_reporter_counts_providers_and_keeps_affordable_best_deals():
+    async def scenario():
+        session = RecordingSession()
+        reporter = ProgressReporter(session, "token", 7, "search_hotel_deals", total=2, budget_max=200, top_n=2)
+        await reporter(ProviderResult("a", "ok", [offer("x", 150, 10), offer("y", 300, 90)]))
+        await reporter(ProviderResult("b", "timeout"))
+        reporter.close()
+        await reporter(ProviderResult("c", "ok", [offer("z", 100, 50)]))
+        return session
+
+    session = asyncio.run(scenario())
+    assert [(done, total) for _, done, total, _ in session.progress] == [(1, 2), (2, 2)]
+    assert session.progress[1][3] == "b: timeout (0 deals)"
+    assert [deal["title"] for deal in session.logs[-1]["best_so_far"]] == ["x"]  # y is over budget
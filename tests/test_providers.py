@@ -0,0 +1,142 @@
+import asyncio
+
+import httpx
+import pytest
+
+import stub_providers
+from providers import AmadeusProvider, BookingProvider, RapidAPIBookingProvider, fan_out
+from resilience import CircuitBreaker
+
+FLIGHT_ARGS = {"origin": "JFK", "destination": "CDG", "departure_date": "2026-12-01"}
+HOTEL_ARGS = {"destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04", "guests": 2}
+
+
+@pytest.fixture
+def stub():
+    """Start a stub provider on a free port; yields (base url, server)"""
+    servers = []
+
+    def start(**settings):
+        server = stub_providers.serve(0, **settings)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def search(providers, deal_type, args, budget=5.0):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await fan_out(client, providers, deal_type, args, budget=budget)
+
+    return asyncio.run(run())
+
+
+def stats(base_url):
+    with httpx.Client() as client:
+        return client.get(f"{base_url}/_faults").json()
+
+
+def test_flights_from_one_provider(stub):
+    base_url, _ = stub(latency_ms=5)
+    result = search([AmadeusProvider("key", base_url)], "flight", FLIGHT_ARGS)
+    assert not result.partial
+    assert [r.status for r in result.providers] == ["ok"]
+    assert len(result.deals) == stub_providers.DEALS_PER_RESPONSE
+    assert all(deal.origin == "JFK" and deal.destination == "CDG" for deal in result.deals)
+
+
+def test_hotels_merged_across_providers_skipping_others(stub):
+    base_url, _ = stub(latency_ms=5)
+    providers = [
+        RapidAPIBookingProvider("key", base_url),
+        BookingProvider("key", base_url),
+        AmadeusProvider("key", base_url),  # flights only
+    ]
+    result = search(providers, "hotel", HOTEL_ARGS)
+    assert {r.provider: r.status for r in result.providers} == {"rapidapi": "ok", "booking": "ok"}
+    assert result.deals
+    assert all(deal.deal_type == "hotel" for deal in result.deals)
+    assert len(result.deals) == sum(len(r.deals) for r in result.providers)
+
+
+def test_failing_provider_opens_its_breaker(stub):
+    down_url, _ = stub(latency_ms=5, error_ratio=1.0, error_status=500)
+    up_url, _ = stub(latency_ms=5)
+    failing = RapidAPIBookingProvider("key", down_url)
+    failing.breaker = CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, open_seconds=60)
+    healthy = BookingProvider("key", up_url)
+
+    statuses = [
+        {r.provider: r.status for r in search([failing, healthy], "hotel", HOTEL_ARGS).providers}
+        for _ in range(4)
+    ]
+    assert [s["rapidapi"] for s in statuses] == ["error", "error", "circuit_open", "circuit_open"]
+    assert all(s["booking"] == "ok" for s in statuses)
+    assert failing.breaker.state == "open"
+    assert stats(down_url)["requests"] == 2
+
+
+def test_slow_provider_is_cut_off_by_the_budget(stub):
+    slow_url, _ = stub(latency_ms=2000)
+    fast_url, _ = stub(latency_ms=5)
+    result = search(
+        [RapidAPIBookingProvider("key", slow_url), BookingProvider("key", fast_url)],
+        "hotel", HOTEL_ARGS, budget=0.3,
+    )
+    assert result.partial
+    assert {r.provider: r.status for r in result.providers} == {"rapidapi": "budget_exceeded", "booking": "ok"}
+    assert len(result.deals) == stub_providers.DEALS_PER_RESPONSE
+    assert result.elapsed_ms < 1500
+
+
+def test_amadeus_reuses_its_access_token_and_renews_a_rejected_one(stub):
+    base_url, _ = stub(latency_ms=5)
+    provider = AmadeusProvider("key", base_url, api_secret="secret")
+    for _ in range(3):
+        assert [r.status for r in search([provider], "flight", FLIGHT_ARGS).providers] == ["ok"]
+    assert stats(base_url)["tokens"] == 1
+
+    provider._token = "revoked"  # still within its lifetime, but the API answers 401
+    result = search([provider], "flight", FLIGHT_ARGS)
+    assert [r.status for r in result.providers] == ["ok"]
+    assert len(result.deals) == stub_providers.DEALS_PER_RESPONSE
+    assert stats(base_url)["tokens"] == 2
+
+
+def test_amadeus_renews_an_expired_token(stub):
+    base_url, _ = stub(latency_ms=5)
+    provider = AmadeusProvider("key", base_url, api_secret="secret")
+    search([provider], "flight", FLIGHT_ARGS)
+    provider._token_expires_at = 0.0
+    search([provider], "flight", FLIGHT_ARGS)
+    assert stats(base_url)["tokens"] == 2
+
+
+def test_hotel_providers_search_by_resolved_destination_id(stub):
+    base_url, _ = stub(latency_ms=5)
+    rapidapi, booking = RapidAPIBookingProvider("key", base_url), BookingProvider("key", base_url)
+    for destination in ("Chicago", "Chicago", "Miami"):
+        result = search([rapidapi, booking], "hotel", {**HOTEL_ARGS, "destination": destination})
+        assert {r.provider: len(r.deals) for r in result.providers} == {
+            "rapidapi": stub_providers.DEALS_PER_RESPONSE,
+            "booking": stub_providers.DEALS_PER_RESPONSE,
+        }
+        assert all(destination in deal.title for deal in result.deals)
+    # RapidAPI: one lookup per distinct name; Booking.com: every page of US cities once
+    us_cities = sum(country == "us" for _, country in stub_providers.CITIES.values())
+    assert stats(base_url)["lookups"] == 2 + -(-us_cities // stub_providers.CITIES_PER_PAGE)
+
+
+def test_unknown_destination_finds_no_hotels(stub):
+    base_url, _ = stub(latency_ms=5)
+    result = search(
+        [RapidAPIBookingProvider("key", base_url), BookingProvider("key", base_url)],
+        "hotel", {**HOTEL_ARGS, "destination": "Atlantis"},
+    )
+    assert {r.provider: r.status for r in result.providers} == {"rapidapi": "ok", "booking": "ok"}
+    assert result.deals == []
+    assert stats(base_url)["requests"] == 0
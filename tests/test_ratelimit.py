@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from ratelimit import AdaptiveLimiter, ProviderLimiter, Throttled, TokenBucket, retry_after_seconds
+
+
+def test_bucket_spends_burst_then_refills_at_rate():
+    now = [1000.0]
+    bucket = TokenBucket(rate=2, burst=3, clock=lambda: now[0])
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+    now[0] += 0.5
+    assert bucket.try_acquire()
+    now[0] += 10
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_pause_blocks_until_it_ends():
+    now = [1000.0]
+    bucket = TokenBucket(rate=10, burst=10, clock=lambda: now[0])
+    bucket.pause(2)
+    assert not bucket.try_acquire()
+    assert bucket.delay() == pytest.approx(2)
+    now[0] += 2
+    assert bucket.try_acquire()
+
+
+def test_unlimited_bucket_always_admits():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.try_acquire() for _ in range(100))
+
+
+def test_acquire_sheds_when_no_token_arrives_in_time():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.try_acquire()
+    with pytest.raises(Throttled):
+        asyncio.run(bucket.acquire(timeout=0.1))
+
+
+def test_aimd_grows_additively_and_backs_off_once_per_round():
+    now = [1000.0]
+    limiter = AdaptiveLimiter(initial=4, minimum=2, maximum=8, clock=lambda: now[0])
+    for _ in range(4):
+        limiter.on_success(100)
+    assert limiter.limit == pytest.approx(5, abs=0.2)
+
+    limiter.on_overload()
+    cut = limiter.limit
+    assert cut == pytest.approx(5 * 0.7, abs=0.2)
+    limiter.on_overload()  # same round: no second cut
+    assert limiter.limit == cut
+    now[0] += 1
+    limiter.on_overload()
+    assert limiter.limit < cut
+
+    for _ in range(10):
+        now[0] += 1
+        limiter.on_overload()
+    assert limiter.limit == 2
+
+
+def test_latency_growth_counts_as_overload():
+    limiter = AdaptiveLimiter(initial=8, tolerance=2.0)
+    limiter.on_success(100)
+    for _ in range(10):
+        limiter.on_success(1000)
+    assert limiter.limit < 8
+
+
+def test_waiters_queue_beyond_the_limit():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        await limiter.acquire(1)
+        queued = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0)
+        waiting = limiter.waiting
+        limiter.release()
+        await queued
+        return waiting, limiter
+
+    waiting, limiter = asyncio.run(scenario())
+    assert waiting == 1
+    assert limiter.inflight == 1 and limiter.waiting == 0
+
+
+def test_provider_quota_is_split_between_workers():
+    limiter = ProviderLimiter.for_provider("amadeus", shares=4)
+    whole = ProviderLimiter.for_provider("amadeus", shares=1)
+    assert limiter.bucket.rate == pytest.approx(whole.bucket.rate / 4)
+    assert limiter.bucket.burst == max(whole.bucket.burst // 4, 1)
+
+
+def test_429_backs_off_and_honours_retry_after():
+    limiter = ProviderLimiter(rate=10, burst=10, concurrency=AdaptiveLimiter(initial=8))
+    limiter.record(50, 200)
+    limiter.record(50, 429, retry_after=1.5)
+    assert limiter.concurrency.limit < 8
+    assert not limiter.bucket.try_acquire()
+    assert limiter.bucket.delay() == pytest.approx(1.5, abs=0.1)
+    assert limiter.stats()["overloads"] == 1
+
+
+def test_headroom_keeps_a_reserve_free():
+    limiter = ProviderLimiter(rate=10, burst=10, concurrency=AdaptiveLimiter(initial=4, minimum=4, maximum=4))
+    assert limiter.has_headroom(0.5)
+    for _ in range(5):
+        limiter.bucket.try_acquire()
+    assert not limiter.has_headroom(0.5)  # the next call would dip into the reserved half
+
+
+class Response:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+def test_retry_after_accepts_seconds_only():
+    assert retry_after_seconds(Response(**{"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(Response(**{"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert retry_after_seconds(Response()) is None
+    assert retry_after_seconds(None) is None
@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+
+import stub_providers
+from providers import AmadeusProvider, fan_out
+from resilience import PROVIDER_RETRIES, CircuitBreaker, HedgePolicy, backoff_delay, retryable
+
+FLIGHT_ARGS = {"origin": "JFK", "destination": "CDG", "departure_date": "2026-12-01"}
+
+
+def test_breaker_opens_probes_and_closes():
+    now = [1000.0]
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_ratio=0.5, open_seconds=30, half_open_probes=1, clock=lambda: now[0])
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(ok, 10)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()  # the one half-open probe
+    assert not breaker.allow()
+    breaker.record(True, 10)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_and_slow_calls_count_as_failures():
+    now = [1000.0]
+    breaker = CircuitBreaker(window=4, min_calls=2, failure_ratio=1.0, slow_call_ms=100, open_seconds=5, clock=lambda: now[0])
+    breaker.record(True, 500)
+    breaker.record(True, 500)
+    assert breaker.state == "open"
+    now[0] += 5
+    assert breaker.allow()
+    breaker.record(False, 10)
+    assert breaker.state == "open"
+    assert breaker.counters["opened"] == 2
+
+
+def test_released_probe_frees_the_half_open_slot():
+    now = [1000.0]
+    breaker = CircuitBreaker(min_calls=1, failure_ratio=1.0, open_seconds=1, clock=lambda: now[0])
+    breaker.record(False, 10)
+    now[0] += 1
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_backoff_is_jittered_below_an_exponential_cap():
+    for attempt, cap in ((1, 0.1), (2, 0.2), (4, 0.8)):
+        delays = [backoff_delay(attempt, base=0.1) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_only_transport_errors_and_gateway_statuses_are_retried():
+    request = httpx.Request("GET", "https://api.example/")
+
+    def status_error(code):
+        return httpx.HTTPStatusError("failed", request=request, response=httpx.Response(code, request=request))
+
+    assert retryable(httpx.ConnectError("refused", request=request))
+    assert retryable(status_error(503))
+    assert not retryable(status_error(500))
+    assert not retryable(status_error(404))
+    assert not retryable(ValueError("bad payload"))
+
+
+def test_hedge_delay_follows_recent_latency_and_is_rationed():
+    policy = HedgePolicy(quantile=0.9, min_delay_ms=50, max_ratio=0.5)
+    assert policy.delay() is None  # too few samples yet
+    for latency in range(10, 210, 10):
+        policy.observe(latency)
+    assert policy.delay() == pytest.approx(0.19)
+    policy.calls = 4
+    assert [policy.allow() for _ in range(3)] == [True, True, False]
+
+    floor = HedgePolicy(min_delay_ms=500)
+    for _ in range(20):
+        floor.observe(10)
+    assert floor.delay() == 0.5
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**settings):
+        server = stub_providers.serve(0, **settings)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def search(provider):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await fan_out(client, [provider], "flight", FLIGHT_ARGS, budget=5.0)
+
+    return asyncio.run(run()).providers[0]
+
+
+def test_gateway_errors_are_retried_then_reported(stub):
+    base_url, _ = stub(latency_ms=5, error_ratio=1.0, error_status=503)
+    result = search(AmadeusProvider("key", base_url))
+    assert result.status == "error"
+    assert result.attempts == PROVIDER_RETRIES + 1
+    assert httpx.get(f"{base_url}/_faults").json()["errors"] == PROVIDER_RETRIES + 1
+
+
+def test_slow_call_is_hedged(stub):
+    base_url, _ = stub(latency_ms=5, tail_ratio=1.0, tail_ms=300)
+    provider = AmadeusProvider("key", base_url)
+    provider.hedging = HedgePolicy(min_delay_ms=50, max_ratio=1.0)
+    for _ in range(20):
+        provider.hedging.observe(20)
+    result = search(provider)
+    assert result.status == "ok" and result.hedged
+    assert provider.hedging.stats()["hedges"] == 1
+    assert httpx.get(f"{base_url}/_faults").json()["requests"] == 2
@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+import pytest
+
+from models import TravelDeal
+from scoring import DealColumns, deal_nights, score, top_n
+
+
+def stay(name: str, price: float, savings: float, rating: float, nights: int = 1, deal_type: str = "hotel") -> TravelDeal:
+    return TravelDeal(
+        title=name, price=price, original_price=price + savings, savings=savings,
+        destination="Paris", dates=f"2026-12-01 - 2026-12-{1 + nights:02d}", provider="Test",
+        rating=rating, url=f"https://deals.example/{name}", image_url="", deal_type=deal_type,
+    )
+
+
+def test_nights_count_for_hotels_only():
+    assert deal_nights(stay("h", 100, 0, 4, nights=3)) == 3
+    assert deal_nights(stay("f", 100, 0, 4, nights=3, deal_type="flight")) == 1
+    undated = TravelDeal("h", 100, 100, 0, "Paris", "flexible", "Test", 4, "", "", "hotel")
+    assert deal_nights(undated) == 1
+
+
+def test_scores_per_criteria():
+    columns = DealColumns([stay("cheap", 100, 0, 3.0), stay("dear", 300, 100, 5.0, nights=2)])
+    assert score(columns, "price").tolist() == [100.0, 0.0]
+    assert score(columns, "rating").tolist() == [60.0, 100.0]
+    assert score(columns, "savings").tolist() == [0.0, 100.0]  # 100 a night over two nights
+    # value: 0.4 * savings % + 0.3 * rating + 0.3 * cheapness
+    assert score(columns, "value").tolist() == pytest.approx([0.3 * 60 + 0.3 * 100, 0.4 * 25 + 0.3 * 100])
+    with pytest.raises(ValueError):
+        score(columns, "distance")
+
+
+@pytest.mark.parametrize("criteria", ["price", "rating", "value", "savings"])
+def test_top_n_matches_a_full_sort(criteria):
+    rng = random.Random(criteria)
+    deals = [
+        stay(f"d{i}", rng.randint(50, 500), rng.randint(0, 200), rng.choice([3.5, 4.0, 4.5, 5.0]), rng.randint(1, 5))
+        for i in range(500)
+    ]
+    columns = DealColumns(deals)
+    scores = score(columns, criteria)
+    indices, top_scores = top_n(columns, criteria, 10)
+    assert top_scores.tolist() == sorted(scores.tolist(), reverse=True)[:10]
+    assert np.array_equal(scores[indices], top_scores)
+
+
+def test_top_n_of_few_or_no_deals():
+    columns = DealColumns([stay("a", 100, 10, 4), stay("b", 80, 10, 4)])
+    indices, _ = top_n(columns, "price", 5)
+    assert [columns.deals[i].title for i in indices] == ["b", "a"]
+    indices, scores = top_n(DealColumns([]), "price", 5)
+    assert len(indices) == len(scores) == 0
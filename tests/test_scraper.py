@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+import pytest
+from playwright.async_api import async_playwright
+from playwright.sync_api import sync_playwright
+
+import stub_site
+
+main = pytest.importorskip("main", reason="needs the browserbase SDK")
+from scraper import BrowserPool, scrape  # noqa: E402
+
+
+def chromium_installed() -> bool:
+    with sync_playwright() as playwright:
+        return os.path.exists(playwright.chromium.executable_path)
+
+
+pytestmark = pytest.mark.skipif(not chromium_installed(), reason="Playwright's Chromium is not installed")
+
+
+@pytest.fixture
+def site():
+    server = stub_site.serve(0, latency_ms=20, api_latency_ms=50)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    yield base_url, lambda: json.loads(urlopen(f"{base_url}/_stats").read())
+    server.shutdown()
+    server.server_close()
+
+
+def run(urls, visit, sessions: int, pages_per_session: int):
+    """scrape() over local Chromium sessions, as main.py --local does; returns (results, sessions before, after)"""
+    async def go():
+        async with async_playwright() as playwright:
+            async with BrowserPool(main.session_opener(playwright, local=True), sessions, pages_per_session) as pool:
+                before = list(pool.sessions)
+                results = [result async for result in scrape(pool, urls, visit)]
+                while pool._reopening:
+                    await asyncio.sleep(0.05)
+                return results, before, list(pool.sessions)
+
+    return asyncio.run(go())
+
+
+def nightly(url: str) -> float:
+    listing = urlparse(url).path.rsplit("/", 1)[-1]
+    return stub_site.stay(listing, parse_qs(urlparse(url).query))["price"]["nightly"]
+
+
+def test_listings_are_scraped_concurrently_over_every_session(site):
+    base_url, _ = site
+    urls = stub_site.listing_urls(base_url, 8)
+    visit, inflight, peak = main.make_visit("extract", "off"), [0], [0]
+
+    async def counted(page, url):
+        inflight[0] += 1
+        peak[0] = max(peak[0], inflight[0])
+        try:
+            return await visit(page, url)
+        finally:
+            inflight[0] -= 1
+
+    results, _, _ = run(urls, counted, sessions=2, pages_per_session=2)
+    assert all(result.ok for result in results), [result.error for result in results]
+    assert sorted(result.url for result in results) == sorted(urls)
+    assert {result.session for result in results} == {0, 1}
+    assert peak[0] == 4
+    assert all(result.data["price"] == nightly(result.url) for result in results)
+    assert all(result.data["price_source"] == "network" for result in results)
+
+
+def test_a_disconnected_browser_is_retried_elsewhere_and_reopened(site):
+    base_url, _ = site
+    urls = stub_site.listing_urls(base_url, 4)
+    visit, dropped = main.make_visit("extract", "off"), []
+
+    async def flaky(page, url):
+        if not dropped:
+            dropped.append(url)
+            await page.context.browser.close()
+        return await visit(page, url)
+
+    results, before, after = run(urls, flaky, sessions=2, pages_per_session=1)
+    assert all(result.ok for result in results), [result.error for result in results]
+    assert len(dropped) == 1
+    replaced = [index for index, session in enumerate(after) if session is not before[index]]
+    assert len(replaced) == 1
+    assert all(session.alive for session in after)
+
+
+def test_extraction_blocks_images_and_fonts(site):
+    base_url, stats = site
+    extracted, _, _ = run(stub_site.listing_urls(base_url, 3), main.make_visit("extract", "off"), 1, 3)
+    blocked = stats()
+    interacted, _, _ = run(stub_site.listing_urls(base_url, 1), main.make_visit("interact", "off"), 1, 1)
+    loaded = stats()
+
+    assert all(result.ok for result in extracted + interacted)
+    assert (blocked["pages"], blocked["api"], blocked["assets"]) == (3, 3, 0)
+    assert loaded["assets"] > 0 and loaded["bookings"] == 1  # interact mode loads the page as a user sees it
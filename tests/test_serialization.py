@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from serialization import Encoder, StaticResources, dumps
+from server import TravelDealsServer
+
+BODY = {"deals": [{"title": "Café", "price": 99.5}], "partial": False}
+HOTEL_ARGS = {"destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04"}
+
+
+def test_compact_and_pretty_encode_the_same_data():
+    compact, pretty = dumps(BODY), dumps(BODY, pretty=True)
+    assert "\n" not in compact and ", " not in compact
+    assert "\n  " in pretty
+    assert json.loads(compact) == json.loads(pretty) == BODY
+    assert "Café" in compact  # not escaped
+    assert len(compact) < len(pretty)
+
+
+def test_encoder_reports_each_encode_to_its_own_observer():
+    seen = []
+    observed, silent = Encoder("compact", observer=lambda seconds, size: seen.append(size)), Encoder("pretty")
+    text = observed.dumps(BODY)
+    silent.dumps(BODY)
+    assert seen == [len(text)]
+    with pytest.raises(ValueError):
+        Encoder("yaml")
+
+
+def test_static_resources_are_encoded_once():
+    calls = []
+
+    def encode(obj):
+        calls.append(obj)
+        return dumps(obj)
+
+    resources = StaticResources({"travel://a": {"x": 1}}, encode)
+    assert [resources.get("travel://a") for _ in range(3)] == ['{"x":1}'] * 3
+    assert len(calls) == 1
+    assert "travel://b" not in resources
+
+
+def test_output_format_is_per_server(monkeypatch):
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    async def scenario():
+        compact = TravelDealsServer(shared_cache_path=None, price_history_path=None, output_format="compact")
+        pretty = TravelDealsServer(shared_cache_path=None, price_history_path=None, output_format="pretty")
+        texts = [(await server.search_hotel_deals(HOTEL_ARGS))[0].text for server in (compact, pretty)]
+        for server in (compact, pretty):
+            await server.aclose()
+        return compact, pretty, texts
+
+    compact, pretty, (compact_text, pretty_text) = asyncio.run(scenario())
+    compact_json, pretty_json = compact_text.split("\n\n", 1)[1], pretty_text.split("\n\n", 1)[1]
+    assert "\n" not in compact_json and "\n  " in pretty_json
+    assert json.loads(compact_json)["deals_found"] == json.loads(pretty_json)["deals_found"] == 2
+    assert "\n" not in compact.static_resources.get("travel://popular-destinations")
+    assert "\n  " in pretty.static_resources.get("travel://popular-destinations")
+    # Each server's metrics count only its own encodes
+    if compact.metrics.enabled:
+        assert compact.metrics.encoded_bytes == len(compact_json)
+        assert pretty.metrics.encoded_bytes == len(pretty_json)
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from shared_cache import SharedCache
+
+
+@pytest.fixture
+def caches(tmp_path):
+    """Two SharedCache handles on one file, standing in for two workers"""
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SharedCache(path, lease=2.0), SharedCache(path, lease=2.0)
+    second.owner = first.owner + 1
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_value_written_by_one_worker_is_read_by_another(caches):
+    first, second = caches
+
+    async def scenario():
+        await first.put(("search", "key"), {"deals": [1, 2]}, ttl=60)
+        return await second.get(("search", "key"))
+
+    value, remaining = asyncio.run(scenario())
+    assert value == {"deals": [1, 2]}
+    assert 0 < remaining <= 60
+
+
+def test_concurrent_miss_waits_for_the_lease_holder(caches):
+    first, second = caches
+
+    async def scenario():
+        calls = []
+
+        async def load(name):
+            calls.append(name)
+            await asyncio.sleep(0.2)
+            return name
+
+        holder = asyncio.create_task(first.get_or_load("key", lambda: load("first"), lambda value: 60))
+        await asyncio.sleep(0.05)
+        waited = await second.get_or_load("key", lambda: load("second"), lambda value: 60)
+        return await holder, waited, calls
+
+    held, waited, calls = asyncio.run(scenario())
+    assert held == ("first", None)
+    assert waited[0] == "first"
+    assert calls == ["first"]
+    assert second.counters["wait_hits"] == 1
+
+
+@pytest.mark.parametrize("outcome", ["error", "partial"])
+def test_waiter_takes_over_as_soon_as_the_lease_is_released(caches, outcome):
+    first, second = caches
+
+    async def scenario():
+        async def holder_load():
+            await asyncio.sleep(0.2)
+            if outcome == "error":
+                raise RuntimeError("upstream down")
+            return "partial"
+
+        async def waiter_load():
+            return "complete"
+
+        holder = asyncio.create_task(first.get_or_load("key", holder_load, lambda value: 0 if value == "partial" else 60))
+        await asyncio.sleep(0.05)
+        started = asyncio.get_running_loop().time()
+        waited = await second.get_or_load("key", waiter_load, lambda value: 60)
+        elapsed = asyncio.get_running_loop().time() - started
+        await asyncio.gather(holder, return_exceptions=True)
+        return waited, elapsed
+
+    waited, elapsed = asyncio.run(scenario())
+    assert waited == ("complete", None)
+    assert elapsed < 1.0  # well before the 2s lease would expire
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    now = [1000.0]
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), clock=lambda: now[0])
+
+    async def scenario():
+        await cache.put("key", "value", ttl=10)
+        fresh = await cache.get("key")
+        now[0] += 11
+        return fresh, await cache.get("key")
+
+    try:
+        fresh, expired = asyncio.run(scenario())
+    finally:
+        cache.close()
+    assert fresh == ("value", 10.0)
+    assert expired == (None, 0.0)
+
+
+def test_results_without_a_ttl_are_not_shared(caches):
+    first, second = caches
+
+    async def partial():
+        return "partial"
+
+    async def scenario():
+        value = await first.get_or_load("key", partial, lambda value: 0)
+        return value, await second.get("key"), first.counters["writes"]
+
+    assert asyncio.run(scenario()) == (("partial", None), (None, 0.0), 0)
@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+
+import bench_startup
+from startup import StartupProfile
+
+NO_UPSTREAM = {"PRICE_HISTORY_PATH": "", "SHARED_CACHE_PATH": "", "DEAL_WATCH_ENABLED": "0"}
+
+# Run in a fresh interpreter, so modules imported by other tests don't count
+LAZY_INIT = textwrap.dedent('''
+    import asyncio, json, sys
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from server import TravelDealsServer
+
+    async def main():
+        server = TravelDealsServer(shared_cache_path=None, price_history_path=None)
+        seen = {}
+        async with create_connected_server_and_client_session(server.server) as client:
+            await client.list_tools()
+            seen["listed"] = [server._http_client is not None, server._providers is not None, "numpy" in sys.modules]
+            await client.call_tool("search_hotel_deals", {
+                "destination": "Paris", "checkin_date": "2026-12-01", "checkout_date": "2026-12-04",
+            })
+            seen["searched"] = [server._http_client is not None, server._providers is not None, "numpy" in sys.modules]
+            await client.call_tool("compare_deals", {"deal_type": "hotels", "criteria": "value"})
+            seen["compared"] = [server._http_client is not None, server._providers is not None, "numpy" in sys.modules]
+        await server.aclose()
+        print(json.dumps(seen))
+
+    asyncio.run(main())
+''')
+
+
+def server_env() -> dict:
+    env = {**os.environ, **NO_UPSTREAM}
+    for name in ("AMADEUS_API_KEY", "RAPIDAPI_KEY", "BOOKING_API_KEY"):
+        env.pop(name, None)
+    return env
+
+
+def test_profile_times_each_stage_and_logs_once(caplog):
+    profile = StartupProfile(enabled=True)
+    profile.mark("imports")
+    with caplog.at_level(logging.INFO, logger="travel-deals-mcp"):
+        profile.finish("first list_tools")
+        profile.finish("first list_tools")
+    assert [name for name, _ in profile.intervals()] == ["imports", "first list_tools"]
+    assert all(ms >= 0 for _, ms in profile.intervals())
+    [record] = caplog.records
+    assert record.getMessage().startswith("startup: imports ") and "(total " in record.getMessage()
+
+
+def test_disabled_profile_records_marks_without_logging(caplog):
+    profile = StartupProfile(enabled=False)
+    with caplog.at_level(logging.INFO, logger="travel-deals-mcp"):
+        profile.finish("first list_tools")
+    assert profile.finished and len(profile.marks) == 1
+    assert caplog.records == []
+
+
+def test_http_client_providers_and_numpy_wait_for_the_first_tool_that_needs_them():
+    result = subprocess.run(
+        [sys.executable, "-c", LAZY_INIT], cwd=bench_startup.BACKEND, env=server_env(),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    seen = json.loads(result.stdout.splitlines()[-1])
+    assert seen == {
+        "listed": [False, False, False],
+        "searched": [True, True, False],
+        "compared": [True, True, True],
+    }
+
+
+def test_spawned_server_lists_its_tools_and_reports_the_startup_profile():
+    run = bench_startup.spawn_once(True, server_env())
+    assert run["tools"] == 5
+    assert 0 < run["initialize_ms"] <= run["list_tools_ms"]
+    [line] = [line for line in run["log"].splitlines() if "startup:" in line]
+    for stage in ("mcp imports", "server modules", "server init", "first list_tools"):
+        assert stage in line